@@ -1,11 +1,19 @@
 import streamlit as st
 from PIL import Image
 
+from utils.datasets import list_datasets
+from utils.sidebar import selected_dataset
+from utils.warmup import prewarm
+
 st.set_page_config(
     page_title= "Home",
     page_icon= "🍜"
 )
 
+# Enquanto a Home é lida, a seleção padrão das páginas é calculada em
+# segundo plano ( utils/warmup.py )
+prewarm( selected_dataset( list_datasets() ) )
+
 # ---logo---
 logo_path = 'logo.jfif'
 logo_image = Image.open( logo_path )
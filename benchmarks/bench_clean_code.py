@@ -0,0 +1,91 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.cleaning import clean_code
+from utils.schema import read_orders
+
+#=============================================================
+# ----------- BENCHMARK DO clean_code ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_clean_code.py [dados/train.csv] [n_linhas ...]
+#
+# As amostras maiores são geradas reamostrando (com reposição) as linhas
+# do train.csv, então mantêm a mesma distribuição dos dados reais.
+# A versão legada limpa o CSV lido sem tipos (pd.read_csv); a atual limpa
+# as mesmas linhas lidas com o read_orders.
+
+DEFAULT_SIZES = [ 45_000, 1_000_000, 10_000_000 ]
+
+
+def clean_code_legacy(df):
+    '''
+    Versão original do clean_code (linha a linha), mantida apenas
+    como referência de tempo e de resultado.
+
+    '''
+    df = df.copy()
+    df['Order_Date'] = pd.to_datetime( df['Order_Date'], format='%d-%m-%Y' )
+    df['Order_Date'] = df['Order_Date'].apply( lambda x: x.date() )
+    cols = ['ID', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'City', 'Festival']
+    df.loc[:, cols] = df.loc[:, cols].apply(lambda x: x.str.strip())
+    df.loc[:, 'Weatherconditions'] = df.loc[:, 'Weatherconditions'].str.strip('conditions ')
+    df = df.loc[df['Delivery_person_Age'] != 'NaN ', :]
+    df = df.loc[df['Road_traffic_density'] != 'NaN', :]
+    df = df.loc[df['City'] != 'NaN', :]
+    df = df.loc[df['Festival'] != 'NaN', :]
+    df['Delivery_person_Age'] = df['Delivery_person_Age'].astype( int )
+    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype( float )
+    df = df.loc[df['multiple_deliveries'] != 'NaN ', :]
+    df['multiple_deliveries'] = df['multiple_deliveries'].astype( int )
+    df = df.reset_index( drop=True )
+    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: re.findall( r'\d+', x )[0]).astype(int)
+    df['Week_of_year'] = pd.to_datetime(df['Order_Date']).dt.isocalendar().week
+    return df
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func( df )
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    sizes = [ int( n ) for n in argv[1:] ] or DEFAULT_SIZES
+
+    df_raw = pd.read_csv( path )
+    df_typed = read_orders( path )
+
+    print( f'{"linhas":>12} {"legado (s)":>12} {"vetorizado (s)":>15} {"speedup":>8} {"ns/linha":>9}' )
+    for n in sizes:
+        raw = df_raw.sample( n, replace=True, random_state=42 ).reset_index( drop=True )
+        typed = df_typed.sample( n, replace=True, random_state=42 ).reset_index( drop=True )
+
+        new, t_new = timed( clean_code, typed )
+        old, t_old = timed( clean_code_legacy, raw )
+
+        # Garante que a versão vetorizada produz os mesmos valores
+        # ( Delivery_distance é uma coluna nova, os tipos agora são compactos
+        #   e as linhas saem ordenadas por data )
+        expected = old[ new.columns.drop( 'Delivery_distance' ) ]
+        expected = expected.astype( new.dtypes[ expected.columns ].to_dict() )
+        expected = expected.sort_values( 'Order_Date', kind='stable', ignore_index=True )
+        pd.testing.assert_frame_equal( new.drop( columns='Delivery_distance' ), expected )
+
+        print( f'{n:>12,} {t_old:>12.2f} {t_new:>15.2f} {t_old / t_new:>7.1f}x {t_new / n * 1e9:>9.0f}' )
+        del raw, typed, new, old
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
@@ -0,0 +1,85 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.cleaning import clean_code
+from utils.cube import build_cube, rollup
+from utils.schema import read_orders
+
+#=============================================================
+# ----------- BENCHMARK DO CUBO PRÉ-AGREGADO ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_cube.py [dados/train.csv] [n_linhas ...]
+#
+# Para cada tamanho (reamostrando o train.csv) calcula as agregações dos
+# gráficos das páginas de duas formas:
+#   - pedidos: groupby sobre as linhas, como as páginas faziam
+#   - cubo: rollup sobre as células do cubo
+# O tempo do cubo deve ficar praticamente constante enquanto o número de
+# pedidos cresce (depende do número de células, não de pedidos).
+
+DEFAULT_SIZES = [ 100_000, 400_000, 1_600_000 ]
+
+TIME = { 'Time_taken(min)': [ 'mean', 'std' ] }
+
+RATINGS = { 'Delivery_person_Ratings': [ 'mean', 'std' ] }
+
+# ( agrupamento, medidas ) usados pelos gráficos e tabelas
+AGGREGATIONS = [
+    ( 'Order_Date', None ),
+    ( 'Week_of_year', None ),
+    ( 'Road_traffic_density', None ),
+    ( [ 'City', 'Road_traffic_density' ], None ),
+    ( 'Road_traffic_density', RATINGS ),
+    ( 'Weatherconditions', RATINGS ),
+    ( 'Festival', TIME ),
+    ( 'City', TIME ),
+    ( 'City', { 'Delivery_distance': [ 'mean' ] } ),
+    ( [ 'City', 'Road_traffic_density' ], TIME ),
+    ( [ 'City', 'Type_of_order' ], TIME ),
+]
+
+
+def raw(df):
+    for by, measures in AGGREGATIONS:
+        groups = df.groupby( by, observed=True )
+        ( groups.ID.count() if measures is None else groups.agg( measures ) ).sort_index()
+
+
+def cubed(cube):
+    for by, measures in AGGREGATIONS:
+        rollup( cube, by, measures )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func( *args )
+    return time.perf_counter() - start
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    sizes = [ int( n ) for n in argv[1:] ] or DEFAULT_SIZES
+
+    df_clean = clean_code( read_orders( path ) )
+
+    print( f'{"linhas":>12} {"células":>9} {"montagem (s)":>13} {"pedidos (ms)":>13} {"cubo (ms)":>10}' )
+    for n in sizes:
+        df = df_clean.sample( n, replace=True, random_state=42 ).sort_values( 'Order_Date', kind='stable', ignore_index=True )
+
+        start = time.perf_counter()
+        cube = build_cube( df )
+        build = time.perf_counter() - start
+
+        print( f'{n:>12,} {len( cube ):>9,} {build:>13.2f} {timed( raw, df ) * 1000:>13.1f} {timed( cubed, cube ) * 1000:>10.1f}' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
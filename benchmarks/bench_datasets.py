@@ -0,0 +1,96 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+import time
+import weakref
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.datasets import DATASETS, list_datasets
+from utils.loader import load_bitmaps, load_data, load_prefix
+from utils.selection import cube_frame, cube_table
+from utils.sidebar import default_selection
+from utils.views import VIEWS, selection_key
+from utils.warmup import table_functions
+
+#=============================================================
+# ----------- BENCHMARK DA TROCA DE DATASETS ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_datasets.py [limite_MB] [dataset ...]
+#
+# Abre cada dataset (por padrão os de dados/) como uma página: DataFrame
+# limpo, bitmaps e índice de somas acumuladas. Depois alterna entre eles
+# algumas vezes e mede o tempo de cada troca com o DATASETS limitado a
+# `limite_MB` (padrão: o limite configurado). Trocas para um dataset que
+# ainda está no cache são instantâneas; as outras recarregam (do snapshot).
+#
+# Com dois ou mais datasets, verifica também a troca no meio de uma página:
+# outra sessão abre o segundo dataset enquanto a página do primeiro monta
+# os gráficos do cubo. As funções do cubo têm que terminar normalmente e
+# as seleções do primeiro dataset têm que sair do VIEWS.
+
+ROUNDS = 3
+
+
+def open_dataset(path):
+    start = time.perf_counter()
+    load_data( path )
+    load_bitmaps( path )
+    load_prefix( path )
+
+    return time.perf_counter() - start
+
+
+def check_eviction_mid_render(path, other):
+    '''
+    Esta função simula a troca de dataset por outra sessão no meio da
+    página de `path`, com o DATASETS no menor limite (só o último fica).
+
+    '''
+    max_bytes, DATASETS.max_bytes = DATASETS.max_bytes, 1
+    try:
+        # Os dois datasets voltam a ser carregados: o limite só vale na carga
+        DATASETS.clear()
+        selection = selection_key( *default_selection( load_data( path ) ) )
+        # Só a visão do cubo segura o índice, como na página
+        table = weakref.ref( cube_table( path ) )
+        cube = cube_frame( path, selection, pin=True )
+
+        # Outra sessão: o dataset de `path` sai do DATASETS
+        open_dataset( other )
+
+        for func in table_functions( 'cube' ):
+            func( cube )
+
+        if table() is not None and VIEWS.cached( table(), selection ):
+            sys.exit( f'As seleções de {path} continuaram no VIEWS depois que o dataset saiu' )
+    finally:
+        DATASETS.max_bytes = max_bytes
+
+    print( f'troca no meio da página {path} -> {other}: ok' )
+
+
+def main(argv):
+    if argv:
+        DATASETS.max_bytes = int( float( argv[0] ) * 2**20 )
+    paths = argv[1:] or list_datasets()
+
+    for path in paths:
+        print( f'primeira carga {path:>30}: {open_dataset( path ) * 1000:8.1f} ms' )
+
+    for _ in range( ROUNDS ):
+        for path in paths:
+            print( f'troca para     {path:>30}: {open_dataset( path ) * 1000:8.1f} ms' )
+
+    print( DATASETS.stats() )
+
+    if len( paths ) > 1:
+        check_eviction_mid_render( paths[0], paths[1] )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
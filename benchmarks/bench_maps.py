@@ -0,0 +1,82 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.maps import points_map
+
+#=============================================================
+# ----------- BENCHMARK DAS CAMADAS DE PONTOS DO MAPA ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_maps.py [pontos ...]
+#
+# Mede o tempo de montar o mapa e gerar o HTML ( o que o folium_static
+# faz ) com N pontos aleatórios em volta das cidades do dataset:
+#   - um folium.Marker por linha ( iterrows, como o mapa fazia antes )
+#   - a camada por colunas ( utils/maps.py )
+# O laço por linha só roda até MAX_ROW_POINTS pontos.
+
+DEFAULT_POINTS = [ 12, 1_000, 10_000, 100_000 ]
+
+MAX_ROW_POINTS = 10_000
+
+
+def random_points(n, seed=42):
+    rng = np.random.default_rng( seed )
+    return pd.DataFrame( {
+        'City': rng.choice( [ 'Urban', 'Metropolitian', 'Semi-Urban' ], n ),
+        'Road_traffic_density': rng.choice( [ 'Low', 'Medium', 'High', 'Jam' ], n ),
+        'Delivery_location_latitude': rng.uniform( 10, 30, n ),
+        'Delivery_location_longitude': rng.uniform( 70, 88, n ),
+    } )
+
+
+def row_map(points):
+    map = folium.Map()
+    for i, row in points.iterrows():
+        folium.Marker([
+        row.Delivery_location_latitude,
+        row.Delivery_location_longitude
+        ], popup=[row.City, row.Road_traffic_density]).add_to( map )
+
+    return map
+
+
+def column_map(points):
+    return points_map( points, 'Delivery_location_latitude', 'Delivery_location_longitude',
+                       popup=['City', 'Road_traffic_density'] )
+
+
+def render(build, points):
+    start = time.perf_counter()
+    html = build( points ).get_root().render()
+
+    return time.perf_counter() - start, len( html )
+
+
+def main(argv):
+    sizes = [ int( arg ) for arg in argv ] or DEFAULT_POINTS
+
+    print( f'{"pontos":>10} {"por linha (ms)":>15} {"HTML (MB)":>10} {"colunas (ms)":>13} {"HTML (MB)":>10}' )
+    for n in sizes:
+        points = random_points( n )
+        row = f'{"-":>15} {"-":>10}'
+        if n <= MAX_ROW_POINTS:
+            seconds, size = render( row_map, points )
+            row = f'{seconds * 1000:15.1f} {size / 2**20:10.2f}'
+        seconds, size = render( column_map, points )
+        print( f'{n:10,} {row} {seconds * 1000:13.1f} {size / 2**20:10.2f}' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
@@ -0,0 +1,71 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.incremental import read_parts, refresh_store, store_dir
+
+#=============================================================
+# ----------- BENCHMARK DA INGESTÃO PARALELA ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_parallel.py [dados/train.csv] [n_partições] [linhas_por_partição] [workers ...]
+#
+# Gera N partições (reamostrando o train.csv) num diretório temporário e
+# mede o tempo do refresh_store com o store vazio para cada número de
+# processos. O speedup é relativo a workers=1 e deve crescer perto do
+# linear até o número de núcleos da máquina (ex.: ~7x com 8 núcleos e
+# partições de tamanho parecido).
+# O resultado de cada rodada é comparado com o da rodada serial.
+
+DEFAULT_WORKERS = [ 1, 2, 4, 8 ]
+
+
+def run(pattern, workers):
+    shutil.rmtree( store_dir( pattern ), ignore_errors=True )
+
+    start = time.perf_counter()
+    manifest = refresh_store( pattern, workers=workers )
+    elapsed = time.perf_counter() - start
+
+    return elapsed, read_parts( pattern, manifest )
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    partitions = int( argv[1] ) if len( argv ) > 1 else 16
+    rows = int( argv[2] ) if len( argv ) > 2 else 200_000
+    workers_list = [ int( n ) for n in argv[3:] ] or DEFAULT_WORKERS
+
+    df_raw = pd.read_csv( path )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range( partitions ):
+            df_raw.sample( rows, replace=True, random_state=i ).to_csv( os.path.join( tmp, f'pedidos_{i:03d}.csv' ), index=False )
+
+        pattern = os.path.join( tmp, 'pedidos_*.csv' )
+        print( f'{partitions} partições de {rows:,} linhas, {os.cpu_count()} núcleos' )
+        print( f'{"workers":>8} {"tempo (s)":>10} {"speedup":>8}' )
+
+        baseline = reference = None
+        for workers in workers_list:
+            elapsed, df = run( pattern, workers )
+            if reference is None:
+                baseline, reference = elapsed, df
+            else:
+                pd.testing.assert_frame_equal( df, reference )
+
+            print( f'{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.2f}x' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
@@ -0,0 +1,92 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import random
+import sys
+import time
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from bench_cube import AGGREGATIONS
+from bench_sample import history
+from parity_sql import same
+from utils.bitmaps import build_bitmaps
+from utils.cleaning import clean_code
+from utils.cube import build_cube, rollup
+from utils.filters import filter_rows, take_rows
+from utils.prefix import PrefixIndex
+from utils.schema import read_orders
+from utils.views import selection_key
+
+#=============================================================
+# ----------- BENCHMARK DO ÍNDICE DE SOMAS ACUMULADAS ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_prefix.py [dados/train.csv] [n_períodos ...]
+#
+# Simula o uso do slider de datas em históricos longos (o train.csv
+# repetido em períodos seguidos, como no bench_sample): cada seleção é um
+# intervalo de datas sorteado, com todas as cidades, tráfegos e climas.
+# Compara, por seleção, os rollups das páginas ( AGGREGATIONS ):
+#   - cubo: filtro das células + rollup
+#   - índice: rollup na visão do PrefixIndex
+# separando os gráficos por data (uma linha por dia) dos demais, e
+# confere que os dois caminhos dão os mesmos resultados.
+
+DEFAULT_PERIODS = [ 1, 4, 16 ]
+
+SELECTIONS = 20
+
+
+def timed(make_view, selections, aggregations):
+    start = time.perf_counter()
+    for selection in selections:
+        view = make_view( selection )
+        for by, measures in aggregations:
+            rollup( view, by, measures )
+
+    return ( time.perf_counter() - start ) / len( selections )
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    periods = [ int( n ) for n in argv[1:] ] or DEFAULT_PERIODS
+
+    df_clean = clean_code( read_orders( path ) )
+    by_date = [ aggregation for aggregation in AGGREGATIONS if aggregation[0] == 'Order_Date' ]
+    others = [ aggregation for aggregation in AGGREGATIONS if aggregation[0] != 'Order_Date' ]
+
+    print( f'{"pedidos":>10} {"células":>9} {"montagem (ms)":>14} {"MB":>6} '
+           f'{"cubo (ms)":>10} {"índice (ms)":>12} {"por data, cubo":>15} {"por data, índice":>17} {"iguais":>8}' )
+    for n in periods:
+        df = history( df_clean, n )
+        cube = build_cube( df )
+        bitmaps = build_bitmaps( cube )
+
+        start = time.perf_counter()
+        index = PrefixIndex( cube )
+        build = time.perf_counter() - start
+
+        rng = random.Random( 42 )
+        days = df.Order_Date.dt.normalize().unique()
+        options = [ list( df[col].cat.categories ) for col in ( 'City', 'Road_traffic_density', 'Weatherconditions' ) ]
+        selections = [ selection_key( ( days[a], days[b] ), *options )
+                       for a, b in ( sorted( rng.sample( range( len( days ) ), 2 ) ) for _ in range( SELECTIONS ) ) ]
+
+        def filtered(selection):
+            return take_rows( cube, filter_rows( cube, *selection, bitmaps=bitmaps ) )
+
+        times = [ timed( make_view, selections, aggregations ) * 1000
+                  for aggregations in ( others, by_date ) for make_view in ( filtered, index.view ) ]
+
+        equal = sum( same( rollup( filtered( selection ), by, measures ), rollup( index.view( selection ), by, measures ) )
+                     for selection in selections for by, measures in AGGREGATIONS )
+
+        print( f'{len( df ):>10,} {len( cube ):>9,} {build * 1000:>14.1f} {( index.prefix.nbytes + index.grid.nbytes ) / 1e6:>6.1f} '
+               f'{times[0]:>10.1f} {times[1]:>12.1f} {times[2]:>15.1f} {times[3]:>17.1f} {equal:>4}/{len( selections ) * len( AGGREGATIONS )}' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
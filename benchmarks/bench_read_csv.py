@@ -0,0 +1,74 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+#=============================================================
+# ----------- BENCHMARK DA LEITURA DO CSV ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_read_csv.py [dados/train.csv] [n_linhas ...]
+#
+# Compara, em processos novos, tempo e pico de memória de:
+#   - genérico: pd.read_csv sem tipos (tudo texto/object)
+#   - esquema:  read_orders (tipos, sentinelas e colunas no parser pyarrow)
+
+DEFAULT_SIZES = [ 45_000, 1_000_000 ]
+
+GENERIC = '''
+import pandas as pd
+df = pd.read_csv( {csv!r} )
+'''
+
+TYPED = '''
+from utils.schema import read_orders
+df = read_orders( {csv!r} )
+'''
+
+# Tempo da leitura, memória do DataFrame e pico de RSS do processo (VmHWM, Linux)
+REPORT = '''
+import time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+with open( '/proc/self/status' ) as f:
+    peak = next( line.split()[1] for line in f if line.startswith( 'VmHWM' ) )
+print( elapsed, df.memory_usage( deep=True ).sum(), peak )
+'''
+
+
+def run(code):
+    output = subprocess.check_output( [ sys.executable, '-c', REPORT.format( code=code ) ], cwd=ROOT )
+    elapsed, frame_bytes, peak_kb = output.split()[-3:]
+    return float( elapsed ), int( frame_bytes ) / 2**20, int( peak_kb ) / 1024
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    sizes = [ int( n ) for n in argv[1:] ] or DEFAULT_SIZES
+
+    df_raw = pd.read_csv( path )
+
+    print( f'{"linhas":>12} {"leitor":>9} {"tempo (s)":>10} {"frame (MB)":>11} {"pico (MB)":>10}' )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv = os.path.join( tmp, f'orders_{n}.csv' )
+            df_raw.sample( n, replace=True, random_state=42 ).to_csv( csv, index=False )
+
+            for name, code in ( ( 'genérico', GENERIC ), ( 'esquema', TYPED ) ):
+                elapsed, frame_mb, peak_mb = run( code.format( csv=csv ) )
+                print( f'{n:>12,} {name:>9} {elapsed:>10.2f} {frame_mb:>11.1f} {peak_mb:>10.0f}' )
+
+            os.remove( csv )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
@@ -0,0 +1,99 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from bench_cube import AGGREGATIONS
+from utils.bitmaps import build_bitmaps
+from utils.cleaning import clean_code
+from utils.cube import build_cube, rollup
+from utils.filters import filter_rows, take_rows
+from utils.sample import build_sample, confidence
+from utils.schema import read_orders
+from utils.views import selection_key
+
+#=============================================================
+# ----------- BENCHMARK DO MODO APROXIMADO ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_sample.py [dados/train.csv] [n_períodos ...]
+#
+# Simula históricos longos repetindo o train.csv em períodos seguidos
+# (cada cópia deslocada para depois da anterior) e compara, para uma
+# seleção com parte das cidades e dos climas:
+#   - exato: filtro + rollups sobre o cubo
+#   - prévia: filtro + rollups sobre a amostra estratificada
+# O cubo cresce com o número de dias e a amostra tem tamanho fixo.
+# Mostra também o maior erro relativo da prévia nas contagens por cidade
+# e tráfego e quantas delas o intervalo de 95% cobre.
+
+DEFAULT_PERIODS = [ 1, 4, 16 ]
+
+
+def history(df, periods):
+    '''
+    Esta função repete o dataset `periods` vezes, cada cópia com as datas
+    deslocadas para depois da anterior.
+
+    '''
+    span = df.Order_Date.max() - df.Order_Date.min() + pd.Timedelta( days=1 )
+    copies = []
+    for k in range( periods ):
+        copy = df.copy()
+        copy['Order_Date'] = copy['Order_Date'] + span * k
+        copy['Week_of_year'] = copy['Order_Date'].dt.isocalendar().week.astype( 'int8' )
+        copies.append( copy )
+
+    return pd.concat( copies, ignore_index=True )
+
+
+def timed(table, bitmaps, selection):
+    start = time.perf_counter()
+    filtered = take_rows( table, filter_rows( table, *selection, bitmaps=bitmaps ) )
+    for by, measures in AGGREGATIONS:
+        rollup( filtered, by, measures )
+
+    return filtered, time.perf_counter() - start
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    periods = [ int( n ) for n in argv[1:] ] or DEFAULT_PERIODS
+
+    df_clean = clean_code( read_orders( path ) )
+
+    print( f'{"pedidos":>10} {"células":>9} {"amostra":>8} {"exato (ms)":>11} {"prévia (ms)":>12} {"erro máx":>9} {"cobertura":>10}' )
+    for n in periods:
+        df = history( df_clean, n )
+        cube = build_cube( df )
+        sample = build_sample( df )
+
+        cities = list( df.City.cat.categories )
+        weather = list( df.Weatherconditions.cat.categories )
+        selection = selection_key( ( df.Order_Date.min(), df.Order_Date.max() ),
+                                   cities[:2], list( df.Road_traffic_density.cat.categories ), weather[::2] )
+
+        exact, exact_time = timed( cube, build_bitmaps( cube ), selection )
+        preview, preview_time = timed( sample, build_bitmaps( sample ), selection )
+
+        by = [ 'City', 'Road_traffic_density' ]
+        counts = rollup( exact, by )
+        estimate = rollup( preview, by ).reindex( counts.index )
+        ci = confidence( preview, by ).reindex( counts.index )
+        error = np.max( np.abs( estimate - counts ) / counts )
+        covered = np.mean( np.abs( estimate - counts ) <= ci )
+
+        print( f'{len( df ):>10,} {len( cube ):>9,} {len( sample ):>8,} {exact_time * 1000:>11.1f} {preview_time * 1000:>12.1f} '
+               f'{error:>9.1%} {covered:>10.0%}' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
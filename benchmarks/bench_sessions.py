@@ -0,0 +1,85 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import gc
+import os
+import pickle
+import sys
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.filters import filter_rows
+from utils.bitmaps import build_bitmaps
+from utils.loader import load_data
+
+#=============================================================
+# ----------- TESTE DE CARGA: MEMÓRIA POR SESSÃO ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_sessions.py [dados/train.csv] [n_sessoes]
+#
+# Simula N sessões abertas ao mesmo tempo, cada uma segurando o dataset e
+# a sua seleção da barra lateral, e mede a memória (RSS) do processo:
+#   - compartilhado: load_data (um único DataFrame por processo) + filter_rows
+#   - por sessão: cópia do dataset por sessão (o que o st.cache_data faz,
+#     via pickle) + df.query materializando o filtro
+#
+# O DataFrame do load_data é carregado uma vez e entregue a todas as
+# sessões, que é o que o DATASETS ( utils/datasets.py ) faz no servidor.
+
+DEFAULT_SESSIONS = 20
+
+# Índices bitmap do dataset compartilhado (o que o loader.load_bitmaps guarda)
+BITMAPS = None
+
+
+def rss_mb():
+    with open( '/proc/self/status' ) as f:
+        return int( next( line.split()[1] for line in f if line.startswith( 'VmRSS' ) ) ) / 1024
+
+
+def session_shared(df_shared):
+    df1 = df_shared
+    cities = list( df1.City.unique() )[:2]
+    rows = filter_rows( df1, ( df1.Order_Date.min(), df1.Order_Date.max() ), cities,
+                        list( df1.Road_traffic_density.unique() ), list( df1.Weatherconditions.unique() ),
+                        bitmaps=BITMAPS )
+    return df1, rows
+
+
+def session_copy(df_shared):
+    df1 = pickle.loads( pickle.dumps( df_shared ) )
+    cities = list( df1.City.unique() )[:2]
+    return df1, df1[ df1.City.isin( cities ) ]
+
+
+def measure(session, df_shared, n):
+    gc.collect()
+    before = rss_mb()
+    sessions = [ session( df_shared ) for _ in range( n ) ]
+    gc.collect()
+    after = rss_mb()
+    del sessions
+    return ( after - before ) / n
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    n = int( argv[1] ) if len( argv ) > 1 else DEFAULT_SESSIONS
+
+    # Primeira carga fora da medição (é paga uma vez por processo)
+    global BITMAPS
+    df_shared = load_data( path )
+    BITMAPS = build_bitmaps( df_shared )
+
+    shared = measure( session_shared, df_shared, n )
+    copied = measure( session_copy, df_shared, n )
+
+    print( f'{n} sessões, dataset de {df_shared.memory_usage( deep=True ).sum() / 2**20:.1f} MB' )
+    print( f'compartilhado: {shared:8.2f} MB por sessão extra' )
+    print( f'por sessão:    {copied:8.2f} MB por sessão extra' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
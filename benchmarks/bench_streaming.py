@@ -0,0 +1,113 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+sys.path.insert( 0, ROOT )
+
+from utils.cleaning import clean_code
+from utils.schema import read_orders
+from utils.streaming import read_store, stream_clean
+
+#=============================================================
+# ----------- BENCHMARK DE MEMÓRIA DA INGESTÃO EM BLOCOS ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_streaming.py [dados/train.csv] [chunksize] [n_linhas ...]
+#
+# Para cada tamanho gera um CSV (reamostrando o train.csv) e mede o pico de
+# memória (RSS) de um processo novo rodando:
+#   - leitura completa: read_orders + clean_code
+#   - streaming: stream_clean com o chunksize escolhido
+# No streaming o pico deve ficar praticamente constante enquanto a entrada
+# cresce: se o pico do maior tamanho passar o do menor em mais de
+# MAX_STREAMING_GROWTH_MB, o benchmark termina com erro.
+#
+# Antes das medidas, verifica a entrada vazia (só o cabeçalho): o Parquet
+# gravado pelo stream_clean tem que ser lido pelo read_store igual ao que o
+# clean_code retorna para um DataFrame vazio.
+
+DEFAULT_SIZES = [ 100_000, 400_000, 1_600_000 ]
+
+MAX_STREAMING_GROWTH_MB = 50
+
+FULL = '''
+from utils.cleaning import clean_code
+from utils.schema import read_orders
+from utils.schema import read_orders
+clean_code( read_orders( {csv!r} ) )
+'''
+
+STREAMING = '''
+from utils.streaming import stream_clean
+stream_clean( {csv!r}, {out!r}, chunksize={chunksize} )
+'''
+
+# VmHWM (Linux) é o pico de RSS do processo atual. O ru_maxrss não serve
+# aqui porque herda o pico do processo pai durante o fork.
+PEAK = '''
+with open( '/proc/self/status' ) as f:
+    print( next( line.split()[1] for line in f if line.startswith( 'VmHWM' ) ) )
+'''
+
+
+def peak_rss_mb(code):
+    # VmHWM vem em KB
+    output = subprocess.check_output( [ sys.executable, '-c', code + PEAK ], cwd=ROOT )
+    return int( output.split()[-1] ) / 1024
+
+
+def check_empty_input(path, tmp):
+    csv = os.path.join( tmp, 'empty.csv' )
+    with open( path ) as f, open( csv, 'w' ) as out:
+        out.write( f.readline() )
+
+    expected = clean_code( read_orders( csv, nrows=0 ) ).reset_index( drop=True )
+    try:
+        pd.testing.assert_frame_equal( read_store( stream_clean( csv ) ).reset_index( drop=True ), expected )
+    except AssertionError as error:
+        sys.exit( f'O Parquet da entrada vazia difere do clean_code:\n{error}' )
+
+    print( 'entrada vazia: ok' )
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    chunksize = int( argv[1] ) if len( argv ) > 1 else 50_000
+    sizes = [ int( n ) for n in argv[2:] ] or DEFAULT_SIZES
+
+    df_raw = pd.read_csv( path )
+
+    peaks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        check_empty_input( path, tmp )
+
+        print( f'{"linhas":>12} {"csv (MB)":>9} {"completo (MB)":>14} {"streaming (MB)":>15}' )
+        for n in sizes:
+            csv = os.path.join( tmp, f'orders_{n}.csv' )
+            out = os.path.join( tmp, f'orders_{n}.parquet' )
+            df_raw.sample( n, replace=True, random_state=42 ).to_csv( csv, index=False )
+
+            full = peak_rss_mb( FULL.format( csv=csv ) )
+            streaming = peak_rss_mb( STREAMING.format( csv=csv, out=out, chunksize=chunksize ) )
+            peaks.append( streaming )
+
+            print( f'{n:>12,} {os.path.getsize( csv ) / 2**20:>9.0f} {full:>14.0f} {streaming:>15.0f}' )
+            os.remove( csv )
+
+    growth = max( peaks ) - peaks[0]
+    print( f'crescimento do pico no streaming: {growth:.0f} MB (limite {MAX_STREAMING_GROWTH_MB} MB)' )
+    if growth > MAX_STREAMING_GROWTH_MB:
+        sys.exit( f'O pico de memória do streaming cresceu {growth:.0f} MB com a entrada' )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
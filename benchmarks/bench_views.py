@@ -0,0 +1,100 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import random
+import sys
+import time
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.bitmaps import build_bitmaps
+from utils.cube import build_cube
+from utils.geogrid import GeoGrid, build_geogrid
+from utils.filters import filter_rows, take_rows
+from utils.loader import load_data
+from utils.views import VIEWS, selection_key
+from utils.warmup import page_functions, view_table
+
+#=============================================================
+# ----------- BENCHMARK DO CACHE DE SELEÇÕES ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/bench_views.py [dados/train.csv] [n_reruns] [n_combinações]
+#
+# Simula analistas alternando entre poucas combinações de filtros: cada
+# rerun filtra o dataset e o cubo, seleciona a grade espacial e calcula todos os
+# gráficos e tabelas das três páginas. Mede o tempo por rerun sem cache e
+# com o VIEWS, e mostra os contadores de acertos/falhas/despejos.
+
+
+def rerun(tables, selection, functions, cache):
+    '''
+    Esta função simula um rerun: filtra o dataset e o cubo, seleciona as
+    células da grade e chama cada função com a sua tabela ( df1, cube ou
+    grid, pelo VIEW_TABLES ).
+
+    '''
+    key = selection_key( *selection )
+    filtered = {}
+    for name, ( table, select ) in tables.items():
+        if cache is None:
+            filtered[name] = select( table, key )
+        else:
+            filtered[name] = cache.filtered( table, key, lambda table, select=select: select( table, key ) )
+
+    if cache is None:
+        return [ func.__wrapped__( filtered[ view_table( func ) ] ) for func in functions ]
+
+    return [ func( filtered[ view_table( func ) ] ) for func in functions ]
+
+
+def by_rows(bitmaps):
+    # Filtro por linhas com os bitmaps da tabela ( dataset ou cubo )
+    return lambda df, selection: take_rows( df, filter_rows( df, *selection, bitmaps=bitmaps ) )
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    n = int( argv[1] ) if len( argv ) > 1 else 50
+    n_combinations = int( argv[2] ) if len( argv ) > 2 else 4
+
+    df = load_data( path )
+    cube = build_cube( df )
+    grid = build_geogrid( df )
+    tables = { 'df1': ( df, by_rows( build_bitmaps( df ) ) ), 'cube': ( cube, by_rows( build_bitmaps( cube ) ) ), 'grid': ( grid, GeoGrid.select ) }
+    functions = page_functions()
+
+    rng = random.Random( 42 )
+    days = df.Order_Date.dt.normalize().unique()
+    cities = list( df.City.cat.categories )
+    traffic = list( df.Road_traffic_density.cat.categories )
+    weather = list( df.Weatherconditions.cat.categories )
+
+    combinations = []
+    for _ in range( n_combinations ):
+        start, end = sorted( rng.sample( range( len( days ) ), 2 ) )
+        combinations.append( ( ( days[start], days[end] ), rng.sample( cities, 2 ), traffic, rng.sample( weather, 3 ) ) )
+    reruns = [ rng.choice( combinations ) for _ in range( n ) ]
+
+    start = time.perf_counter()
+    for selection in reruns:
+        rerun( tables, selection, functions, None )
+    uncached = ( time.perf_counter() - start ) / n
+
+    # O decorador usa o VIEWS do processo
+    VIEWS.clear()
+    start = time.perf_counter()
+    for selection in reruns:
+        rerun( tables, selection, functions, VIEWS )
+    cached = ( time.perf_counter() - start ) / n
+
+    print( f'{n} reruns, {n_combinations} combinações, {len( functions )} funções das páginas' )
+    print( f'sem cache: {uncached * 1000:8.1f} ms por rerun' )
+    print( f'com cache: {cached * 1000:8.1f} ms por rerun' )
+    print( VIEWS.stats() )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
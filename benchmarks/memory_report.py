@@ -0,0 +1,36 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from bench_clean_code import clean_code_legacy
+from utils.cleaning import clean_code, memory_report
+from utils.schema import read_orders
+
+#=============================================================
+# ----------- RELATÓRIO DE MEMÓRIA POR COLUNA ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/memory_report.py [dados/train.csv]
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+
+    # Antes: CSV lido sem tipos + limpeza original
+    # Depois: read_orders (tipos, sentinelas e colunas no parser) + clean_code
+    df_before = clean_code_legacy( pd.read_csv( path ) )
+    df_after = clean_code( read_orders( path ) )
+
+    with pd.option_context( 'display.width', 200, 'display.max_columns', None ):
+        print( memory_report( df_before, df_after ) )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
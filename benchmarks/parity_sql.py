@@ -0,0 +1,134 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from utils.bitmaps import build_bitmaps
+from utils.cube import build_cube
+from utils.filters import filter_rows, take_rows
+from utils.loader import load_data
+from utils.sql import SqlEngine, backend_name, duckdb
+from utils.views import selection_key
+from utils.warmup import table_functions
+
+#=============================================================
+# ----------- PARIDADE DO BACKEND SQL COM O PANDAS ---------------
+#=============================================================
+#
+# Uso:
+#   python benchmarks/parity_sql.py [dados/train.csv] [n_seleções] [backend ...]
+#
+# Para várias seleções da barra lateral (todas as opções, sorteadas e
+# vazias) chama as funções das páginas que usam o cubo duas vezes:
+#   - pandas: cubo filtrado pelos bitmaps
+#   - sql: visão do SqlEngine (duckdb e/ou sqlite)
+# e compara tabelas, figuras e métricas (tolerância relativa de 1e-9,
+# a ordem das somas muda entre os dois caminhos). Mostra o tempo por
+# seleção de cada backend e termina com erro se houver diferença.
+
+RTOL = 1e-9
+
+
+def same(a, b):
+    '''
+    Esta função compara dois resultados das páginas: DataFrames e Series,
+    figuras do Plotly (dados dos traços), listas e números.
+
+    '''
+    if isinstance( a, pd.DataFrame ) or isinstance( a, pd.Series ):
+        check = pd.testing.assert_frame_equal if isinstance( a, pd.DataFrame ) else pd.testing.assert_series_equal
+        try:
+            check( a, b, check_dtype=False, check_categorical=False, check_index_type=False, rtol=RTOL )
+        except AssertionError:
+            return False
+        return True
+
+    if hasattr( a, 'to_plotly_json' ):
+        return same( a.to_plotly_json()['data'], b.to_plotly_json()['data'] )
+
+    if isinstance( a, dict ):
+        return isinstance( b, dict ) and a.keys() == b.keys() and all( same( a[key], b[key] ) for key in a )
+
+    if isinstance( a, ( list, tuple, np.ndarray, pd.Index ) ):
+        a, b = np.asarray( a ), np.asarray( b )
+        if a.shape != b.shape:
+            return False
+        if a.dtype.kind in 'fiub' and b.dtype.kind in 'fiub':
+            return bool( np.allclose( a, b, rtol=RTOL, atol=0, equal_nan=True ) )
+        return all( same( x, y ) for x, y in zip( a.ravel(), b.ravel() ) )
+
+    if isinstance( a, ( int, float, np.number ) ) and isinstance( b, ( int, float, np.number ) ):
+        return bool( np.isclose( a, b, rtol=RTOL, atol=0, equal_nan=True ) )
+
+    return a == b
+
+
+def selections(df, n):
+    '''
+    Esta função monta as seleções testadas: tudo selecionado, `n`
+    sorteadas e uma sem nenhuma cidade.
+
+    '''
+    rng = random.Random( 42 )
+    days = df.Order_Date.dt.normalize().unique()
+    options = [ list( df[col].cat.categories ) for col in ( 'City', 'Road_traffic_density', 'Weatherconditions' ) ]
+
+    result = [ ( ( days[0], days[-1] ), *options ) ]
+    for _ in range( n ):
+        start, end = sorted( rng.sample( range( len( days ) ), 2 ) )
+        result.append( ( ( days[start], days[end] ), *[ rng.sample( values, rng.randint( 1, len( values ) ) ) for values in options ] ) )
+    result.append( ( ( days[0], days[-1] ), [], *options[1:] ) )
+
+    return [ selection_key( *selection ) for selection in result ]
+
+
+def main(argv):
+    path = argv[0] if argv else 'dados/train.csv'
+    n = int( argv[1] ) if len( argv ) > 1 else 20
+    backends = argv[2:] or ( [ 'duckdb' ] if duckdb is not None else [] ) + [ 'sqlite' ]
+
+    df = load_data( path )
+    cube = build_cube( df )
+    cube_bitmaps = build_bitmaps( cube )
+    functions = [ func.__wrapped__ for func in table_functions( 'cube' ) ]
+    tests = selections( df, n )
+
+    start = time.perf_counter()
+    expected = []
+    for selection in tests:
+        filtered = take_rows( cube, filter_rows( cube, *selection, bitmaps=cube_bitmaps ) )
+        expected.append( [ func( filtered ) for func in functions ] )
+    print( f'{"pandas":>8}: {( time.perf_counter() - start ) / len( tests ) * 1000:8.1f} ms por seleção' )
+
+    diffs = 0
+    for backend in backends:
+        if backend_name( backend ) != backend:
+            print( f'{backend:>8}: não instalado' )
+            continue
+        engine = SqlEngine( cube, backend )
+
+        start = time.perf_counter()
+        results = [ [ func( engine.view( selection ) ) for func in functions ] for selection in tests ]
+        elapsed = ( time.perf_counter() - start ) / len( tests )
+
+        failed = [ ( func.__name__, selection ) for selection, values, base in zip( tests, results, expected )
+                   for func, value, base_value in zip( functions, values, base ) if not same( base_value, value ) ]
+        diffs += len( failed )
+        print( f'{backend:>8}: {elapsed * 1000:8.1f} ms por seleção, '
+               f'{len( tests ) * len( functions ) - len( failed )}/{len( tests ) * len( functions )} resultados iguais' )
+        for name, selection in failed:
+            print( f'    diferente: {name} {selection}' )
+
+    sys.exit( 1 if diffs else 0 )
+
+
+if __name__ == '__main__':
+    main( sys.argv[1:] )
@@ -2,191 +2,33 @@
 # ----------- IMPORTS ---------------
 #---------------------------------------------------
 
-import pandas as pd
 import streamlit as st
-import datetime
-import re
-import plotly.express as px
-import plotly.graph_objects as go
-from haversine import haversine
 from PIL import Image
-import folium
-from streamlit_folium import folium_static
 
-#=============================================================
-# ----------- FUNÇõES ---------------
-#=============================================================
-
-
-def clean_code(df):
-    '''
-    Esta função executa a limpeza do dataset
-    Tipos de limpeza:
-    1- Remoção dos dados NaN
-    2- Mudança do tipo da coluna de dados
-    3- Remoção dos espaços das variáveis de texto.
-    4- Formatação da coluna de datas
-    5- Formatação da coluna de tempo (remoção do texta da variavel numerica)
-    
-    '''
-
-    # Fazendo cópia do dataframe lido
-    df = df_raw.copy()
-    
-    # Conversao de texto para data
-    df['Order_Date'] = pd.to_datetime( df['Order_Date'], format='%d-%m-%Y' )
-    df['Order_Date'] = df['Order_Date'].apply( lambda x: x.date() )
-    
-    ## Remover spaco da string 
-    cols = ['ID', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'City', 'Festival']
-    df.loc[:, cols] = df.loc[:, cols].apply(lambda x: x.str.strip())
-    
-    
-    ## Remover 'conditions ' da string
-    df.loc[:, 'Weatherconditions'] = df.loc[:, 'Weatherconditions'].str.strip('conditions ')
-    
-    # Excluir as linhas com a idade dos entregadores vazia
-    # ( Conceitos de seleção condicional )
-    linhas_vazias = df['Delivery_person_Age'] != 'NaN '
-    df = df.loc[linhas_vazias, :]
-    
-    # Excluir as linhas com tipo de trafego vazio
-    # ( Conceitos de seleção condicional )
-    linhas_vazias = df['Road_traffic_density'] != 'NaN'
-    df = df.loc[linhas_vazias, :]
-    
-    # Excluir as linhas com cidade vazio
-    # ( Conceitos de seleção condicional )
-    linhas_vazias = df['City'] != 'NaN'
-    df = df.loc[linhas_vazias, :]
-    
-    # Excluir as linhas com Festival vazio
-    # ( Conceitos de seleção condicional )
-    linhas_vazias = df['Festival'] != 'NaN'
-    df = df.loc[linhas_vazias, :]
-    
-    
-    # Conversao de texto/categoria/string para numeros inteiros
-    df['Delivery_person_Age'] = df['Delivery_person_Age'].astype( int )
-    
-    # Conversao de texto/categoria/strings para numeros decimais
-    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype( float )
-    
-    
-    # Remove as linhas da culuna multiple_deliveries que tenham o 
-    # conteudo igual a 'NaN '
-    linhas_vazias = df['multiple_deliveries'] != 'NaN '
-    df = df.loc[linhas_vazias, :]
-    df['multiple_deliveries'] = df['multiple_deliveries'].astype( int )
-    
-    # Comando para remover o texto de números
-    df = df.reset_index( drop=True )
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: re.findall( r'\d+', x )[0]).astype(int)
-    
-    
-    # Criando coluna de semana do pedido
-    df['Week_of_year'] = pd.to_datetime(df['Order_Date']).dt.isocalendar().week
-    
-    return df
-
-#-------------------- VISÃO ENTREGADORES -------------------------
-
-#---A menor e maior idade entre os entregadores---
-
-# Mais novo
-def youngest_deliverer(df1):
-    return df1.Delivery_person_Age.min()
-
-# Mais velho
-def oldest_deliverer(df1):
-    return df1.Delivery_person_Age.max()
-
-
-#---A pior e a melhor condição de veículos---
-
-# Melhor condiçãos
-def best_vehicle_condition(df1):
-    return df1.Vehicle_condition.max()
-
-# Pior Condição
-def worst_vehicle_condition(df1):
-    return df1.Vehicle_condition.min()
-
-#---A avaliação médida por entregador---
-
-def deliverer_ratings_mean(df1):
-    return df1.groupby( 'Delivery_person_ID' ).Delivery_person_Ratings.mean().round(2)
-
-#---A avaliação média e o desvio padrão por tipo de tráfego---
-
-def rating_mean_std_by_traffic(df1):
-    mean_std_rating_by_traffic = df1.groupby( 'Road_traffic_density' ).Delivery_person_Ratings.agg( ['mean', 'std'] )
-    mean_std_rating_by_traffic.columns = [ 'Avaliação Média', 'Desvio Padrão' ]
-    mean_std_rating_by_traffic = mean_std_rating_by_traffic.reset_index()
-    
-    return round(mean_std_rating_by_traffic, 2)
-
-#---A avaliação média e o desvio padrão por condição climática---
-
-def rating_mean_std_by_weather(df1):
-    mean_std_rating_by_weather = df1.groupby( 'Weatherconditions' ).Delivery_person_Ratings.agg( ['mean', 'std'] )
-    mean_std_rating_by_weather.columns = [ 'Avaliação Média', 'Desvio Padrão' ]
-    mean_std_rating_by_weather = mean_std_rating_by_weather.reset_index()
-    
-    return round(mean_std_rating_by_weather, 2)
-                                     
-    
-#--- 10 Entregadores mais rápidos por cidade ---    
-def faster_deliverers_by_city(df1):
-    faster_deliverers_by_city = pd.DataFrame(df1.groupby( [ 'City', 'Delivery_person_ID'] )['Time_taken(min)'].mean())
-    faster_deliverers_by_city = faster_deliverers_by_city.sort_values(['City', 'Time_taken(min)']).reset_index()
-    
-    urban_faster_deliverers = faster_deliverers_by_city.query('City == "Urban"').head(10)
-    semiurban_faster_deliverers = faster_deliverers_by_city.query('City == "Semi-Urban"').head(10)
-    metropolitian_faster_deliverers = faster_deliverers_by_city.query('City == "Metropolitian"').head(10)
-    
-    faster_deliverers_by_city = pd.concat( [ urban_faster_deliverers, semiurban_faster_deliverers, metropolitian_faster_deliverers ] ).reset_index(drop=True)
-    return round(faster_deliverers_by_city)
-
-#--- 10 Entregadores mais lentos por cidade ---    
-def slower_deliverers_by_city(df1):
-    slower_deliverers_by_city = pd.DataFrame(df1.groupby( [ 'City', 'Delivery_person_ID'] )['Time_taken(min)'].mean())
-    slower_deliverers_by_city = slower_deliverers_by_city.sort_values(['City', 'Time_taken(min)'], ascending=False).reset_index()
-    
-    urban_slower_deliverers = slower_deliverers_by_city.query('City == "Urban"').head(10)
-    semiurban_slower_deliverers = slower_deliverers_by_city.query('City == "Semi-Urban"').head(10)
-    metropolitian_slower_deliverers = slower_deliverers_by_city.query('City == "Metropolitian"').head(10)
-    
-    slower_deliverers_by_city = pd.concat( [ urban_slower_deliverers, semiurban_slower_deliverers, metropolitian_slower_deliverers ] ).reset_index(drop=True)
-    return round(slower_deliverers_by_city)
-
-
-#-----------FiLTROS---------------
-def filters(df1):  
-    '''
-    Esta função aplica os filtros da barra lateral.
-    1-Filtro de datas
-    2-Filtro de cidades
-    3-Filtro de tipos de trafego
-    4-Filtro de climas
-    
-    '''
-    
-    df1 = df1.query('Order_Date >= @date_slider[0] & Order_Date <= @date_slider[-1] \
-                    & City in @city_options \
-                    & Road_traffic_density in @traffic_options \
-                    & Weatherconditions in @weather_options')
-
-    return df1
+from utils.datasets import list_datasets
+from utils.loader import load_bitmaps, load_data
+from utils.selection import estimated, filtered_frame, preview_note, rerun_when_exact, select_cube
+from utils.sidebar import approximate_mode, dataset_selector, selected_dataset, sidebar_filters
+from utils.views import selection_key
+# Funções da página ( utils/visao_entregadores.py ), as mesmas do pré-cálculo
+from utils.visao_entregadores import (
+    CUBE_VIEWS, best_vehicle_condition, deliverer_ratings_mean, faster_deliverers_by_city,
+    oldest_deliverer, rating_mean_std_by_traffic, rating_mean_std_by_weather,
+    slower_deliverers_by_city, worst_vehicle_condition, youngest_deliverer,
+)
+from utils.warmup import prewarm
 
 #=============================================================
 # ----------- IMPORTANDO DATASET -----------------------------
 #=============================================================
 
-df_raw = pd.read_csv('dados/train.csv')
+# Dataset escolhido na barra lateral ( utils/datasets.py ), dados/train.csv por padrão
+datasets = list_datasets()
+data_path = selected_dataset( datasets )
 
-
-df1 = clean_code( df_raw )
+# Leitura e limpeza em cache, compartilhadas entre sessões e páginas
+df1 = load_data( data_path )
+bitmaps = load_bitmaps( data_path )
 
 
 
@@ -200,6 +42,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# Seleção padrão de todas as páginas calculada em segundo plano ( utils/warmup.py ),
+# depois do set_page_config, o primeiro comando do streamlit da página
+prewarm( data_path )
+
 # ----------- SIDEBAR--------------------------------
 #====================================================
 
@@ -214,48 +60,12 @@ st.sidebar.markdown( '# Curry Company' )
 st.sidebar.markdown( "## Fast 'n Delicious" )
 st.sidebar.markdown( """---""" )
 
-# ---Slider---
+# --- filtros ---
 
-min_date = df1.Order_Date.min()
-max_date = df1.Order_Date.max()
-
-date_slider = st.sidebar.slider(
-    'Selecione um intervalo de data:',
-    value=( min_date, max_date ), 
-    format='DD-MM-YYYY'
-)
-
-st.sidebar.markdown( """---""" )
-
-# --- multi seleção ---
-
-# Cidades
-city_options = st.sidebar.multiselect(
-    'Quais as condições de transito?',
-    options=list(df1.City.unique()),
-    default=list(df1.City.unique())
-         
-)
-
-# Tipos de Trafego
-st.sidebar.markdown( """---""" )
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições de transito?',
-    options=list(df1.Road_traffic_density.unique()),
-    default=list(df1.Road_traffic_density.unique())
-         
-)
-
-# Tipos de Clima
-st.sidebar.markdown( """---""" )
-
-weather_options = st.sidebar.multiselect(
-    'Quais as condições climáticas?',
-    options=list(df1.Weatherconditions.unique()),
-    default=list(df1.Weatherconditions.unique())
-         
-)
+# Mesma seleção em todas as páginas da sessão ( utils/sidebar.py )
+dataset_selector( datasets )
+date_slider, city_options, traffic_options, weather_options = sidebar_filters( df1 )
+approximate = approximate_mode()
 
 st.sidebar.markdown( """---""" )
 
@@ -266,8 +76,16 @@ st.sidebar.markdown('Powered by Ruiz Roman')
 
 
 #-----------FiLTROS---------------
-df1 = filters( df1 )
+# Seleção normalizada: filtro e resultados em cache (LRU) por seleção, os
+# mesmos em todas as páginas; uma seleção mais restrita que outra já
+# guardada só refiltra o resultado dela
+selection = selection_key( date_slider, city_options, traffic_options, weather_options )
+df1 = filtered_frame( df1, selection, bitmaps )
 
+# Cubo da seleção: somas acumuladas por dia ou banco SQL; no modo
+# aproximado, a amostra enquanto o exato é calculado em segundo plano
+# ( utils/selection.py )
+cube, exact = select_cube( data_path, selection, CUBE_VIEWS, approximate )
 
 
 # ----------- LAYOUT VISAO ENTREGADORES -------------------------
@@ -275,6 +93,8 @@ df1 = filters( df1 )
 
 st.header( 'Marketplace - Visão Entregadores' )
 
+preview_note( cube, exact )
+
 tab1, = st.tabs( ['Visão Gerencial'] )
 
 # Primeira Aba
@@ -287,16 +107,16 @@ with tab1:
         # 4 Colunas
         col1, col2, col3, col4 = st.columns( 4 ) 
         with col1:
-            st.metric('Entregador mais novo', f' {youngest_deliverer(df1)} anos' )
+            st.metric( estimated( 'Entregador mais novo', exact ), f' {youngest_deliverer(cube)} anos' )
         
         with col2:
-            st.metric('Entregador mais velho', f' {oldest_deliverer(df1)} anos' )
+            st.metric( estimated( 'Entregador mais velho', exact ), f' {oldest_deliverer(cube)} anos' )
             
         with col3:
-            st.metric('Pior condição de veículo', worst_vehicle_condition(df1) )
+            st.metric( estimated( 'Pior condição de veículo', exact ), worst_vehicle_condition(cube) )
         
         with col4:
-            st.metric('Melhor condição de veículo', best_vehicle_condition(df1) )
+            st.metric( estimated( 'Melhor condição de veículo', exact ), best_vehicle_condition(cube) )
             
         st.markdown("""---""")
     
@@ -320,9 +140,9 @@ with tab1:
             # Container 1 da segunda coluna
             with st.container():
                 
-                st.markdown( 'Avaliação Média e Desvio Padrão por tipo de tráfego' )
+                st.markdown( estimated( 'Avaliação Média e Desvio Padrão por tipo de tráfego', exact ) )
                 st.dataframe(
-                    rating_mean_std_by_traffic(df1),
+                    rating_mean_std_by_traffic(cube),
                     hide_index=True,
                     column_config={
                         'Road_traffic_density': 'Tráfego'}
@@ -332,9 +152,9 @@ with tab1:
             # Container 2 da segunda coluna
             with st.container():
                 
-                st.markdown( 'Avaliação Média e Desvio Padrão por condição climática' )
+                st.markdown( estimated( 'Avaliação Média e Desvio Padrão por condição climática', exact ) )
                 st.dataframe(
-                    rating_mean_std_by_weather(df1),
+                    rating_mean_std_by_weather(cube),
                     hide_index=True,
                     column_config={
                         'Weatherconditions': 'Clima'}
@@ -371,3 +191,7 @@ with tab1:
                     'Time_taken(min)': 'Tempo(min)'
                 }
             )
+
+
+# Prévia na tela: a página é refeita quando o cálculo exato terminar
+rerun_when_exact( exact )
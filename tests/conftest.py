@@ -0,0 +1,69 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+sys.path.insert( 0, ROOT )
+
+#=============================================================
+# ----------- DADOS DE TESTE ---------------
+#=============================================================
+#
+# Os testes não dependem do dados/train.csv: cada um gera um arquivo de
+# pedidos pequeno, com o mesmo formato do original (espaços no final dos
+# textos, sentinelas 'NaN ', '(min) ' no tempo e 'conditions ' no clima).
+
+
+def make_orders(n, seed=0, start='2022-02-11', days=50):
+    '''
+    Esta função gera `n` pedidos sintéticos no formato do train.csv.
+    Uma parte das linhas tem colunas obrigatórias vazias, para a limpeza
+    ter o que remover.
+
+    '''
+    rng = np.random.default_rng( seed )
+
+    def with_nan(values, share, sentinel='NaN '):
+        values = np.asarray( values ).astype( object )
+        values[rng.random( n ) < share] = sentinel
+        return values
+
+    dates = pd.Timestamp( start ) + pd.to_timedelta( rng.integers( 0, days, n ), unit='D' )
+    weather = [ f'conditions {w}' for w in rng.choice( [ 'Sunny', 'Stormy', 'Sandstorms', 'Cloudy', 'Fog', 'Windy' ], n ) ]
+
+    return pd.DataFrame( {
+        'ID': [ f'0x{i:04x} ' for i in range( n ) ],
+        'Delivery_person_ID': [ f'CITY{a:02d}RES{b:02d}DEL{c:02d} ' for a, b, c in rng.integers( 0, 20, ( n, 3 ) ) ],
+        'Delivery_person_Age': with_nan( rng.integers( 20, 40, n ).astype( str ), 0.04 ),
+        'Delivery_person_Ratings': with_nan( rng.choice( [ '4.9', '4.5', '4.0', '3.5', '5.0' ], n ), 0.04 ),
+        'Restaurant_latitude': np.round( rng.uniform( 10, 30, n ), 6 ),
+        'Restaurant_longitude': np.round( rng.uniform( 70, 88, n ), 6 ),
+        'Delivery_location_latitude': np.round( rng.uniform( 10, 30, n ), 6 ),
+        'Delivery_location_longitude': np.round( rng.uniform( 70, 88, n ), 6 ),
+        'Order_Date': dates.strftime( '%d-%m-%Y' ),
+        'Time_Orderd': '11:30:00',
+        'Time_Order_picked': '11:45:00',
+        'Weatherconditions': with_nan( weather, 0.01, 'conditions NaN' ),
+        'Road_traffic_density': with_nan( rng.choice( [ 'High ', 'Jam ', 'Low ', 'Medium ' ], n ), 0.01 ),
+        'Vehicle_condition': rng.integers( 0, 3, n ),
+        'Type_of_order': rng.choice( [ 'Snack ', 'Drinks ', 'Buffet ', 'Meal ' ], n ),
+        'Type_of_vehicle': rng.choice( [ 'motorcycle ', 'scooter ', 'electric_scooter ' ], n ),
+        'multiple_deliveries': with_nan( rng.integers( 0, 3, n ).astype( str ), 0.02 ),
+        'Festival': with_nan( rng.choice( [ 'No ', 'Yes ' ], n, p=[ .95, .05 ] ), 0.005 ),
+        'City': with_nan( rng.choice( [ 'Urban ', 'Metropolitian ', 'Semi-Urban ' ], n ), 0.02 ),
+        'Time_taken(min)': [ f'(min) {t}' for t in rng.integers( 10, 55, n ) ],
+    } )
+
+
+@pytest.fixture
+def orders_csv(tmp_path):
+    path = tmp_path / 'train.csv'
+    make_orders( 2_000 ).to_csv( path, index=False )
+    return str( path )
@@ -0,0 +1,45 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bitmaps import build_bitmaps
+from utils.geogrid import grid_cells
+from utils.loader import load_data, load_geogrid
+from utils.selection import filter_frame
+from utils.views import selection_key
+
+#=============================================================
+# ----------- GRADE ESPACIAL DAS ENTREGAS ---------------
+#=============================================================
+
+
+def expected_cells(df, selection):
+    # Referência: filtra os pedidos e conta por célula do nível mais fino
+    df = filter_frame( df, selection, build_bitmaps( df ) )
+    df = df.dropna( subset=[ 'Delivery_location_latitude', 'Delivery_location_longitude' ] )
+    rows, cols = grid_cells( df['Delivery_location_latitude'], df['Delivery_location_longitude'] )
+    counts = pd.DataFrame( { 'Cell_row': rows, 'Cell_col': cols } ).groupby( [ 'Cell_row', 'Cell_col' ] ).size()
+
+    return counts.rename( 'count' ).reset_index()
+
+
+@pytest.mark.parametrize( 'dates, cities, traffic, weather', [
+    ( ( '2022-02-11', '2022-04-06' ), [ 'Metropolitian', 'Semi-Urban', 'Urban' ], [ 'High', 'Jam', 'Low', 'Medium' ], [ 'Cloudy', 'Fog', 'Sandstorm', 'Stormy', 'Sunny', 'Windy' ] ),
+    ( ( '2022-02-11', '2022-02-20' ), [ 'Urban' ], [ 'High' ], [ 'Sunny' ] ),
+    ( ( '2022-03-01', '2022-03-01' ), [ 'Metropolitian' ], [ 'Jam', 'Low' ], [ 'Fog', 'Windy' ] ),
+    ( ( '2022-03-10', '2022-03-20' ), [], [ 'High' ], [ 'Sunny' ] ),
+    ( ( '2030-01-01', '2030-01-31' ), [ 'Urban' ], [ 'High' ], [ 'Sunny' ] ),
+] )
+def test_select_matches_filtered_orders(orders_csv, dates, cities, traffic, weather):
+    df = load_data( orders_csv )
+    grid = load_geogrid( orders_csv )
+    selection = selection_key( dates, cities, traffic, weather )
+
+    cells = grid.select( selection ).sort_values( [ 'Cell_row', 'Cell_col' ] ).reset_index( drop=True )
+    expected = expected_cells( df, selection )
+
+    assert cells['count'].sum() == expected['count'].sum()
+    np.testing.assert_array_equal( cells.to_numpy( dtype=np.int64 ), expected.to_numpy( dtype=np.int64 ) )
@@ -0,0 +1,68 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import make_orders
+from utils import incremental
+from utils.cleaning import clean_code
+from utils.schema import read_orders
+
+#=============================================================
+# ----------- STORE INCREMENTAL ---------------
+#=============================================================
+
+
+@pytest.fixture
+def orders_dir(tmp_path):
+    # Um CSV por dia, como em dados/
+    directory = tmp_path / 'dados'
+    directory.mkdir()
+    for day, start in enumerate( [ '2022-02-11', '2022-02-12', '2022-02-13' ] ):
+        make_orders( 300, seed=day, start=start, days=1 ).to_csv( directory / f'pedidos_{start}.csv', index=False )
+    return str( directory )
+
+
+def expected(directory):
+    frames = [ read_orders( source ) for source in incremental.list_sources( directory ) ]
+    return clean_code( pd.concat( frames, ignore_index=True ) )
+
+
+def read_only(monkeypatch):
+    # Simula um disco somente leitura: qualquer gravação do store falha
+    def denied(*args, **kwargs):
+        raise PermissionError( 'somente leitura' )
+
+    # Criar um diretório que já existe não grava nada
+    def makedirs(path, exist_ok=False):
+        if not ( exist_ok and os.path.isdir( path ) ):
+            denied()
+
+    monkeypatch.setattr( incremental.os, 'makedirs', makedirs )
+    monkeypatch.setattr( incremental, 'stream_clean', denied )
+    monkeypatch.setattr( incremental, 'write_manifest', denied )
+
+
+def test_load_incremental_matches_clean_code(orders_dir):
+    pd.testing.assert_frame_equal( incremental.load_incremental( orders_dir, workers=1 ), expected( orders_dir ) )
+
+
+def test_read_only_directory_cleans_in_memory(orders_dir, monkeypatch):
+    read_only( monkeypatch )
+
+    df = incremental.load_incremental( orders_dir, workers=1 )
+
+    assert not os.path.exists( incremental.store_dir( orders_dir ) )
+    pd.testing.assert_frame_equal( df, expected( orders_dir ) )
+
+
+def test_read_only_complete_store_is_read(orders_dir, monkeypatch):
+    # Store gravado antes (ex.: no build): sem arquivos novos nada é gravado
+    incremental.refresh_store( orders_dir, workers=1 )
+    read_only( monkeypatch )
+    monkeypatch.setattr( incremental, 'clean_in_memory', None )
+
+    pd.testing.assert_frame_equal( incremental.load_incremental( orders_dir, workers=1 ), expected( orders_dir ) )
@@ -0,0 +1,52 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+
+import pytest
+
+from utils.datasets import DATASETS
+from utils.loader import load_data
+
+#=============================================================
+# ----------- DATASET COMPARTILHADO ---------------
+#=============================================================
+
+
+def backing_arrays(series):
+    # Os mesmos arrays que o freeze marca como não graváveis
+    values = series.array
+    return [ getattr( values, attr ) for attr in ( '_ndarray', '_data', '_mask' ) if getattr( values, attr, None ) is not None ]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    DATASETS.clear()
+    yield
+    DATASETS.clear()
+
+
+def test_load_data_returns_the_same_object(orders_csv):
+    assert load_data( orders_csv ) is load_data( orders_csv )
+
+
+def test_load_data_is_read_only(orders_csv):
+    df = load_data( orders_csv )
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            continue
+        arrays = backing_arrays( df[col] )
+        assert arrays and not any( array.flags.writeable for array in arrays ), col
+
+    with pytest.raises( ValueError ):
+        df['Time_taken(min)'].to_numpy()[0] = 0
+
+
+def test_changed_file_is_reloaded(orders_csv):
+    df = load_data( orders_csv )
+
+    stat = os.stat( orders_csv )
+    os.utime( orders_csv, ns=( stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000 ) )
+
+    assert load_data( orders_csv ) is not df
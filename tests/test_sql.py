@@ -0,0 +1,54 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pytest
+
+from benchmarks.parity_sql import same, selections
+from conftest import make_orders
+from utils.bitmaps import build_bitmaps
+from utils.buckets import GRANULARITIES
+from utils.cleaning import clean_code
+from utils.cube import build_cube
+from utils.filters import filter_rows, take_rows
+from utils.schema import read_orders
+from utils.sql import SqlEngine, duckdb
+from utils.visao_empresa import orders_by_period_graph
+from utils.warmup import table_functions
+
+#=============================================================
+# ----------- PARIDADE DO BACKEND SQL COM O PANDAS ---------------
+#=============================================================
+
+BACKENDS = [ 'sqlite', pytest.param( 'duckdb', marks=pytest.mark.skipif( duckdb is None, reason='duckdb não instalado' ) ) ]
+
+# Funções das páginas calculadas sobre o cubo, com os argumentos das páginas
+CUBE_CALLS = [ ( func, () ) for func in table_functions( 'cube' ) ]
+CUBE_CALLS += [ ( orders_by_period_graph, ( granularity, ) ) for granularity in GRANULARITIES ]
+
+
+@pytest.fixture(scope='module')
+def cube(tmp_path_factory):
+    # Avaliações contínuas: a ordem das somas muda entre o pandas e o SQL,
+    # e médias de notas com uma casa caem com frequência no empate do round(2)
+    orders = make_orders( 3_000 )
+    orders['Delivery_person_Ratings'] = np.random.default_rng( 1 ).uniform( 2.5, 5, len( orders ) ).round( 6 )
+
+    path = tmp_path_factory.mktemp( 'dados' ) / 'train.csv'
+    orders.to_csv( path, index=False )
+    df = clean_code( read_orders( str( path ) ) )
+
+    return df, build_cube( df )
+
+
+@pytest.mark.parametrize( 'backend', BACKENDS )
+def test_sql_views_match_pandas(cube, backend):
+    df, cube = cube
+    cube_bitmaps = build_bitmaps( cube )
+    engine = SqlEngine( cube, backend )
+
+    for selection in selections( df, 10 ):
+        filtered = take_rows( cube, filter_rows( cube, *selection, bitmaps=cube_bitmaps ) )
+        view = engine.view( selection )
+        for func, args in CUBE_CALLS:
+            assert same( func.__wrapped__( filtered, *args ), func.__wrapped__( view, *args ) ), ( func.__name__, args, selection )
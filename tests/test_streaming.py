@@ -0,0 +1,30 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import pandas as pd
+import pytest
+
+from utils.cleaning import clean_code
+from utils.schema import CSV_DTYPES, read_orders
+from utils.streaming import read_store, stream_clean
+
+#=============================================================
+# ----------- INGESTÃO EM BLOCOS ---------------
+#=============================================================
+
+
+@pytest.mark.parametrize( 'chunksize', [ 150, 1_000, 100_000 ] )
+def test_stream_clean_matches_clean_code(orders_csv, tmp_path, chunksize):
+    # Vários row groups (blocos menores que o arquivo) e um só bloco
+    store = stream_clean( orders_csv, output=str( tmp_path / 'train.parquet' ), chunksize=chunksize )
+
+    pd.testing.assert_frame_equal( read_store( store ), clean_code( read_orders( orders_csv ) ) )
+
+
+def test_stream_clean_empty_file(tmp_path):
+    # Só o cabeçalho: o Parquet vazio tem o mesmo esquema do clean_code
+    csv = tmp_path / 'vazio.csv'
+    csv.write_text( ','.join( CSV_DTYPES ) + '\n' )
+    store = stream_clean( str( csv ) )
+
+    pd.testing.assert_frame_equal( read_store( store ), clean_code( read_orders( str( csv ) ) ) )
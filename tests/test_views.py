@@ -0,0 +1,70 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import pandas as pd
+import pytest
+
+from utils.datasets import DATASETS
+from utils.loader import load_data, load_geogrid
+from utils.selection import cube_table
+from utils.sidebar import default_selection
+from utils.views import VIEWS, ViewCache, selection_key
+from utils.warmup import PAGE_MODULES, page_functions, warm_default
+
+#=============================================================
+# ----------- CACHE DE SELEÇÕES E PRÉ-CÁLCULO ---------------
+#=============================================================
+
+SELECTION = selection_key( ( '2022-02-11', '2022-02-20' ), [ 'Urban' ], [ 'High' ], [ 'Sunny' ] )
+
+
+def test_concurrent_fill_keeps_the_first_entry():
+    cache = ViewCache()
+    df = pd.DataFrame( { 'x': range( 10 ) } )
+    stored = {}
+
+    # Enquanto o filtro é calculado, outra sessão guarda a mesma seleção
+    # e já calcula um resultado sobre ela
+    def compute(df):
+        stored['frame'] = cache.filtered( df, SELECTION, lambda df: df.head( 3 ) )
+        cache.result( stored['frame'], 'soma', lambda frame: frame.x.sum() )
+        return df.head( 3 )
+
+    frame = cache.filtered( df, SELECTION, compute, pin=True )
+
+    assert frame is stored['frame']
+    assert cache.result( frame, 'soma', lambda frame: pytest.fail( 'resultado recalculado' ) ) == 3
+    assert next( iter( cache._entries.values() ) )['pinned']
+
+
+def test_every_page_function_has_a_table():
+    for module in PAGE_MODULES:
+        assert set( module.VIEW_TABLES ) == set( page_functions( module ) ), module.__name__
+        assert set( module.VIEW_TABLES.values() ) <= { 'df1', 'cube', 'grid' }
+
+
+@pytest.fixture
+def empty_caches():
+    DATASETS.clear()
+    VIEWS.clear()
+    yield
+    DATASETS.clear()
+    VIEWS.clear()
+
+
+def test_warm_default_fills_the_default_selection(orders_csv, empty_caches):
+    warm_default( orders_csv )
+
+    df1 = load_data( orders_csv )
+    grid = load_geogrid( orders_csv )
+    selection = selection_key( *default_selection( df1 ) )
+    for table in ( df1, grid, cube_table( orders_csv ) ):
+        assert VIEWS.cached( table, selection )
+
+    # As tabelas fixadas continuam no cache mesmo com o limite de seleções estourado
+    VIEWS.max_entries = 1
+    try:
+        VIEWS.filtered( df1, SELECTION, lambda df: df.head( 1 ) )
+        assert VIEWS.cached( df1, selection )
+    finally:
+        VIEWS.max_entries = ViewCache().max_entries
@@ -0,0 +1,80 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+
+#=============================================================
+# ----------- ÍNDICES BITMAP DOS FILTROS ---------------
+#=============================================================
+#
+# Para cada dimensão de filtro e cada valor dela é guardado um bitmap
+# compactado (np.packbits, 1 bit por linha) com as linhas que têm aquele
+# valor. Uma seleção da barra lateral vira:
+#   - OU dos bitmaps dos valores escolhidos em cada dimensão
+#   - E entre as dimensões
+# sem nenhuma comparação de texto por linha.
+#
+# Os índices são montados uma vez por dataset (ver loader.load_bitmaps).
+# Para filtrar por uma dimensão nova basta incluí-la em FILTER_DIMENSIONS
+# (ou passar `columns` para o build_bitmaps) e na seleção do select_rows.
+
+FILTER_DIMENSIONS = [ 'City', 'Road_traffic_density', 'Weatherconditions' ]
+
+
+def build_bitmaps(df, columns=FILTER_DIMENSIONS):
+    '''
+    Esta função monta os bitmaps das colunas de filtro.
+    Retorna { coluna: { valor: bitmap } } e o número de linhas.
+    Colunas categóricas usam os códigos das categorias; as demais são
+    fatoradas antes. Os bitmaps são somente leitura.
+
+    '''
+    bitmaps = {}
+    for col in columns:
+        if hasattr( df[col], 'cat' ):
+            codes, values = df[col].cat.codes.to_numpy(), df[col].cat.categories
+        else:
+            codes, values = df[col].factorize()
+
+        bitmaps[col] = {}
+        for code, value in enumerate( values ):
+            bits = np.packbits( codes == code )
+            if bits.any():
+                bits.flags.writeable = False
+                bitmaps[col][value] = bits
+
+    return bitmaps, len( df )
+
+
+def select_rows(index, selections, start=0, end=None):
+    '''
+    Esta função responde uma seleção usando os bitmaps.
+    1- `selections` é { coluna: valores escolhidos } (valores fora do
+       índice são ignorados; nenhum valor escolhido = nenhuma linha)
+    2- Só os bytes do intervalo de linhas [start, end) entram nas contas
+    Retorna as posições das linhas selecionadas.
+
+    '''
+    bitmaps, n_rows = index
+    end = n_rows if end is None else end
+    if end <= start:
+        return np.arange( 0 )
+
+    # Bytes que cobrem as linhas do intervalo ( 8 linhas por byte )
+    first, last = start // 8, ( end + 7 ) // 8
+
+    selected = None
+    for col, values in selections.items():
+        dimension = np.zeros( last - first, dtype=np.uint8 )
+        for value in values:
+            bits = bitmaps[col].get( value )
+            if bits is not None:
+                dimension |= bits[first:last]
+
+        selected = dimension if selected is None else selected & dimension
+
+    if selected is None:
+        return np.arange( start, end )
+
+    offset = first * 8
+    return np.flatnonzero( np.unpackbits( selected )[ start - offset:end - offset ] ) + start
@@ -0,0 +1,195 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from utils.cube import SUM_MEASURES, combine_cells
+
+#=============================================================
+# ----------- PEDIDOS POR PERÍODO (DIA / SEMANA / MÊS) ---------------
+#=============================================================
+#
+# Os gráficos por período (dia, semana ISO, mês) saem todos do mesmo
+# cálculo: uma única agregação por dia da seleção ( combine_cells por
+# Order_Date, no cubo filtrado, no índice de somas acumuladas, no banco
+# SQL ou na amostra ) e, em cima dos totais diários, um bincount pelos
+# códigos inteiros de cada granularidade:
+#   - dia: dias desde 1970-01-01 ( datetime64[D] )
+#   - semana ISO: semanas começando na segunda-feira (1970-01-05 é a 1ª)
+#   - mês: meses desde 1970-01 ( datetime64[M] )
+# Os códigos vêm só das datas distintas da seleção (aritmética inteira,
+# sem passar pelos pedidos). Cada período é identificado pela data em
+# que começa.
+#
+# time_buckets devolve as três granularidades juntas: trocar de
+# granularidade na página só escolhe outra tabela já calculada.
+
+GRANULARITIES = { 'day': 'Dia', 'week': 'Semana', 'month': 'Mês' }
+
+# 1970-01-01 foi uma quinta-feira: +3 dias alinha as semanas na segunda
+_WEEK_OFFSET = 3
+
+
+def bucket_codes(dates, granularity):
+    '''
+    Esta função retorna o código inteiro do período de cada data.
+
+    '''
+    days = np.asarray( dates, dtype='datetime64[D]' ).astype( np.int64 )
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return ( days + _WEEK_OFFSET ) // 7
+    if granularity == 'month':
+        return np.asarray( dates, dtype='datetime64[M]' ).astype( np.int64 )
+
+    raise ValueError( f'Granularidade {granularity} inválida, use uma de {tuple( GRANULARITIES )}' )
+
+
+def bucket_start(codes, granularity):
+    '''
+    Esta função retorna a data de início de cada período ( datetime64[ns] ).
+
+    '''
+    codes = np.asarray( codes, dtype=np.int64 )
+    if granularity == 'day':
+        start = codes.astype( 'datetime64[D]' )
+    elif granularity == 'week':
+        start = ( codes * 7 - _WEEK_OFFSET ).astype( 'datetime64[D]' )
+    else:
+        start = codes.astype( 'datetime64[M]' ).astype( 'datetime64[D]' )
+
+    return start.astype( 'datetime64[ns]' )
+
+
+def bucket_column(dates, granularity):
+    '''
+    Esta função retorna a data de início do período de cada data (ex.:
+    para agrupar as linhas da amostra pelo período).
+
+    '''
+    return bucket_start( bucket_codes( dates, granularity ), granularity )
+
+
+def time_buckets(cube, measures=SUM_MEASURES):
+    '''
+    Esta função calcula os pedidos e as métricas por dia, semana e mês.
+    1- Uma agregação por dia ( combine_cells ): pedidos e, de cada
+       métrica, não nulos e soma
+    2- Para cada granularidade, soma dos dias de cada período (bincount
+       pelos códigos do período)
+    3- Médias das métricas no período
+    Retorna { granularidade: DataFrame indexado pelo início do período,
+    com Orders e a média de cada métrica }.
+
+    '''
+    columns = [ 'count' ] + [ f'{col}__{stat}' for col in measures for stat in ( 'n', 'sum' ) ]
+    daily = combine_cells( cube, 'Order_Date', columns )
+    dates = daily.index.to_numpy()
+
+    buckets = {}
+    for granularity in GRANULARITIES:
+        codes, inverse = np.unique( bucket_codes( dates, granularity ), return_inverse=True )
+        sums = { col: np.bincount( inverse, weights=daily[col].to_numpy( dtype='float64' ), minlength=len( codes ) )
+                 for col in columns }
+
+        # Contagens inteiras no resultado exato (na amostra os pesos são frações)
+        orders = sums['count'].round().astype( np.int64 ) if daily['count'].dtype.kind in 'iu' else sums['count']
+
+        table = pd.DataFrame( { 'Orders': orders }, index=pd.DatetimeIndex( bucket_start( codes, granularity ), name='Period' ) )
+        for col in measures:
+            n = sums[f'{col}__n']
+            table[col] = sums[f'{col}__sum'] / np.where( n > 0, n, np.nan )
+        buckets[granularity] = table
+
+    return buckets
+
+
+#=============================================================
+# ----------- PEDIDOS POR ENTREGADOR ---------------
+#=============================================================
+#
+# Pedidos por entregador de um período = pedidos / entregadores distintos
+# que entregaram no período. Os dois saem da mesma passada pelos pedidos:
+# os pares ( período, entregador ) distintos, com a quantidade de pedidos
+# de cada par; por período, a soma das quantidades são os pedidos e o
+# número de pares são os entregadores.
+#
+# Nas janelas móveis (últimos 7 / 28 dias de cada dia) nada é recalculado
+# por janela. Os pedidos vêm das somas acumuladas por dia. Os entregadores
+# ativos vêm de um vetor de diferenças: cada dia em que um entregador
+# trabalhou soma 1 a partir desse dia e tira 1 quando a janela deixa de
+# alcançá-lo (ou no próximo dia trabalhado, que assume a partir dali); a
+# soma acumulada do vetor é o número de entregadores ativos em cada dia.
+
+ROLLING_WINDOWS = ( 7, 28 )
+
+
+def orders_per_deliverer(periods, deliverers):
+    '''
+    Esta função calcula os pedidos por entregador de cada período.
+    1- Pares ( período, entregador ) distintos e pedidos de cada par
+    2- Por período: pedidos ( soma dos pares ) e entregadores ( pares )
+    Pedidos sem entregador não entram. Retorna um DataFrame indexado pelo
+    período, com Orders, Deliverers e Orders_by_deliverer.
+
+    '''
+    levels, period = np.unique( np.asarray( periods ), return_inverse=True )
+    person, people = pd.factorize( np.asarray( deliverers ) )
+    valid = person >= 0
+
+    pairs, orders = np.unique( period[valid].astype( np.int64 ) * len( people ) + person[valid], return_counts=True )
+    pair_period = pairs // max( len( people ), 1 )
+
+    table = pd.DataFrame( {
+        'Orders': np.bincount( pair_period, weights=orders, minlength=len( levels ) ).astype( np.int64 ),
+        'Deliverers': np.bincount( pair_period, minlength=len( levels ) ),
+    }, index=pd.Index( levels, name=getattr( periods, 'name', None ) ) )
+    table['Orders_by_deliverer'] = table['Orders'] / table['Deliverers'].where( table['Deliverers'] > 0 )
+
+    return table
+
+
+def rolling_orders_per_deliverer(dates, deliverers, windows=ROLLING_WINDOWS):
+    '''
+    Esta função calcula, para cada dia entre a primeira e a última data,
+    os pedidos por entregador ativo nos últimos `w` dias de cada janela
+    de `windows`.
+    1- Pares ( entregador, dia ) distintos e pedidos de cada par
+    2- Pedidos da janela: somas acumuladas por dia
+    3- Entregadores ativos na janela: vetor de diferenças (sem recontar
+       os entregadores de cada janela)
+    As primeiras janelas, com menos de `w` dias de dados, usam os dias
+    que houver. Retorna um DataFrame indexado pela data, com uma coluna
+    por janela ( ex.: '7 dias' ).
+
+    '''
+    days = bucket_codes( dates, 'day' )
+    person = pd.factorize( np.asarray( deliverers ) )[0]
+    valid = person >= 0
+    if not valid.any():
+        return pd.DataFrame( columns=[ f'{w} dias' for w in windows ], index=pd.DatetimeIndex( [], name='Order_Date' ) )
+
+    first = days[valid].min()
+    n_days = days[valid].max() - first + 1
+
+    # Pares ordenados por entregador e dia
+    pairs, orders = np.unique( person[valid].astype( np.int64 ) * n_days + ( days[valid] - first ), return_counts=True )
+    who, day = pairs // n_days, pairs % n_days
+
+    cumulative = np.concatenate( [ [ 0 ], np.cumsum( np.bincount( day, weights=orders, minlength=n_days ) ) ] )
+    # Próximo dia trabalhado pelo mesmo entregador ( n_days se não houver )
+    following = np.append( np.where( who[1:] == who[:-1], day[1:], n_days ), n_days )
+
+    table = pd.DataFrame( index=pd.DatetimeIndex( bucket_start( np.arange( n_days ) + first, 'day' ), name='Order_Date' ) )
+    for w in windows:
+        window_orders = cumulative[1:] - cumulative[ np.maximum( np.arange( n_days ) + 1 - w, 0 ) ]
+
+        # +1 no dia trabalhado, -1 quando a janela sai dele ou no próximo dia trabalhado
+        end = np.minimum( day + w, following )
+        active = np.cumsum( np.bincount( day, minlength=n_days + 1 ) - np.bincount( np.minimum( end, n_days ), minlength=n_days + 1 ) )[:n_days]
+
+        table[f'{w} dias'] = window_orders / np.where( active > 0, active, np.nan )
+
+    return table
@@ -0,0 +1,170 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+from haversine import haversine_vector
+
+from utils.schema import DATE_FORMAT, NA_VALUES, REQUIRED_COLS
+
+#=============================================================
+# ----------- LIMPEZA DO DATASET ---------------
+#=============================================================
+
+# Versão do esquema produzido pelo clean_code.
+# Incrementar sempre que a limpeza mudar o resultado (colunas, tipos,
+# linhas removidas), para invalidar os snapshots já gravados em disco.
+CLEANING_VERSION = 7
+
+# Dimensões com poucos valores distintos viram categorias
+CATEGORY_COLS = [ 'City', 'Road_traffic_density', 'Weatherconditions', 'Type_of_order', 'Type_of_vehicle', 'Festival' ]
+
+# Números pequenos e coordenadas não precisam de 64 bits
+# ( as avaliações ficam em float64 para as médias arredondadas não mudarem )
+COMPACT_DTYPES = {
+    'Delivery_person_Age': 'int8',
+    'Vehicle_condition': 'int8',
+    'multiple_deliveries': 'int8',
+    'Time_taken(min)': 'int16',
+    'Week_of_year': 'int8',
+    'Restaurant_latitude': 'float32',
+    'Restaurant_longitude': 'float32',
+    'Delivery_location_latitude': 'float32',
+    'Delivery_location_longitude': 'float32',
+    'Delivery_distance': 'float32',
+}
+
+
+def _map_unique(series, func):
+    '''
+    Esta função aplica uma transformação apenas nos valores únicos de
+    uma coluna e espalha o resultado para todas as linhas.
+    Colunas como cidade, tráfego e data têm poucos valores distintos,
+    então o trabalho de texto é feito uma vez por valor e não por linha.
+    
+    '''
+    codes, uniques = pd.factorize( series, use_na_sentinel=False )
+    result = func( pd.Series( uniques ) ).take( codes )
+    result.index = series.index
+    return result
+
+
+def _map_categories(series, func):
+    '''
+    Esta função é o _map_unique para colunas de texto: a transformação
+    é aplicada nos valores únicos e o resultado já sai como 'category'
+    (categorias em ordem alfabética), sem criar um array de textos do
+    tamanho da coluna. Valores que viram nulo saem como NaN.
+    
+    '''
+    codes, uniques = pd.factorize( series )
+    new_codes, categories = pd.factorize( func( pd.Series( uniques, name=series.name ) ), sort=True )
+    
+    # O código -1 (nulo) continua nulo
+    new_codes = np.append( new_codes, -1 )
+    return pd.Series( pd.Categorical.from_codes( new_codes[codes], categories ), index=series.index, name=series.name )
+
+
+def compact_dtypes(df):
+    '''
+    Esta função reduz a memória do dataset limpo.
+    1- Colunas de baixa cardinalidade viram 'category'
+    2- Inteiros pequenos e coordenadas usam tipos menores
+    
+    '''
+    dtypes = { col: 'category' for col in CATEGORY_COLS if df[col].dtype != 'category' }
+    dtypes.update( COMPACT_DTYPES )
+    return df.astype( dtypes )
+
+
+def memory_report(df_before, df_after):
+    '''
+    Esta função compara a memória (em bytes) de cada coluna antes e
+    depois da compactação dos tipos.
+    Colunas que só existem em um dos lados aparecem com 0 bytes no outro.
+    
+    '''
+    columns = df_before.columns.union( df_after.columns, sort=False )
+    report = pd.DataFrame( {
+        'dtype_antes': df_before.dtypes.astype( str ),
+        'bytes_antes': df_before.memory_usage( deep=True, index=False ),
+        'dtype_depois': df_after.dtypes.astype( str ),
+        'bytes_depois': df_after.memory_usage( deep=True, index=False ),
+    }, index=columns ).fillna( { 'dtype_antes': '-', 'bytes_antes': 0, 'dtype_depois': '-', 'bytes_depois': 0 } )
+    report = report.astype( { 'bytes_antes': int, 'bytes_depois': int } )
+    report.loc['TOTAL'] = [ '', report['bytes_antes'].sum(), '', report['bytes_depois'].sum() ]
+    report['reducao'] = ( 1 - report['bytes_depois'] / report['bytes_antes'] ).map( '{:.0%}'.format ).where( report['bytes_antes'] > 0, '-' )
+    
+    return report
+
+
+def sort_by_date(df):
+    '''
+    Esta função ordena o dataset pela data do pedido.
+    A ordenação é estável (mantém a ordem do arquivo dentro de cada dia)
+    e permite que o filtro de datas seja uma busca binária.
+
+    '''
+    if df['Order_Date'].is_monotonic_increasing:
+        return df
+
+    return df.sort_values( 'Order_Date', kind='stable', ignore_index=True )
+
+
+def clean_code(df):
+    '''
+    Esta função executa a limpeza do dataset
+    (lido com o read_orders, que já entrega os tipos e os vazios como nulos)
+    Tipos de limpeza:
+    1- Remoção dos dados NaN
+    2- Mudança do tipo da coluna de dados
+    3- Remoção dos espaços das variáveis de texto.
+    4- Formatação da coluna de datas
+    5- Formatação da coluna de tempo (remoção do texta da variavel numerica)
+    6- Cálculo da distância entre restaurante e local de entrega
+    7- Compactação dos tipos (categorias e inteiros/decimais menores)
+    8- Ordenação pela data do pedido
+    
+    '''
+    
+    ## Remover spaco da string ( feito só nas categorias )
+    ## Nas colunas obrigatórias o sentinela 'NaN' que sobrar vira nulo
+    cols = ['Type_of_order', 'Type_of_vehicle']
+    stripped = { col: _map_categories( df[col], lambda x: x.str.strip() ) for col in cols }
+    
+    cols = ['Road_traffic_density', 'City', 'Festival']
+    stripped.update( { col: _map_categories( df[col], lambda x: x.str.strip().where( lambda v: ~v.isin( NA_VALUES ) ) )
+                       for col in cols } )
+    
+    # Excluir as linhas vazias ( uma única máscara e uma única cópia )
+    linhas_validas = df[REQUIRED_COLS].assign( **stripped ).notna().all( axis=1 ).to_numpy()
+    
+    df = df.loc[linhas_validas, :].reset_index( drop=True )
+    for col, values in stripped.items():
+        df[col] = values[linhas_validas].array
+    
+    ## Remover espaços do ID e 'conditions ' do clima
+    df['ID'] = df['ID'].str.strip()
+    df['Weatherconditions'] = _map_categories( df['Weatherconditions'], lambda x: x.str.strip('conditions ') )
+    
+    # Conversao de texto para data ( datetime64, sem objetos date do Python )
+    order_date = _map_unique( df['Order_Date'], lambda x: pd.to_datetime( x, format=DATE_FORMAT ) )
+    df['Order_Date'] = order_date
+    
+    # Comando para remover o texto de números
+    df['Time_taken(min)'] = _map_unique( df['Time_taken(min)'], lambda x: x.str.extract( r'(\d+)', expand=False ).astype( int ) )
+    
+    # Criando coluna de semana do pedido
+    df['Week_of_year'] = _map_unique( order_date, lambda x: x.dt.isocalendar().week )
+    
+    # Distancia (km) entre o restaurante e o local de entrega, de uma vez para todas as linhas
+    # ( o haversine_vector não aceita vetores vazios )
+    if len( df ) > 0:
+        df['Delivery_distance'] = haversine_vector(
+            df[['Restaurant_latitude', 'Restaurant_longitude']].to_numpy( dtype=float ),
+            df[['Delivery_location_latitude', 'Delivery_location_longitude']].to_numpy( dtype=float )
+        )
+    else:
+        df['Delivery_distance'] = pd.Series( dtype=float )
+    
+    return sort_by_date( compact_dtypes( df ) )
@@ -0,0 +1,149 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+
+#=============================================================
+# ----------- CUBO PRÉ-AGREGADO (OLAP) ---------------
+#=============================================================
+#
+# O cubo tem uma linha (célula) por combinação das dimensões usadas nos
+# gráficos, no grão mais fino (o dia). Cada célula guarda estatísticas
+# que podem ser somadas entre células:
+#   - count: número de pedidos
+#   - <coluna>__n, __sum, __sumsq: contagem de não nulos, soma e soma
+#     dos quadrados (média e desvio padrão saem daqui)
+#   - <coluna>__min, __max
+# O cubo sai ordenado por data e tem as mesmas colunas de filtro do
+# dataset, então o filter_rows (e os bitmaps) funcionam nele também.
+# Os gráficos agregam as células filtradas com o rollup: o custo depende
+# do tamanho do cubo e não do número de pedidos.
+# Medianas e contagens de distintos (ex.: entregadores únicos) não podem
+# ser somadas entre células e continuam sendo calculadas sobre os pedidos.
+# Com o backend SQL ( utils/sql.py ) as mesmas células saem de uma
+# consulta sobre os pedidos, no lugar do cubo.
+# Nas páginas, sem backend SQL, as células de cada seleção saem das somas
+# acumuladas por dia do cubo ( utils/prefix.py ).
+
+CUBE_DIMENSIONS = [ 'Order_Date', 'Week_of_year', 'City', 'Road_traffic_density', 'Weatherconditions', 'Type_of_order', 'Festival' ]
+
+# Colunas com média / desvio padrão
+SUM_MEASURES = [ 'Time_taken(min)', 'Delivery_person_Ratings', 'Delivery_distance' ]
+
+# Colunas com mínimo / máximo
+RANGE_MEASURES = [ 'Delivery_person_Age', 'Vehicle_condition' ]
+
+
+def build_cube(df):
+    '''
+    Esta função monta o cubo a partir do dataset limpo.
+    1- Soma e soma dos quadrados em float64 (as colunas são float32/float64/int)
+    2- Agrupa pelas dimensões, só com as combinações que existem
+    3- Ordena as células pelas dimensões, começando pela data
+
+    '''
+    columns = { col: df[col] for col in CUBE_DIMENSIONS }
+    aggregations = { 'count': ( 'Order_Date', 'size' ) }
+
+    for col in SUM_MEASURES:
+        values = df[col].to_numpy( dtype='float64' )
+        columns[f'{col}__n'] = ~np.isnan( values )
+        columns[f'{col}__sum'] = values
+        columns[f'{col}__sumsq'] = values * values
+        aggregations.update( { f'{col}__{stat}': ( f'{col}__{stat}', 'sum' ) for stat in ( 'n', 'sum', 'sumsq' ) } )
+
+    for col in RANGE_MEASURES:
+        columns[col] = df[col]
+        aggregations.update( { f'{col}__{stat}': ( col, stat ) for stat in ( 'min', 'max' ) } )
+
+    cube = ( pd.DataFrame( columns )
+               .groupby( CUBE_DIMENSIONS, observed=True )
+               .agg( **aggregations )
+               .sort_index()
+               .reset_index() )
+
+    return cube.astype( { f'{col}__n': 'int64' for col in SUM_MEASURES } )
+
+
+def _stat(cells, col, stat):
+    if stat in ( 'min', 'max' ):
+        return cells[f'{col}__{stat}']
+
+    n, total = cells[f'{col}__n'], cells[f'{col}__sum']
+    if stat == 'count':
+        return n
+    if stat == 'sum':
+        return total
+    if stat == 'mean':
+        return total / n.where( n > 0 )
+
+    # Variância amostral ( ddof=1, como no pandas )
+    var = ( ( cells[f'{col}__sumsq'] - total * total / n.where( n > 0 ) ) / ( n - 1 ).where( n > 1 ) ).clip( lower=0 )
+    if stat == 'var':
+        return var
+    if stat == 'std':
+        return np.sqrt( var )
+
+    raise ValueError( f'Estatística {stat} não pode ser calculada pelo cubo' )
+
+
+def _combine(groups, columns):
+    '''
+    Esta função junta as células de cada grupo: soma as estatísticas
+    somáveis e tira o mínimo / máximo das demais.
+
+    '''
+    how = { col: 'min' if col.endswith( '__min' ) else 'max' if col.endswith( '__max' ) else 'sum' for col in columns }
+
+    return groups.agg( how )
+
+
+def combine_cells(cube, by, columns):
+    '''
+    Esta função junta as células do cubo por `by` e retorna as colunas
+    pedidas do cubo ( count, <coluna>__n, __sum, ... ), ainda somáveis.
+    Com by=[] o resultado é uma linha só (linha 0, vazia sem células).
+    Visões do backend SQL ou do índice de somas acumuladas respondem com
+    o seu próprio cells( by, columns ).
+
+    '''
+    by = [ by ] if isinstance( by, str ) else list( by )
+
+    if not isinstance( cube, pd.DataFrame ):
+        return cube.cells( by, columns )
+    if by:
+        return _combine( cube.groupby( by, observed=True ), columns ).sort_index()
+
+    # Um único grupo com todas as células ( linha 0, vazia se não houver células )
+    return _combine( cube.groupby( np.zeros( len( cube ), dtype='int8' ) ), columns ).reindex( [ 0 ] )
+
+
+def rollup(cube, by, measures=None):
+    '''
+    Esta função agrega as células do cubo.
+    1- Sem `measures`: quantidade de pedidos por `by` (como um count)
+    2- Com `measures` ( { coluna: [ estatísticas ] } ): o mesmo resultado de
+       df.groupby( by, observed=True ).agg( measures ).sort_index()
+       sobre os pedidos. Estatísticas: count, sum, mean, var, std, min, max
+    Com by=[] o resultado é uma linha só, com o total das células.
+    `cube` pode ser também uma visão do backend SQL ( utils/sql.py ) ou do
+    índice de somas acumuladas ( utils/prefix.py ), que devolvem as células
+    já agregadas por `by`.
+
+    '''
+    columns = [ 'count' ]
+    for col, stats in ( measures or {} ).items():
+        columns += [ f'{col}__{stat}' for stat in ( 'min', 'max' ) if stat in stats ]
+        columns += [ f'{col}__{stat}' for stat in ( 'n', 'sum', 'sumsq' ) if set( stats ) - { 'min', 'max' } ]
+
+    cells = combine_cells( cube, by, columns )
+
+    if measures is None:
+        return cells['count']
+
+    result = pd.DataFrame( { ( col, stat ): _stat( cells, col, stat )
+                             for col, stats in measures.items() for stat in stats } )
+    result.columns = pd.MultiIndex.from_tuples( result.columns )
+
+    return result
@@ -0,0 +1,224 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+from utils.incremental import STORE_DIR, list_sources
+from utils.memory import sizeof
+from utils.streaming import STORE_EXT
+
+#=============================================================
+# ----------- DATASETS CARREGADOS (LRU POR MEMÓRIA) ---------------
+#=============================================================
+#
+# O painel pode abrir vários datasets de pedidos (por região, por mês),
+# escolhidos na barra lateral entre os arquivos de DATA_DIR:
+#   - CSVs brutos ( dados/train.csv )
+#   - datasets já limpos do stream_clean ( .parquet )
+#   - diretórios de CSVs, carregados pelo store incremental
+#
+# Tudo o que o loader monta para um dataset (DataFrame limpo, bitmaps,
+# cubo, índice de somas acumuladas, grade espacial, amostra, banco SQL)
+# fica no DATASETS, agrupado pela assinatura da origem ( loader.source_signature ):
+# - Cada dataset tem os seus objetos, montados sob demanda e só uma vez
+#   (sessões que pedem o mesmo objeto ao mesmo tempo esperam a primeira)
+# - O limite de memória é global: passando dele, o dataset usado há mais
+#   tempo sai inteiro, com todos os seus objetos. O usado mais
+#   recentemente nunca sai, e voltar para um dataset que ainda está no
+#   cache não recarrega nada
+# - Uma versão nova do arquivo (outro mtime / tamanho) descarta a anterior
+# - Quem guarda resultados calculados sobre os objetos de um dataset (o
+#   VIEWS) é avisado quando ele sai ( on_evict ) e descarta esses resultados
+#
+# O limite padrão pode ser trocado pela variável de ambiente
+# CURRY_MEMORY_MB (ex.: CURRY_MEMORY_MB=4096 streamlit run Home.py).
+
+DATA_DIR = 'dados'
+
+MEMORY_VAR = 'CURRY_MEMORY_MB'
+
+DEFAULT_MAX_BYTES = 2048 * 2**20
+
+
+def list_datasets(data_dir=DATA_DIR):
+    '''
+    Esta função lista os datasets de `data_dir` que podem ser escolhidos:
+    CSVs, arquivos .parquet e diretórios com CSVs (sem os diretórios
+    internos do store incremental). Caminhos relativos, em ordem alfabética.
+
+    '''
+    if not os.path.isdir( data_dir ):
+        return []
+
+    datasets = []
+    for name in sorted( os.listdir( data_dir ) ):
+        path = os.path.join( data_dir, name )
+        if os.path.isdir( path ):
+            if name != STORE_DIR and not name.startswith( '_' ) and list_sources( path ):
+                datasets.append( path )
+        elif name.endswith( ( '.csv', STORE_EXT ) ):
+            datasets.append( path )
+
+    return datasets
+
+
+def max_bytes():
+    '''
+    Esta função retorna o limite de memória dos datasets: CURRY_MEMORY_MB
+    (em MB), se definida, senão DEFAULT_MAX_BYTES.
+
+    '''
+    value = os.environ.get( MEMORY_VAR )
+
+    return int( float( value ) * 2**20 ) if value else DEFAULT_MAX_BYTES
+
+
+class DatasetCache:
+    '''
+    Cache LRU dos objetos de cada dataset, com limite global de bytes.
+    Contadores de acertos, falhas e despejos em stats().
+
+    '''
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self._datasets = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._hooks = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source, name, build):
+        '''
+        Esta função retorna o objeto `name` do dataset `source`
+        ( assinatura do loader.source_signature ), montado com `build()`
+        na primeira vez. O dataset passa a ser o usado mais recentemente.
+
+        '''
+        with self._lock:
+            value = self._lookup( source, name )
+            if value is not None:
+                self.hits += 1
+                return value
+            lock = self._locks.setdefault( ( source, name ), threading.Lock() )
+
+        # Uma montagem por objeto; as outras sessões esperam e reaproveitam
+        with lock:
+            with self._lock:
+                value = self._lookup( source, name )
+                if value is not None:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+
+            value = build()
+            nbytes = sizeof( value )
+
+            with self._lock:
+                self._locks.pop( ( source, name ), None )
+                dropped = []
+                entry = self._entry( source, dropped )
+                if name not in entry['objects']:
+                    entry['objects'][name] = value
+                    entry['nbytes'] += nbytes
+                self._evict( dropped )
+
+        self._notify( dropped )
+
+        return value
+
+    def _lookup(self, source, name):
+        entry = self._datasets.get( source )
+        if entry is None or name not in entry['objects']:
+            return None
+        self._datasets.move_to_end( source )
+
+        return entry['objects'][name]
+
+    def _entry(self, source, dropped):
+        '''
+        Esta função retorna a entrada do dataset, criando-a se preciso.
+        Versões anteriores do mesmo caminho são descartadas (e vão para
+        `dropped`).
+
+        '''
+        if source not in self._datasets:
+            for old in [ key for key in self._datasets if key[0] == source[0] ]:
+                dropped.append( self._datasets.pop( old ) )
+            self._datasets[source] = { 'objects': {}, 'nbytes': 0 }
+        self._datasets.move_to_end( source )
+
+        return self._datasets[source]
+
+    def _evict(self, dropped):
+        limit = max_bytes() if self.max_bytes is None else self.max_bytes
+        # O dataset usado mais recentemente (o último) nunca sai
+        while len( self._datasets ) > 1 and self.nbytes() > limit:
+            dropped.append( self._datasets.popitem( last=False )[1] )
+            self.evictions += 1
+
+    def on_evict(self, hook):
+        '''
+        Esta função registra `hook( objects )`, chamado com a lista dos
+        objetos de cada dataset que sai do cache (pelo limite de memória,
+        por uma versão nova ou pelo clear). Objetos montados em tupla
+        (ex.: cubo e bitmaps) entram separados.
+
+        '''
+        self._hooks.append( hook )
+
+    def _notify(self, dropped):
+        # Fora do lock: os ganchos podem usar os próprios locks
+        if not dropped or not self._hooks:
+            return
+
+        objects = []
+        for entry in dropped:
+            for value in entry['objects'].values():
+                objects += list( value ) if isinstance( value, tuple ) else [ value ]
+
+        for hook in self._hooks:
+            hook( objects )
+
+    def nbytes(self):
+        return sum( entry['nbytes'] for entry in self._datasets.values() )
+
+    def cached(self, func):
+        '''
+        Decorador para as funções do loader que recebem ( path, stamp, ... ):
+        o resultado fica guardado no dataset ( path, stamp ), com o nome
+        da função e os demais argumentos como chave.
+
+        '''
+        @functools.wraps( func )
+        def wrapper(path, stamp, *args, **kwargs):
+            name = ( func.__qualname__, args, tuple( sorted( kwargs.items() ) ) )
+            return self.get( ( path, stamp ), name, lambda: func( path, stamp, *args, **kwargs ) )
+
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            dropped = list( self._datasets.values() )
+            self._datasets.clear()
+
+        self._notify( dropped )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'datasets': len( self._datasets ),
+                'bytes': self.nbytes(),
+            }
+
+
+# Cache único do processo, compartilhado por todas as sessões e páginas
+DATASETS = DatasetCache()
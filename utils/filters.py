@@ -0,0 +1,120 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import build_bitmaps, select_rows
+
+#=============================================================
+# ----------- FILTROS DA BARRA LATERAL ---------------
+#=============================================================
+
+
+def filter_rows(df, date_range, cities, traffic, weather, bitmaps=None):
+    '''
+    Esta função aplica os filtros da barra lateral e retorna apenas as
+    posições das linhas selecionadas, sem copiar o dataset compartilhado.
+    1-Filtro de datas: busca binária no dataset ordenado por data
+      (o intervalo vira uma fatia de linhas, sem varrer a coluna)
+    2-Filtro de cidades
+    3-Filtro de tipos de trafego
+    4-Filtro de climas
+    Os filtros 2 a 4 são respondidos pelos índices bitmap, só dentro da
+    fatia de datas. `bitmaps` vem do loader.load_bitmaps; sem ele os
+    índices são montados na hora (serve para uso avulso, fora das páginas).
+    
+    '''
+    if bitmaps is None:
+        bitmaps = build_bitmaps( df )
+
+    start, end = date_slice( df, date_range )
+
+    selections = {
+        'City': cities,
+        'Road_traffic_density': traffic,
+        'Weatherconditions': weather,
+    }
+
+    return select_rows( bitmaps, selections, start, end )
+
+
+def date_slice(df, date_range):
+    '''
+    Esta função retorna as posições ( início, fim ) das linhas com
+    Order_Date dentro do intervalo, com os dois extremos incluídos.
+    O dataset precisa estar ordenado por data (como sai do clean_code).
+
+    '''
+    dates = df['Order_Date'].to_numpy()
+    start = dates.searchsorted( pd.Timestamp( date_range[0] ).to_datetime64(), side='left' )
+    end = dates.searchsorted( pd.Timestamp( date_range[-1] ).to_datetime64(), side='right' )
+
+    return start, end
+
+
+def take_rows(df, rows):
+    '''
+    Esta função monta o DataFrame com as linhas selecionadas.
+    As categorias que não aparecem na seleção são removidas: os gráficos
+    do plotly agrupam pelas categorias da coluna e quebram com uma
+    categoria sem nenhuma linha (ex.: uma cidade fora do filtro).
+
+    '''
+    # Coluna a coluna, direto nos arrays: o iloc no DataFrame inteiro
+    # consolidaria os blocos do dataset (copiando tudo e desfazendo o
+    # somente leitura do freeze) e o iloc em cada Series repetiria o índice
+    columns = {}
+    for col in df.columns:
+        values = df[col].array.take( rows )
+        columns[col] = _drop_unused_categories( values ) if isinstance( values, pd.Categorical ) else values
+
+    return pd.DataFrame( columns, index=df.index[rows], copy=False )
+
+
+def _drop_unused_categories(values):
+    '''
+    Esta função faz o mesmo que remove_unused_categories, contando
+    os códigos com bincount (bem mais rápido em colunas grandes).
+
+    '''
+    codes = values.codes
+    categories = values.categories
+
+    # Código -1 (vazio) é contado na posição 0 e descartado
+    used = np.bincount( codes.astype( np.intp ) + 1, minlength=len( categories ) + 1 )[1:] > 0
+    if used.all():
+        return values
+
+    remap = np.append( np.cumsum( used ) - 1, -1 ).astype( codes.dtype )
+
+    return pd.Categorical.from_codes( remap[codes], categories[used], ordered=values.ordered )
+
+
+def refine_rows(df, date_range, cities, traffic, weather):
+    '''
+    Esta função refiltra um resultado anterior quando a seleção nova é
+    mais restrita (intervalo de datas menor, menos opções marcadas).
+    `df` é o DataFrame filtrado da seleção anterior, ainda ordenado por
+    data, então o corte de datas continua sendo uma busca binária.
+    As dimensões que não foram restringidas não são avaliadas; nas outras
+    só as linhas do resultado anterior são testadas, pelos códigos das
+    categorias.
+
+    '''
+    start, end = date_slice( df, date_range )
+
+    keep = np.ones( end - start, dtype=bool )
+    for col, values in ( ( 'City', cities ), ( 'Road_traffic_density', traffic ), ( 'Weatherconditions', weather ) ):
+        column = df[col].iloc[start:end]
+        allowed = column.cat.categories.isin( values )
+        if allowed.all():
+            continue
+        # Código -1 (vazio) cai na última posição, que nunca é selecionada
+        keep &= np.append( allowed, False )[ column.cat.codes.to_numpy() ]
+
+    return np.flatnonzero( keep ) + start
+
+
+def refine_view(df, selection):
+    return take_rows( df, refine_rows( df, *selection ) )
@@ -0,0 +1,160 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import FILTER_DIMENSIONS
+
+#=============================================================
+# ----------- GRADE ESPACIAL DAS ENTREGAS ---------------
+#=============================================================
+#
+# O mapa de calor da demanda não leva os pedidos para o navegador. As
+# coordenadas de entrega são discretizadas no carregamento numa grade
+# hierárquica de latitude / longitude (como um quadtree):
+#   - no nível k cada célula tem 1 / 2**k graus de lado
+#   - a célula de um ponto no nível mais fino ( FINEST_LEVEL, ~430 m ) é
+#     ( linha, coluna ) = piso( ( lat + 90, lon + 180 ) * 2**FINEST_LEVEL )
+#   - a célula do nível k é a do nível mais fino deslocada em bits
+#     ( linha >> ( FINEST_LEVEL - k ) ), então cada célula grossa é a
+#     soma das 4 filhas, sem voltar aos pedidos
+#
+# A grade guarda a quantidade de pedidos por célula fina e combinação das
+# dimensões de filtro (cidade, tráfego, clima), acumulada dia a dia como
+# o índice do cubo ( utils/prefix.py ). O dia não faz parte da chave: as
+# entradas ( chave, dia ) com pedidos ficam ordenadas por chave e dia, com
+# a contagem acumulada C, e o total de uma chave num intervalo de datas
+# [ d0, d1 ) é C( chave, d1 ) - C( chave, d0 ), duas buscas binárias.
+# Uma seleção custa o número de chaves escolhidas, não o número de dias,
+# e a grade não cresce com dias sem pedidos (só as entradas com pedidos
+# são guardadas). O mapa agrega as células da seleção no nível mais fino
+# com até MAX_HEAT_CELLS células ( heat_cells ).
+
+FINEST_LEVEL = 8
+
+MAX_HEAT_CELLS = 10_000
+
+# Linha e coluna cabem em 32 bits: a chave da célula é linha << 32 | coluna
+_COLUMN_BITS = 32
+
+
+def grid_cells(latitude, longitude, level=FINEST_LEVEL):
+    '''
+    Esta função retorna a linha e a coluna da célula de cada ponto no
+    nível `level` da grade.
+
+    '''
+    scale = 2.0 ** level
+    rows = np.floor( ( np.asarray( latitude, dtype='float64' ) + 90 ) * scale ).astype( np.int64 )
+    cols = np.floor( ( np.asarray( longitude, dtype='float64' ) + 180 ) * scale ).astype( np.int64 )
+
+    return rows, cols
+
+
+class GeoGrid:
+    '''
+    Pedidos por célula do nível mais fino e combinação das dimensões de
+    filtro ( FILTER_DIMENSIONS ), acumulados por dia. As dimensões viram
+    códigos inteiros (categorias), então a seleção é respondida só com numpy.
+
+    '''
+
+    def __init__(self, df, lat='Delivery_location_latitude', lon='Delivery_location_longitude'):
+        # Célula do nível mais fino de cada pedido (pedidos sem coordenada saem)
+        latitude = df[lat].to_numpy( dtype='float64' )
+        longitude = df[lon].to_numpy( dtype='float64' )
+        valid = np.isfinite( latitude ) & np.isfinite( longitude )
+        rows, cols = grid_cells( latitude[valid], longitude[valid] )
+
+        self.dates, day = np.unique( df['Order_Date'].to_numpy()[valid], return_inverse=True )
+
+        # Chave de cada pedido: códigos dos filtros e célula, em ordem
+        keys = pd.DataFrame( { col: df[col].cat.codes.to_numpy()[valid] for col in FILTER_DIMENSIONS } )
+        keys['cell'] = ( rows << _COLUMN_BITS ) | cols
+        key = keys.groupby( list( keys.columns ), sort=True ).ngroup().to_numpy()
+        first = np.unique( key, return_index=True )[1]
+
+        self.codes = { col: keys[col].to_numpy()[first].astype( np.int64 ) for col in FILTER_DIMENSIONS }
+        self.levels = { col: df[col].cat.categories for col in FILTER_DIMENSIONS }
+        self.cells = keys['cell'].to_numpy()[first]
+
+        # Entradas ( chave, dia ) com pedidos, ordenadas, e a contagem
+        # acumulada antes de cada uma (com o total no fim)
+        self.entries, counts = np.unique( key * len( self.dates ) + day, return_counts=True )
+        self.cumulative = np.concatenate( [ [ 0 ], np.cumsum( counts ) ] )
+
+    @property
+    def nbytes(self):
+        return ( sum( codes.nbytes for codes in self.codes.values() ) + self.cells.nbytes
+                 + self.entries.nbytes + self.cumulative.nbytes + self.dates.nbytes )
+
+    def select(self, selection):
+        '''
+        Esta função retorna os pedidos por célula do nível mais fino da
+        seleção normalizada da barra lateral ( views.selection_key ).
+        1- Intervalo de datas por busca binária nos dias
+        2- Chaves com os filtros da seleção (cidade, tráfego, clima)
+        3- Total de cada chave no intervalo: diferença das contagens
+           acumuladas, por busca binária nas entradas
+        4- Chaves somadas por célula; só as células com pedidos
+        Retorna o DataFrame ( Cell_row, Cell_col, count ).
+
+        '''
+        ( start, end ), *options = selection
+        d0 = self.dates.searchsorted( start.to_datetime64(), side='left' )
+        d1 = max( d0, self.dates.searchsorted( end.to_datetime64(), side='right' ) )
+
+        keep = np.ones( len( self.cells ), dtype=bool )
+        for col, values in zip( FILTER_DIMENSIONS, options ):
+            keep &= np.append( self.levels[col].isin( values ), False )[ self.codes[col] ]
+        chosen = np.flatnonzero( keep )
+
+        base = chosen * len( self.dates )
+        counts = ( self.cumulative[ self.entries.searchsorted( base + d1 ) ]
+                   - self.cumulative[ self.entries.searchsorted( base + d0 ) ] )
+        present = counts > 0
+        cells, inverse = np.unique( self.cells[chosen[present]], return_inverse=True )
+
+        return pd.DataFrame( {
+            'Cell_row': ( cells >> _COLUMN_BITS ).astype( np.int32 ),
+            'Cell_col': ( cells & ( 2**_COLUMN_BITS - 1 ) ).astype( np.int32 ),
+            'count': np.bincount( inverse, weights=counts[present], minlength=len( cells ) ).astype( np.int64 ),
+        } )
+
+
+def build_geogrid(df, lat='Delivery_location_latitude', lon='Delivery_location_longitude'):
+    # Grade das entregas do dataset limpo ( GeoGrid )
+    return GeoGrid( df, lat=lat, lon=lon )
+
+
+def heat_cells(grid, max_cells=MAX_HEAT_CELLS):
+    '''
+    Esta função agrega as células da seleção ( GeoGrid.select ) para o mapa.
+    1- Soma os pedidos por célula do nível mais fino
+    2- Enquanto houver mais de `max_cells` células, sobe um nível (cada
+       nível soma as células do anterior)
+    3- Centro de cada célula e peso relativo ( pedidos / maior célula )
+    Retorna o DataFrame ( lat, lon, count, weight ) e o nível usado.
+
+    '''
+    keys = ( grid['Cell_row'].to_numpy( dtype=np.int64 ) << _COLUMN_BITS ) | grid['Cell_col'].to_numpy( dtype=np.int64 )
+    cells, inverse = np.unique( keys, return_inverse=True )
+    counts = np.bincount( inverse, weights=grid['count'].to_numpy( dtype='float64' ), minlength=len( cells ) )
+
+    level = FINEST_LEVEL
+    while len( cells ) > max_cells and level > 0:
+        rows, cols = cells >> _COLUMN_BITS, cells & ( 2**_COLUMN_BITS - 1 )
+        cells, inverse = np.unique( ( ( rows >> 1 ) << _COLUMN_BITS ) | ( cols >> 1 ), return_inverse=True )
+        counts = np.bincount( inverse, weights=counts, minlength=len( cells ) )
+        level -= 1
+
+    size = 1 / 2.0 ** level
+    heat = pd.DataFrame( {
+        'lat': ( ( cells >> _COLUMN_BITS ) + 0.5 ) * size - 90,
+        'lon': ( ( cells & ( 2**_COLUMN_BITS - 1 ) ) + 0.5 ) * size - 180,
+        'count': counts.astype( np.int64 ),
+    } )
+    heat['weight'] = heat['count'] / heat['count'].max() if len( heat ) else heat['count']
+
+    return heat, level
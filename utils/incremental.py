@@ -0,0 +1,287 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cleaning import CLEANING_VERSION, clean_code, sort_by_date
+from utils.schema import read_orders
+from utils.snapshot import file_hash
+from utils.streaming import DEFAULT_CHUNK_SIZE, STORE_EXT, categories_sorted, stream_clean
+
+#=============================================================
+# ----------- INGESTÃO INCREMENTAL (APPEND) ---------------
+#=============================================================
+#
+# Cada CSV de pedidos dentro de um diretório (ex.: um arquivo por dia em
+# dados/) vira uma parte Parquet já limpa em <diretório>/_cleaned/.
+# O manifesto registra quais arquivos já foram processados, então uma
+# atualização só limpa os arquivos novos ou alterados: o custo é
+# proporcional aos dados novos e não ao histórico inteiro.
+# As colunas derivadas (Week_of_year, Delivery_distance) são calculadas
+# pelo clean_code de cada parte, ou seja, só para as linhas novas.
+#
+#
+# A origem pode ser um diretório (todos os *.csv) ou um padrão glob dentro
+# de um único diretório (ex.: 'dados/pedidos_2022-*.csv'). Os arquivos
+# pendentes são limpos em paralelo, um por processo, e cada processo grava
+# a sua própria parte: só a entrada do manifesto volta para o processo
+# principal, nenhum DataFrame é copiado entre processos.
+#
+# Num diretório somente leitura (ex.: deploy sem disco gravável) o
+# load_incremental limpa os CSVs na memória, como o snapshot faz quando
+# não consegue gravar. Um store já completo continua sendo lido normalmente:
+# sem arquivos novos nada é gravado.
+#
+# Uso:
+#   python -m utils.incremental dados [chunksize] [workers]
+#   python -m utils.incremental 'dados/pedidos_*.csv' [chunksize] [workers]
+
+STORE_DIR = '_cleaned'
+
+MANIFEST = '_manifest.json'
+
+# Número de processos da limpeza em paralelo ( None = um por núcleo )
+DEFAULT_WORKERS = None
+
+
+def is_pattern(path):
+    return glob.has_magic( path )
+
+
+def source_root(path):
+    '''
+    Esta função retorna o diretório dos arquivos de origem.
+    Para um padrão glob é o diretório do padrão, que não pode ter
+    curingas: o manifesto identifica cada arquivo só pelo nome.
+
+    '''
+    if not is_pattern( path ):
+        return path
+
+    root = os.path.dirname( path )
+    if is_pattern( root ):
+        raise ValueError( f'O padrão {path} deve selecionar arquivos de um único diretório' )
+
+    return root
+
+
+def store_dir(directory):
+    return os.path.join( source_root( directory ), STORE_DIR )
+
+
+def list_sources(directory):
+    pattern = directory if is_pattern( directory ) else os.path.join( directory, '*.csv' )
+    return sorted( path for path in glob.glob( pattern ) if os.path.isfile( path ) )
+
+
+def read_manifest(directory):
+    '''
+    Esta função lê o manifesto do diretório.
+    Um manifesto de outra versão da limpeza é descartado, o que força
+    o reprocessamento de todos os arquivos.
+
+    '''
+    try:
+        with open( os.path.join( store_dir( directory ), MANIFEST ) ) as f:
+            manifest = json.load( f )
+    except ( OSError, ValueError ):
+        return { 'schema_version': CLEANING_VERSION, 'files': {} }
+
+    if manifest.get( 'schema_version' ) != CLEANING_VERSION:
+        return { 'schema_version': CLEANING_VERSION, 'files': {} }
+
+    return manifest
+
+
+def write_manifest(directory, manifest):
+    path = os.path.join( store_dir( directory ), MANIFEST )
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open( tmp, 'w' ) as f:
+        json.dump( manifest, f, indent=2 )
+    os.replace( tmp, path )
+
+
+def part_path(directory, entry):
+    return os.path.join( store_dir( directory ), entry['part'] )
+
+
+def _is_ingested(directory, entry, source):
+    '''
+    Esta função verifica se o arquivo já está no store sem alterações.
+    Tamanho e mtime iguais bastam; se mudaram, compara o hash.
+
+    '''
+    if entry is None or not os.path.exists( part_path( directory, entry ) ):
+        return False
+
+    stat = os.stat( source )
+    if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    return entry['sha256'] == file_hash( source )
+
+
+def pending_sources(directory, manifest):
+    '''
+    Esta função retorna os CSVs do diretório que ainda não foram
+    limpos ou que mudaram desde a última atualização.
+
+    '''
+    return [ source for source in list_sources( directory )
+             if not _is_ingested( directory, manifest['files'].get( os.path.basename( source ) ), source ) ]
+
+
+def ingest(source, part, chunksize=DEFAULT_CHUNK_SIZE):
+    '''
+    Esta função limpa um CSV e grava sua parte no store.
+    Retorna a entrada do manifesto correspondente.
+
+    '''
+    stat = os.stat( source )
+    stream_clean( source, part, chunksize=chunksize )
+
+    return {
+        'part': os.path.basename( part ),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_hash( source ),
+        'rows': pq.ParquetFile( part ).metadata.num_rows,
+    }
+
+
+def ingest_many(jobs, chunksize=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    '''
+    Esta função limpa vários CSVs, em paralelo quando há mais de um.
+    1- `jobs` é uma lista de ( nome, CSV de origem, parte de destino )
+    2- Cada arquivo é limpo num processo separado, até `workers` ao mesmo tempo
+    3- Com workers=1 (ou um único arquivo) tudo roda no próprio processo
+    Gera ( nome, entrada do manifesto ) na ordem em que os arquivos terminam.
+
+    '''
+    workers = min( workers or os.cpu_count() or 1, len( jobs ) )
+    if workers <= 1:
+        for name, source, part in jobs:
+            yield name, ingest( source, part, chunksize=chunksize )
+        return
+
+    # 'spawn' em vez de fork: o servidor do streamlit tem várias threads
+    # rodando e um fork copiaria locks no meio do uso
+    context = multiprocessing.get_context( 'spawn' )
+    with ProcessPoolExecutor( max_workers=workers, mp_context=context ) as pool:
+        futures = { pool.submit( ingest, source, part, chunksize ): name for name, source, part in jobs }
+        for future in as_completed( futures ):
+            yield futures[future], future.result()
+
+
+def refresh_store(directory, chunksize=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    '''
+    Esta função atualiza o store limpo do diretório (ou padrão glob).
+    1- Limpa apenas os CSVs novos ou alterados, em até `workers` processos
+    2- Remove as partes de CSVs que não existem mais
+    3- Atualiza o manifesto
+    Retorna o manifesto atualizado.
+
+    '''
+    os.makedirs( store_dir( directory ), exist_ok=True )
+    manifest = read_manifest( directory )
+
+    jobs = []
+    for source in pending_sources( directory, manifest ):
+        name = os.path.basename( source )
+        jobs.append( ( name, source, os.path.join( store_dir( directory ), os.path.splitext( name )[0] + STORE_EXT ) ) )
+
+    for name, entry in ingest_many( jobs, chunksize=chunksize, workers=workers ):
+        manifest['files'][name] = entry
+        # Manifesto gravado a cada arquivo: uma falha no meio não perde o que já foi feito
+        write_manifest( directory, manifest )
+
+    # Um padrão glob seleciona só parte do diretório: as partes dos outros
+    # arquivos continuam no store enquanto o CSV de origem existir
+    removed = [ name for name in manifest['files'] if not os.path.exists( os.path.join( source_root( directory ), name ) ) ]
+    for name in removed:
+        part = part_path( directory, manifest['files'].pop( name ) )
+        if os.path.exists( part ):
+            os.remove( part )
+
+    # Sem mudanças o manifesto não é regravado ( store somente leitura )
+    if jobs or removed:
+        write_manifest( directory, manifest )
+    return manifest
+
+
+def read_parts(directory, manifest):
+    '''
+    Esta função junta as partes do store num único DataFrame,
+    na ordem dos nomes dos arquivos de origem.
+    1- Só entram os arquivos selecionados pelo diretório ou padrão glob
+    2- Partes sem nenhuma linha válida são ignoradas
+    3- As tabelas Arrow são concatenadas sem cópia e convertidas para
+       pandas uma única vez
+    4- O resultado é ordenado por data (com um arquivo por dia as partes
+       já chegam em ordem e nada é copiado)
+
+    '''
+    current = { os.path.basename( source ) for source in list_sources( directory ) }
+    entries = [ manifest['files'][name] for name in sorted( current & set( manifest['files'] ) ) ]
+    tables = [ pq.read_table( part_path( directory, entry ) ) for entry in entries if entry['rows'] > 0 ]
+
+    return concat_parts( directory, tables )
+
+
+def concat_parts(directory, tables):
+    # Concatena as tabelas Arrow das partes e converte para pandas uma única vez
+    if not tables:
+        raise FileNotFoundError( f'Nenhum pedido válido encontrado em {directory}' )
+
+    table = pa.concat_tables( [ t.replace_schema_metadata( tables[0].schema.metadata ) for t in tables ] )
+
+    return sort_by_date( categories_sorted( table.to_pandas() ) )
+
+
+def clean_in_memory(directory):
+    '''
+    Esta função limpa os CSVs do diretório (ou padrão glob) na memória,
+    sem gravar nada. É a alternativa ao store quando o diretório não
+    aceita gravação: todos os arquivos são limpos de novo a cada carga.
+    O resultado é o mesmo do read_parts.
+
+    '''
+    tables = []
+    for source in list_sources( directory ):
+        df = clean_code( read_orders( source ) )
+        if not df.empty:
+            tables.append( pa.Table.from_pandas( df, preserve_index=False ) )
+
+    return concat_parts( directory, tables )
+
+
+def load_incremental(directory, chunksize=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna o dataset limpo do diretório (ou padrão glob).
+    1- Atualiza o store e junta as partes
+    2- Se não for possível gravar o store (ex.: disco somente leitura),
+       limpa os CSVs na memória
+
+    '''
+    try:
+        manifest = refresh_store( directory, chunksize=chunksize, workers=workers )
+    except ( OSError, pa.ArrowException ):
+        return clean_in_memory( directory )
+
+    return read_parts( directory, manifest )
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    chunksize = int( args[1] ) if len( args ) > 1 else DEFAULT_CHUNK_SIZE
+    workers = int( args[2] ) if len( args ) > 2 else DEFAULT_WORKERS
+    manifest = refresh_store( args[0], chunksize=chunksize, workers=workers )
+    print( f"{len( manifest['files'] )} arquivos, {sum( f['rows'] for f in manifest['files'].values() )} linhas" )
@@ -0,0 +1,209 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+
+import pandas as pd
+
+from utils.bitmaps import build_bitmaps
+from utils.cleaning import clean_code
+from utils.cube import build_cube
+from utils.datasets import DATASETS
+from utils.geogrid import build_geogrid
+from utils.incremental import DEFAULT_WORKERS, is_pattern, list_sources, load_incremental
+from utils.prefix import PrefixIndex
+from utils.sample import build_sample
+from utils.schema import read_orders
+from utils.snapshot import load_snapshot
+from utils.sql import SqlEngine, backend_name
+from utils.streaming import STORE_EXT, read_store
+
+#=============================================================
+# ----------- CARREGAMENTO DO DATASET ---------------
+#=============================================================
+
+DATA_PATH = 'dados/train.csv'
+
+
+def _file_stamp(path):
+    stat = os.stat( path )
+    return ( os.path.basename( path ), stat.st_mtime_ns, stat.st_size )
+
+
+def source_signature(path):
+    '''
+    Esta função retorna a identidade da origem dos dados.
+    A assinatura é formada por:
+    1- Caminho absoluto do arquivo, diretório ou padrão glob
+    2- Nome, data de modificação (em nanossegundos) e tamanho em bytes
+       do arquivo, ou de cada CSV quando `path` é um diretório ou padrão
+
+    '''
+    if os.path.isdir( path ) or is_pattern( path ):
+        return ( os.path.abspath( path ), tuple( _file_stamp( source ) for source in list_sources( path ) ) )
+
+    return ( os.path.abspath( path ), _file_stamp( path ) )
+
+
+def read_and_clean(path):
+    df_raw = read_orders( path )
+    return clean_code( df_raw )
+
+
+def freeze(df):
+    '''
+    Esta função torna o DataFrame somente leitura.
+    Cada coluna fica num array próprio (sem consolidar em blocos) marcado
+    como não gravável: qualquer tentativa de alterar o dataset compartilhado
+    levanta um erro em vez de afetar as outras sessões.
+    Colunas de texto (object) ficam de fora: as rotinas em Cython do
+    pandas 1.5 não aceitam arrays de objetos somente leitura.
+
+    '''
+    columns = {}
+    for col in df.columns:
+        values = df[col].array
+        for attr in ( '_ndarray', '_data', '_mask' ):
+            backing = getattr( values, attr, None )
+            if backing is not None and backing.dtype != object:
+                backing.flags.writeable = False
+        columns[col] = df[col]
+
+    return pd.DataFrame( columns, copy=False )
+
+
+# O dataset é carregado uma única vez enquanto estiver no DATASETS
+# ( utils/datasets.py, LRU de datasets com limite de memória ) e o MESMO
+# objeto é compartilhado entre reruns, sessões e páginas (sem cópia).
+# A chave inclui mtime e tamanho, então o arquivo só é relido quando muda.
+# Num processo novo o dataset vem do snapshot colunar, se ainda for válido.
+# Um arquivo .parquet é tratado como dataset já limpo (gerado pelo streaming).
+# Um diretório ou padrão glob é carregado pelo store incremental (só limpa
+# os CSVs novos, em paralelo).
+@DATASETS.cached
+def _load_clean_data(path, stamp, workers=DEFAULT_WORKERS):
+    if os.path.isdir( path ) or is_pattern( path ):
+        return freeze( load_incremental( path, workers=workers ) )
+
+    if path.endswith( STORE_EXT ):
+        return freeze( read_store( path ) )
+
+    return freeze( load_snapshot( path, read_and_clean ) )
+
+
+def load_data(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função carrega o dataset já limpo.
+    O resultado fica em cache e só é recalculado quando o arquivo
+    de origem é alterado. O DataFrame retornado é compartilhado e
+    somente leitura: use filter_rows para selecionar linhas.
+    `path` pode ser o CSV bruto, o .parquet gravado pelo stream_clean
+    ou um diretório / padrão glob de CSVs (ex.: um arquivo de pedidos
+    por dia, 'dados/pedidos_*.csv'), limpos em até `workers` processos.
+
+    '''
+    return _load_clean_data( *source_signature( path ), workers=workers )
+
+
+# Índices bitmap dos filtros, montados uma vez para cada versão do dataset
+@DATASETS.cached
+def _load_bitmaps(path, stamp, workers=DEFAULT_WORKERS):
+    return build_bitmaps( _load_clean_data( path, stamp, workers=workers ) )
+
+
+def load_bitmaps(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna os índices bitmap das colunas de filtro do
+    dataset de `path` (o mesmo carregado pelo load_data), para o
+    filter_rows responder a seleção com operações de bits.
+
+    '''
+    return _load_bitmaps( *source_signature( path ), workers=workers )
+
+
+# Cubo pré-agregado do dataset e os bitmaps das células (ver utils/cube.py)
+@DATASETS.cached
+def _load_cube(path, stamp, workers=DEFAULT_WORKERS):
+    cube = freeze( build_cube( _load_clean_data( path, stamp, workers=workers ) ) )
+    return cube, build_bitmaps( cube )
+
+
+def load_cube(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna o cubo pré-agregado do dataset de `path` e os
+    índices bitmap das suas células. O cubo é filtrado com o filter_rows
+    como o dataset e agregado com o cube.rollup.
+
+    '''
+    return _load_cube( *source_signature( path ), workers=workers )
+
+
+# Somas acumuladas por dia das células do cubo ( utils/prefix.py )
+@DATASETS.cached
+def _load_prefix(path, stamp, workers=DEFAULT_WORKERS):
+    cube, _ = _load_cube( path, stamp, workers=workers )
+    return PrefixIndex( cube )
+
+
+def load_prefix(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna o índice de somas acumuladas por dia do cubo do
+    dataset de `path`. A visão de uma seleção ( index.view ) responde o
+    rollup das páginas sem filtrar as células.
+
+    '''
+    return _load_prefix( *source_signature( path ), workers=workers )
+
+
+# Grade espacial das entregas, acumulada por dia (ver utils/geogrid.py)
+@DATASETS.cached
+def _load_geogrid(path, stamp, workers=DEFAULT_WORKERS):
+    return build_geogrid( _load_clean_data( path, stamp, workers=workers ) )
+
+
+def load_geogrid(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna a grade das entregas do dataset de `path`
+    (pedidos por célula e dimensão de filtro, acumulados por dia). A
+    seleção ( grid.select ) alimenta o mapa de calor.
+
+    '''
+    return _load_geogrid( *source_signature( path ), workers=workers )
+
+
+# Amostra estratificada do modo aproximado e os bitmaps das suas linhas
+@DATASETS.cached
+def _load_sample(path, stamp, workers=DEFAULT_WORKERS):
+    sample = freeze( build_sample( _load_clean_data( path, stamp, workers=workers ) ) )
+    return sample, build_bitmaps( sample )
+
+
+def load_sample(path=DATA_PATH, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna a amostra estratificada do dataset de `path`, no
+    formato do cubo ( utils/sample.py ), e os índices bitmap das suas
+    linhas. Filtrada como o cubo, responde a prévia do modo aproximado.
+
+    '''
+    return _load_sample( *source_signature( path ), workers=workers )
+
+
+# Banco SQL embutido com as células do cubo, quando o backend não é o pandas
+@DATASETS.cached
+def _load_engine(path, stamp, backend, workers=DEFAULT_WORKERS):
+    cube, _ = _load_cube( path, stamp, workers=workers )
+    return SqlEngine( cube, backend )
+
+
+def load_engine(path=DATA_PATH, backend=None, workers=DEFAULT_WORKERS):
+    '''
+    Esta função retorna o SqlEngine do dataset de `path` para o backend
+    configurado ( CURRY_BACKEND, ver utils/sql.py ), ou None quando as
+    agregações ficam no cubo em pandas.
+
+    '''
+    backend = backend_name( backend )
+    if backend == 'pandas':
+        return None
+
+    return _load_engine( *source_signature( path ), backend, workers=workers )
@@ -0,0 +1,296 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import folium
+import numpy as np
+import pandas as pd
+import streamlit.components.v1 as components
+from branca.element import Element
+from folium.plugins import HeatMap, MarkerCluster
+from jinja2 import Template
+
+#=============================================================
+# ----------- CAMADAS DE PONTOS DOS MAPAS ---------------
+#=============================================================
+#
+# Um folium.Marker por linha ( iterrows ) serve para uma dúzia de
+# medianas, mas não para pontos por restaurante ou por região: cada
+# marcador é um objeto Python, com o seu pedaço de JavaScript no HTML.
+#
+# A camada de pontos ( PointLayer ) recebe as colunas inteiras: latitude,
+# longitude e texto do popup vão para o HTML num único JSON por colunas
+# ( tolist + json.dumps, sem laço em Python ) e os marcadores são criados
+# no navegador. Acima de CLUSTER_MIN_POINTS os marcadores são agrupados
+# no navegador ( Leaflet.markercluster ), então o mapa continua leve com
+# 100 mil pontos ou mais.
+#
+# O JSON entra no HTML como está ( RawScript ): o branca compila como
+# template Jinja o texto de cada elemento do mapa, o que com 100 mil
+# pontos custaria mais que montar o mapa.
+
+CLUSTER_MIN_POINTS = 500
+
+# Raio (em pixels) de cada célula no mapa de calor
+HEAT_RADIUS = 18
+
+# Zoom máximo ao enquadrar os pontos (um ponto só não vira zoom de rua)
+MAX_FIT_ZOOM = 12
+
+
+class RawScript( Element ):
+    '''
+    Trecho de JavaScript que vai para o HTML sem passar pelo Jinja.
+
+    '''
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+
+    def render(self, **kwargs):
+        return self.text
+
+
+class PointLayer( MarkerCluster ):
+    '''
+    Camada de marcadores montada no navegador a partir de colunas
+    ( point_data ), agrupados ( cluster=True ) ou não.
+
+    '''
+
+    _template = Template( """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.get_name() }}_data;
+                {%- if this.cluster %}
+                var layer = L.markerClusterGroup({{ this.options|tojson }});
+                {%- else %}
+                var layer = L.featureGroup();
+                {%- endif %}
+                for (var i = 0; i < data.lat.length; i++) {
+                    var marker = L.marker([data.lat[i], data.lon[i]]);
+                    if (data.popup) {
+                        var content = document.createElement('span');
+                        content.textContent = data.popup[i];
+                        marker.bindPopup(content);
+                    }
+                    marker.addTo(layer);
+                }
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}""" )
+
+    def __init__(self, data, cluster=True, name=None, **kwargs):
+        super().__init__( name=name, **kwargs )
+        self._name = 'PointLayer'
+        self.data = data
+        self.cluster = cluster
+
+    def render(self, **kwargs):
+        # Dados antes do script da camada, que os lê da variável
+        self.get_root().script.add_child( RawScript( f'var {self.get_name()}_data = {self.data};' ),
+                                          name=f'{self.get_name()}_data' )
+        super().render( **kwargs )
+
+
+def popup_labels(points, columns):
+    '''
+    Esta função junta as colunas `columns` de cada linha num texto de
+    popup ( ex.: 'Urban, High' ), com operações de coluna.
+
+    '''
+    labels = points[columns[0]].astype( str )
+    for col in columns[1:]:
+        labels = labels + ', ' + points[col].astype( str )
+
+    return labels
+
+
+def point_data(points, lat, lon, popup=()):
+    '''
+    Esta função monta o JSON por colunas da camada de pontos.
+    1- Latitude e longitude como arrays (linhas sem coordenada saem)
+    2- Texto do popup ( popup_labels ), se houver colunas de popup
+    3- Um json.dumps só, seguro dentro da tag <script>
+    Retorna o JSON e os limites [ [ lat_min, lon_min ], [ lat_max, lon_max ] ]
+    (None sem pontos).
+
+    '''
+    latitude = points[lat].to_numpy( dtype='float64' )
+    longitude = points[lon].to_numpy( dtype='float64' )
+    valid = np.isfinite( latitude ) & np.isfinite( longitude )
+    latitude, longitude = latitude[valid], longitude[valid]
+
+    data = { 'lat': latitude.tolist(), 'lon': longitude.tolist() }
+    if popup:
+        data['popup'] = popup_labels( points[valid], list( popup ) ).tolist()
+
+    bounds = None
+    if len( latitude ):
+        bounds = [ [ latitude.min(), longitude.min() ], [ latitude.max(), longitude.max() ] ]
+
+    return json.dumps( data ).replace( '</', '<\\/' ), bounds
+
+
+def points_layer(points, lat, lon, popup=(), cluster=None, name=None):
+    '''
+    Esta função retorna a camada de pontos de `points` (colunas `lat` e
+    `lon`, popup com as colunas `popup`) e os seus limites. Sem `cluster`,
+    agrupa a partir de CLUSTER_MIN_POINTS pontos.
+
+    '''
+    data, bounds = point_data( points, lat, lon, popup )
+    if cluster is None:
+        cluster = len( points ) >= CLUSTER_MIN_POINTS
+
+    return PointLayer( data, cluster=cluster, name=name ), bounds
+
+
+def points_map(points, lat, lon, popup=(), cluster=None):
+    '''
+    Esta função desenha um mapa com a camada de pontos de `points`,
+    enquadrado nos pontos.
+
+    '''
+    map = folium.Map()
+
+    layer, bounds = points_layer( points, lat, lon, popup, cluster )
+    layer.add_to( map )
+    if bounds is not None:
+        map.fit_bounds( bounds, max_zoom=MAX_FIT_ZOOM )
+
+    return map
+
+
+def heat_map(heat):
+    '''
+    Esta função desenha o mapa de calor das células agregadas da grade
+    ( geogrid.heat_cells ): um ponto por célula, com o peso da célula.
+
+    '''
+    map = folium.Map()
+    if len( heat ):
+        HeatMap( heat[[ 'lat', 'lon', 'weight' ]].to_numpy(), radius=HEAT_RADIUS ).add_to( map )
+        map.fit_bounds( [ [ heat['lat'].min(), heat['lon'].min() ], [ heat['lat'].max(), heat['lon'].max() ] ],
+                        max_zoom=MAX_FIT_ZOOM )
+
+    return map
+
+
+#=============================================================
+# ----------- HTML DOS MAPAS EM CACHE ---------------
+#=============================================================
+#
+# O folium_static monta o mapa e gera o HTML a cada rerun, mesmo quando
+# só mudou um widget de outra aba, e o HTML nunca sai igual (o folium
+# sorteia os ids dos elementos), então o navegador recria o iframe.
+#
+# map_static guarda o HTML gerado no MAPS, com a chave de um hash dos
+# pontos agregados que o mapa mostra ( map_key ). Um mapa com os mesmos
+# pontos reaproveita o HTML idêntico, sem montar o folium.Map; o iframe
+# não muda. O cache é do processo, LRU, limitado em bytes.
+
+MAP_CACHE_BYTES = 64 * 2**20
+
+
+def map_key(name, *frames):
+    '''
+    Esta função retorna a chave do mapa `name` com os pontos de `frames`
+    (DataFrames já agregados): hash das colunas e dos valores.
+
+    '''
+    digest = hashlib.sha1( name.encode() )
+    for frame in frames:
+        digest.update( json.dumps( [ str( col ) for col in frame.columns ] ).encode() )
+        digest.update( pd.util.hash_pandas_object( frame, index=False ).to_numpy().tobytes() )
+
+    return digest.hexdigest()
+
+
+class MapCache:
+    '''
+    Cache LRU do HTML dos mapas, com limite de bytes.
+    Contadores de acertos, falhas e despejos em stats().
+
+    '''
+
+    def __init__(self, max_bytes=MAP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def html(self, key, build):
+        '''
+        Esta função retorna o HTML do mapa `key`, gerado com `build()`
+        (que devolve o folium.Map) só na primeira vez.
+
+        '''
+        with self._lock:
+            if key in self._pages:
+                self._pages.move_to_end( key )
+                self.hits += 1
+                return self._pages[key][0]
+            self.misses += 1
+
+        # Mesmo HTML do folium_static: o mapa dentro de uma Figure
+        html = folium.Figure().add_child( build() ).render()
+        # Tamanho em bytes (UTF-8), não em caracteres
+        nbytes = len( html.encode() )
+
+        with self._lock:
+            if key not in self._pages:
+                self._pages[key] = ( html, nbytes )
+                self._bytes += nbytes
+            self._pages.move_to_end( key )
+            self._evict()
+
+        return html
+
+    def _evict(self):
+        # O mapa mais recente sempre fica, mesmo maior que o limite
+        while len( self._pages ) > 1 and self.nbytes() > self.max_bytes:
+            _, ( _, nbytes ) = self._pages.popitem( last=False )
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def nbytes(self):
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len( self._pages ),
+                'bytes': self.nbytes(),
+            }
+
+
+# Cache único do processo, compartilhado por todas as sessões e páginas
+MAPS = MapCache()
+
+
+def map_static(key, build, width=700, height=500):
+    '''
+    Esta função desenha o mapa como o folium_static, com o HTML do MAPS.
+    `key` vem do map_key; `build` monta o folium.Map quando o HTML do
+    mapa ainda não está no cache.
+
+    '''
+    return components.html( MAPS.html( key, build ), height=height + 10, width=width )
@@ -0,0 +1,59 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+#=============================================================
+# ----------- TAMANHO DOS OBJETOS EM CACHE ---------------
+#=============================================================
+#
+# Estimativa dos bytes ocupados pelo que os caches guardam, usada nos
+# limites de memória do VIEWS ( utils/views.py, seleções e resultados ) e
+# do DATASETS ( utils/datasets.py, datasets carregados e seus índices ).
+
+# Linhas usadas para estimar o tamanho das colunas de texto
+SIZE_SAMPLE = 1_000
+
+
+def _object_bytes(values):
+    '''
+    Esta função estima os bytes dos objetos de uma coluna de texto pela
+    média de uma amostra (o memory_usage( deep=True ) mede linha a linha).
+
+    '''
+    if len( values ) == 0:
+        return 0
+    sample = values[ np.linspace( 0, len( values ) - 1, min( len( values ), SIZE_SAMPLE ) ).astype( int ) ]
+
+    return int( sum( sys.getsizeof( v ) for v in sample ) / len( sample ) * len( values ) )
+
+
+def sizeof(value):
+    '''
+    Esta função estima o tamanho em bytes de um resultado guardado.
+    1- DataFrames e Series: colunas e índice, texto pela amostra
+    2- Objetos com `nbytes` (arrays, índices, banco SQL)
+    3- Tuplas, listas e dicionários (ex.: cubo e bitmaps): soma das partes
+    4- Figuras e escalares: tamanho serializado
+
+    '''
+    if isinstance( value, pd.Series ):
+        value = value.to_frame()
+    if isinstance( value, pd.DataFrame ):
+        nbytes = int( value.memory_usage( index=True ).sum() )
+        for col in value.columns[ value.dtypes == object ]:
+            nbytes += _object_bytes( value[col].to_numpy() )
+        return nbytes
+    # Arrays, índices e visões do backend SQL ( dados no banco, nbytes = 0 )
+    if hasattr( value, 'nbytes' ):
+        return value.nbytes
+    if isinstance( value, ( tuple, list ) ):
+        return sum( sizeof( item ) for item in value )
+    if isinstance( value, dict ):
+        return sum( sizeof( item ) for item in value.values() )
+
+    return len( pickle.dumps( value, protocol=pickle.HIGHEST_PROTOCOL ) )
@@ -0,0 +1,212 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from utils.bitmaps import FILTER_DIMENSIONS
+from utils.cube import CUBE_DIMENSIONS, RANGE_MEASURES, SUM_MEASURES
+
+#=============================================================
+# ----------- ÍNDICE DE SOMAS ACUMULADAS POR DIA ---------------
+#=============================================================
+#
+# O slider de datas é o filtro mais usado. Em vez de filtrar as células
+# do cubo ( utils/cube.py ) a cada seleção, o índice guarda, para cada
+# combinação das dimensões que não são de tempo (cidade, tráfego, clima,
+# tipo de pedido, festival), as estatísticas somáveis do cubo ( count,
+# __n, __sum, __sumsq ) acumuladas dia a dia:
+#   P[d] = soma dos dias anteriores ao dia d
+# O total de um intervalo de datas [ d0, d1 ) é P[d1] - P[d0], com o
+# custo do número de combinações e não do número de dias ou de pedidos.
+# Cada dia ou semana de um gráfico é um intervalo, então o mesmo vale
+# para os totais por data / semana.
+#
+# Mínimos e máximos não se subtraem: ficam numa grade dia x combinação
+# e o intervalo é reduzido com np.fmin / np.fmax.
+#
+# A visão da seleção ( PrefixIndex.view ) substitui o cubo filtrado nas
+# funções das páginas, como a visão do backend SQL: o rollup chama
+# view.cells( by, columns ).
+
+TIME_DIMENSIONS = [ 'Order_Date', 'Week_of_year' ]
+
+# Dimensões de cada combinação (as do cubo, menos as de tempo)
+GROUP_DIMENSIONS = [ col for col in CUBE_DIMENSIONS if col not in TIME_DIMENSIONS ]
+
+
+class PrefixIndex:
+    '''
+    Somas acumuladas por dia das células do cubo de um dataset
+    ( build_cube ), por combinação das dimensões que não são de tempo.
+    As dimensões viram códigos inteiros (categorias; data e semana pelos
+    valores distintos), então a consulta agrupa só com numpy.
+
+    '''
+
+    def __init__(self, cube):
+        self.dtypes = cube.dtypes
+
+        days, day = np.unique( cube['Order_Date'].to_numpy(), return_inverse=True )
+        combos = cube.groupby( GROUP_DIMENSIONS, observed=True ).ngroup().to_numpy()
+        first = np.unique( combos, return_index=True )[1]
+        first_day = np.unique( day, return_index=True )[1]
+        self.dates = days
+
+        # Códigos de cada combinação ( GROUP_DIMENSIONS ) e de cada dia ( TIME_DIMENSIONS )
+        self.codes, self.levels = {}, {}
+        for col in GROUP_DIMENSIONS:
+            self.codes[col] = cube[col].cat.codes.to_numpy()[first].astype( np.int64 )
+            self.levels[col] = cube[col].cat.categories
+        for col in TIME_DIMENSIONS:
+            self.levels[col], self.codes[col] = np.unique( cube[col].to_numpy()[first_day], return_inverse=True )
+
+        self.sums = [ 'count' ] + [ f'{col}__{stat}' for col in SUM_MEASURES for stat in ( 'n', 'sum', 'sumsq' ) ]
+        self.ranges = [ f'{col}__{stat}' for col in RANGE_MEASURES for stat in ( 'min', 'max' ) ]
+
+        # Somas por dia e combinação, acumuladas nos dias (com a linha 0 zerada)
+        shape = ( len( days ), len( first ) )
+        daily = np.zeros( shape + ( len( self.sums ), ) )
+        for k, col in enumerate( self.sums ):
+            np.add.at( daily[:, :, k], ( day, combos ), cube[col].to_numpy( dtype='float64' ) )
+        self.prefix = np.concatenate( [ np.zeros( ( 1, ) + daily.shape[1:] ), np.cumsum( daily, axis=0 ) ] )
+
+        # Mínimos e máximos por dia e combinação (NaN sem pedidos)
+        self.grid = np.full( shape + ( len( self.ranges ), ), np.nan )
+        for k, col in enumerate( self.ranges ):
+            self.grid[day, combos, k] = cube[col].to_numpy( dtype='float64' )
+
+    @property
+    def nbytes(self):
+        return self.prefix.nbytes + self.grid.nbytes
+
+    def view(self, selection):
+        '''
+        Esta função retorna a visão da seleção normalizada da barra lateral
+        ( views.selection_key ), usada no lugar do cubo filtrado.
+
+        '''
+        return PrefixView( self, selection )
+
+    def periods(self, d0, d1, time_by):
+        '''
+        Esta função divide os dias [ d0, d1 ) em intervalos seguidos com a
+        mesma data / semana ( `time_by` ). Retorna os limites dos intervalos
+        e o código de tempo de cada um. Sem `time_by`, um intervalo só.
+
+        '''
+        if not time_by or d1 <= d0:
+            return np.array( [ d0, d1 ] ), {}
+
+        keys = np.stack( [ self.codes[col][d0:d1] for col in time_by ] )
+        changed = ( keys[:, 1:] != keys[:, :-1] ).any( axis=0 )
+        starts = np.concatenate( [ [ 0 ], np.flatnonzero( changed ) + 1 ] )
+
+        return np.append( starts + d0, d1 ), { col: self.codes[col][starts + d0] for col in time_by }
+
+    def cells(self, selection, by, columns):
+        '''
+        Esta função agrega as células da seleção por `by` e retorna as
+        colunas do cubo pedidas ( mesmo formato do _combine do cube.py ):
+        1- Intervalo de datas por busca binária nos dias
+        2- Totais de cada intervalo ( o período todo, ou cada dia / semana
+           de `by` ): P[fim] - P[início], por combinação dos filtros
+        3- Combinações somadas pelos códigos de `by` (bincount)
+        4- Só os grupos com pedidos; categorias só com os valores presentes
+        Índice ordenado por `by`; com by=[] uma linha só (linha 0).
+
+        '''
+        ( start, end ), *options = selection
+        d0 = self.dates.searchsorted( start.to_datetime64(), side='left' )
+        d1 = max( d0, self.dates.searchsorted( end.to_datetime64(), side='right' ) )
+
+        keep = np.ones( len( self.prefix[0] ), dtype=bool )
+        for col, values in zip( FILTER_DIMENSIONS, options ):
+            keep &= np.append( self.levels[col].isin( values ), False )[ self.codes[col] ]
+        chosen = np.flatnonzero( keep )
+
+        time_by = [ col for col in TIME_DIMENSIONS if col in by ]
+        bounds, period_codes = self.periods( d0, d1, time_by )
+        n_periods = len( bounds ) - 1
+
+        # Código do grupo de cada ( intervalo, combinação ), na ordem de `by`
+        keys = [ np.repeat( period_codes[col], len( chosen ) ) if col in time_by
+                 else np.tile( self.codes[col][chosen], n_periods ) for col in by ]
+        sizes = [ len( self.levels[col] ) for col in by ]
+        group = np.ravel_multi_index( keys, sizes ) if by else np.zeros( n_periods * len( chosen ), dtype=np.int64 )
+
+        # Só as somas pedidas ( count sempre ), nos limites e combinações escolhidos
+        wanted = [ col for col in self.sums if col in columns or col == 'count' ]
+        prefix = self.prefix[ np.ix_( bounds, chosen, [ self.sums.index( col ) for col in wanted ] ) ]
+        sums = ( prefix[1:] - prefix[:-1] ).reshape( -1, len( wanted ) )
+        present = sums[:, 0] > 0
+        groups, inverse = np.unique( group[present], return_inverse=True )
+
+        cells = {}
+        for k, col in enumerate( wanted ):
+            cells[col] = np.bincount( inverse, weights=sums[present, k], minlength=len( groups ) )
+        if any( col in self.ranges for col in columns ):
+            grid = self.grid[d0:d1][:, chosen] if d1 > d0 else np.full( ( 1, len( chosen ), len( self.ranges ) ), np.nan )
+            starts = bounds[:-1] - d0
+            for k, col in enumerate( self.ranges ):
+                if col in columns:
+                    reduce = np.fmin if col.endswith( '__min' ) else np.fmax
+                    values = np.full( len( groups ), np.nan )
+                    reduce.at( values, inverse, reduce.reduceat( grid[:, :, k], starts, axis=0 ).ravel()[present] )
+                    cells[col] = values
+
+        # Tipos do cubo: contagens inteiras, mínimos e máximos no tipo da coluna
+        for col in cells:
+            if col == 'count' or col.endswith( '__n' ):
+                cells[col] = cells[col].round().astype( np.int64 )
+            elif col in self.ranges and len( groups ):
+                cells[col] = cells[col].astype( self.dtypes[col] )
+        cells = pd.DataFrame( cells, columns=columns )
+
+        if not by:
+            return cells.reindex( [ 0 ] )
+
+        cells.index = self._index( by, np.unravel_index( groups, sizes ) )
+        return cells
+
+    def _index(self, by, codes):
+        '''
+        Esta função monta o índice dos grupos a partir dos códigos de cada
+        coluna de `by`, com os tipos do cubo (categorias só com os valores
+        presentes).
+
+        '''
+        arrays = []
+        for col, values in zip( by, codes ):
+            levels = self.levels[col]
+            if isinstance( self.dtypes[col], pd.CategoricalDtype ):
+                arrays.append( pd.Categorical.from_codes( values, dtype=self.dtypes[col] ).remove_unused_categories() )
+            else:
+                arrays.append( levels[values] )
+
+        if len( by ) == 1:
+            return pd.Index( arrays[0], name=by[0] )
+
+        return pd.MultiIndex.from_arrays( arrays, names=by )
+
+
+class PrefixView:
+    '''
+    Seleção da barra lateral sobre o PrefixIndex. Substitui o cubo
+    filtrado nas funções das páginas: o cube.rollup pede as células
+    agregadas ao índice.
+
+    '''
+
+    # O índice é compartilhado; a visão guarda só a seleção
+    nbytes = 0
+
+    def __init__(self, index, selection):
+        # Referência forte: a página em andamento continua usando o índice
+        # mesmo que o DATASETS o descarte; as entradas do VIEWS saem junto
+        # com o dataset ( ViewCache.discard_datasets )
+        self.index = index
+        self.selection = selection
+
+    def cells(self, by, columns):
+        return self.index.cells( self.selection, by, columns )
@@ -0,0 +1,234 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.cleaning import sort_by_date
+from utils.cube import CUBE_DIMENSIONS, RANGE_MEASURES, SUM_MEASURES, rollup
+
+#=============================================================
+# ----------- AMOSTRA ESTRATIFICADA (MODO APROXIMADO) ---------------
+#=============================================================
+#
+# No modo aproximado as funções do cubo respondem primeiro a partir de
+# uma amostra dos pedidos, estratificada por cidade e tráfego: cada
+# estrato recebe uma parte proporcional da amostra, com um mínimo de
+# linhas, então segmentos pequenos continuam representados.
+#
+# A amostra tem o formato do cubo ( utils/cube.py ): cada pedido sorteado
+# é uma célula com peso N_h / n_h (pedidos do estrato / sorteados), então
+# count, __n, __sum e __sumsq são estimativas dos totais e o rollup, os
+# filtros, os bitmaps e o VIEWS funcionam nela sem mudança. O tamanho é
+# fixo ( DEFAULT_SAMPLE_ROWS ): o custo da prévia não cresce com o
+# histórico, enquanto o cubo cresce com o número de dias.
+#
+# confidence() dá a meia largura do intervalo de confiança de contagens,
+# somas e médias (estimador estratificado, com correção de população
+# finita; médias pelo estimador de razão linearizado).
+#
+# O resultado exato é calculado em segundo plano ( in_background ) e
+# substitui a prévia no rerun seguinte.
+
+STRATA = [ 'City', 'Road_traffic_density' ]
+
+DEFAULT_SAMPLE_ROWS = 20_000
+
+MIN_STRATUM_ROWS = 200
+
+CONFIDENCE_LEVEL = 0.95
+
+PREVIEW_NOTE = ( 'Prévia aproximada: amostra estratificada por cidade e tráfego. '
+                 'Barras de erro são intervalos de confiança de 95%; '
+                 'os demais resultados da amostra estão marcados como estimativa. '
+                 'Os valores exatos substituem a prévia assim que forem calculados.' )
+
+
+def build_sample(df, rows=DEFAULT_SAMPLE_ROWS, min_rows=MIN_STRATUM_ROWS, seed=42):
+    '''
+    Esta função sorteia a amostra estratificada e a monta no formato do cubo.
+    1- Estratos: combinações de cidade e tráfego
+    2- Linhas por estrato: proporcional ao estrato, no mínimo `min_rows`
+       (ou o estrato inteiro, se for menor)
+    3- Sorteio sem reposição dentro de cada estrato
+    4- Células com peso N_h / n_h e o tamanho do estrato, ordenadas por data
+
+    '''
+    stratum = df.groupby( STRATA, observed=True ).ngroup().to_numpy()
+    sizes = np.bincount( stratum )
+    quota = np.minimum( sizes, np.maximum( min_rows, np.round( rows * sizes / len( df ) ) ) ).astype( np.int64 )
+
+    # Ordem aleatória dentro de cada estrato; ficam as `quota` primeiras
+    rng = np.random.default_rng( seed )
+    order = np.lexsort( ( rng.random( len( df ) ), stratum ) )
+    rank = np.arange( len( df ) ) - np.repeat( np.cumsum( sizes ) - sizes, sizes )
+    taken = np.sort( order[ rank < quota[ stratum[order] ] ] )
+
+    picked = stratum[taken]
+    weight = sizes[picked] / quota[picked]
+
+    columns = { col: df[col].array.take( taken ) for col in CUBE_DIMENSIONS }
+    columns['count'] = weight
+    for col in SUM_MEASURES:
+        values = df[col].to_numpy( dtype='float64' )[taken]
+        present = ~np.isnan( values )
+        columns[f'{col}__n'] = weight * present
+        columns[f'{col}__sum'] = weight * np.where( present, values, 0 )
+        columns[f'{col}__sumsq'] = weight * np.where( present, values * values, 0 )
+    for col in RANGE_MEASURES:
+        values = df[col].to_numpy()[taken]
+        columns[f'{col}__min'] = values
+        columns[f'{col}__max'] = values
+
+    columns['stratum'] = picked
+    columns['stratum_size'] = sizes[picked]
+    columns['stratum_sample'] = quota[picked]
+
+    return sort_by_date( pd.DataFrame( columns ) )
+
+
+def is_sample(cube):
+    return isinstance( cube, pd.DataFrame ) and 'stratum' in cube.columns
+
+
+def _variance(groups, totals, squares):
+    '''
+    Esta função soma, por grupo, a variância do total estimado:
+    Σ_h N_h² (1 - n_h/N_h) s²_h / n_h, com s²_h a variância amostral da
+    variável no estrato (zero fora do grupo / filtro).
+
+    '''
+    size, sample = groups['stratum_size'], groups['stratum_sample']
+    s2 = ( ( squares - totals * totals / sample ) / ( sample - 1 ).where( sample > 1 ) ).fillna( 0 ).clip( lower=0 )
+    terms = size * size * ( 1 - sample / size ) * s2 / sample
+
+    return terms.groupby( level=list( range( groups.index.nlevels - 1 ) ) ).sum()
+
+
+def confidence(cube, by, measures=None, level=CONFIDENCE_LEVEL):
+    '''
+    Esta função retorna a meia largura do intervalo de confiança de
+    rollup( cube, by, measures ), no mesmo formato.
+    1- Só para a amostra do modo aproximado; no cubo exato (ou na visão
+       SQL) os valores são exatos e os intervalos valem 0
+    2- Estatísticas com intervalo: count, sum e mean; as demais
+       (std, var, min, max) ficam sem intervalo (NaN)
+
+    '''
+    estimate = rollup( cube, by, measures )
+    if not is_sample( cube ):
+        return estimate * 0
+
+    by = [ by ] if isinstance( by, str ) else list( by )
+    z = NormalDist().inv_cdf( 0.5 + level / 2 )
+
+    # Totais por grupo e estrato: Σu e Σu² das linhas sorteadas (pesos desfeitos)
+    rows = pd.DataFrame( { col: cube[col] for col in by } if by else { 'group': np.zeros( len( cube ), dtype='int8' ) } )
+    keys = by or [ 'group' ]
+    rows['stratum'] = cube['stratum']
+    rows['one'] = 1.0
+    for col in ( measures or {} ):
+        weight = cube['count']
+        rows[f'{col}__n'] = cube[f'{col}__n'] / weight
+        rows[f'{col}__sum'] = cube[f'{col}__sum'] / weight
+        rows[f'{col}__sumsq'] = cube[f'{col}__sumsq'] / weight
+
+    sums = rows.groupby( keys + [ 'stratum' ], observed=True ).sum()
+    strata = cube.groupby( 'stratum' )[ [ 'stratum_size', 'stratum_sample' ] ].first()
+    sums = sums.join( strata, on='stratum' )
+
+    # Contagem: u = 1 para as linhas do grupo (u² = u)
+    # ( com by=[] o grupo único é o 0, como no rollup )
+    count = z * np.sqrt( _variance( sums, sums['one'], sums['one'] ) ).reindex( estimate.index )
+
+    if measures is None:
+        return count.rename( 'count' )
+
+    result = pd.DataFrame( np.nan, index=estimate.index, columns=estimate.columns )
+    for col, stats in measures.items():
+        n, total, squares = sums[f'{col}__n'], sums[f'{col}__sum'], sums[f'{col}__sumsq']
+        weight = sums['stratum_size'] / sums['stratum_sample']
+
+        # Média (razão) do grupo e resíduos z = y - média nas linhas do grupo
+        level_keys = list( range( sums.index.nlevels - 1 ) )
+        mean = ( weight * total ).groupby( level=level_keys ).sum() / ( weight * n ).groupby( level=level_keys ).sum()
+        mean_rows = mean.reindex( sums.index.droplevel( -1 ) ).to_numpy()
+        residual = total - mean_rows * n
+        residual_sq = squares - 2 * mean_rows * total + mean_rows * mean_rows * n
+
+        intervals = {
+            'count': z * np.sqrt( _variance( sums, n, n ) ),
+            'sum': z * np.sqrt( _variance( sums, total, squares ) ),
+            'mean': z * np.sqrt( _variance( sums, residual, residual_sq ) ) / ( weight * n ).groupby( level=level_keys ).sum(),
+        }
+        for stat in stats:
+            if stat in intervals:
+                result[( col, stat )] = intervals[stat].reindex( estimate.index ).to_numpy()
+
+    return result
+
+
+def add_error_bars(fig, cube, by):
+    '''
+    Esta função desenha o intervalo de confiança das contagens por `by`
+    como barras de erro na figura. No cubo exato a figura não muda (e o
+    intervalo nem é calculado).
+
+    '''
+    if is_sample( cube ):
+        fig.update_traces( error_y=dict( type='data', array=confidence( cube, by ).to_numpy() ) )
+
+    return fig
+
+
+def preview_summary(cube, level=CONFIDENCE_LEVEL):
+    '''
+    Esta função monta a tabela dos intervalos da prévia por cidade:
+    pedidos e médias de tempo, avaliação e distância ( estimativa ± meia
+    largura do intervalo ).
+
+    '''
+    measures = { col: [ 'mean' ] for col in SUM_MEASURES }
+    counts = rollup( cube, 'City' )
+    counts_ci = confidence( cube, 'City', level=level )
+    means = rollup( cube, 'City', measures )
+    means_ci = confidence( cube, 'City', measures, level=level )
+
+    table = pd.DataFrame( { 'Pedidos': [ f'{value:,.0f} ± {ci:,.0f}' for value, ci in zip( counts, counts_ci ) ] }, index=counts.index )
+    for col in SUM_MEASURES:
+        table[col] = [ f'{value:.2f} ± {ci:.2f}' for value, ci in zip( means[( col, 'mean' )], means_ci[( col, 'mean' )] ) ]
+
+    return table
+
+
+# Cálculos exatos em segundo plano: uma thread, um trabalho por chave
+_BACKGROUND = ThreadPoolExecutor( max_workers=1, thread_name_prefix='exato' )
+_PENDING = {}
+_PENDING_LOCK = threading.Lock()
+
+
+def in_background(key, job):
+    '''
+    Esta função agenda `job()` em segundo plano e retorna o Future.
+    Sessões que pedem a mesma chave (ex.: a mesma seleção) enquanto o
+    trabalho não termina recebem o mesmo Future.
+
+    '''
+    with _PENDING_LOCK:
+        future = _PENDING.get( key )
+        if future is None:
+            future = _BACKGROUND.submit( job )
+            _PENDING[key] = future
+            future.add_done_callback( lambda done: _forget( key, done ) )
+
+    return future
+
+
+def _forget(key, future):
+    with _PENDING_LOCK:
+        if _PENDING.get( key ) is future:
+            del _PENDING[key]
@@ -0,0 +1,93 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+#=============================================================
+# ----------- ESQUEMA DO train.csv ---------------
+#=============================================================
+#
+# Contrato de leitura dos arquivos de pedidos: o parser já recebe os tipos
+# de cada coluna, os sentinelas de vazio e apenas as colunas usadas pelos
+# dashboards. Assim o CSV não é lido inteiro como texto (object) para ser
+# convertido depois pelo clean_code.
+
+# Sentinelas de vazio usados no arquivo (com e sem espaço no final)
+NA_VALUES = [ 'NaN', 'NaN ' ]
+
+DATE_FORMAT = '%d-%m-%Y'
+
+# Colunas usadas pelos dashboards e o tipo lido direto do CSV.
+# - Textos com poucos valores distintos já vêm como 'category'
+#   (espaços e prefixos são removidos depois, só nas categorias)
+# - Colunas numéricas com sentinela vazio são lidas como float e viram
+#   inteiros depois que as linhas vazias são removidas
+# - As avaliações ficam em float64, como no original: as médias
+#   arredondadas (round(2)) batem com as do dataset sem compactação
+CSV_DTYPES = {
+    'ID': 'object',
+    'Delivery_person_ID': 'object',
+    'Delivery_person_Age': 'float32',
+    'Delivery_person_Ratings': 'float64',
+    'Restaurant_latitude': 'float32',
+    'Restaurant_longitude': 'float32',
+    'Delivery_location_latitude': 'float32',
+    'Delivery_location_longitude': 'float32',
+    'Order_Date': 'category',
+    'Weatherconditions': 'category',
+    'Road_traffic_density': 'category',
+    'Vehicle_condition': 'int8',
+    'Type_of_order': 'category',
+    'Type_of_vehicle': 'category',
+    'multiple_deliveries': 'float32',
+    'Festival': 'category',
+    'City': 'category',
+    'Time_taken(min)': 'category',
+}
+
+
+def _arrow_type(dtype):
+    if dtype == 'object':
+        return pa.string()
+    if dtype == 'category':
+        return pa.dictionary( pa.int32(), pa.string() )
+    return pa.from_numpy_dtype( dtype )
+
+
+# Os mesmos tipos para o leitor de CSV do pyarrow ( 'category' = dicionário )
+ARROW_TYPES = { col: _arrow_type( dtype ) for col, dtype in CSV_DTYPES.items() }
+
+# Linhas com qualquer uma destas colunas vazia são descartadas
+REQUIRED_COLS = [ 'Delivery_person_Age', 'Road_traffic_density', 'City', 'Festival', 'multiple_deliveries' ]
+
+
+def read_orders(path, **kwargs):
+    '''
+    Esta função lê um arquivo de pedidos seguindo o esquema acima.
+    1- Leitura completa: leitor de CSV do pyarrow (multithread), com os
+       tipos de cada coluna definidos antes do parse
+    2- Leituras em blocos (chunksize) ou parciais (nrows): parser C do
+       pandas, com os mesmos tipos e sentinelas
+    O engine='pyarrow' do pandas 1.5 não serve aqui: ele infere os tipos
+    antes de aplicar o dtype (ex.: o ID '0x4607' vira número).
+
+    '''
+    if kwargs:
+        return pd.read_csv(
+            path,
+            usecols=list( CSV_DTYPES ),
+            dtype=CSV_DTYPES,
+            na_values=NA_VALUES,
+            keep_default_na=False,
+            **kwargs
+        )
+
+    convert_options = pv.ConvertOptions(
+        column_types=ARROW_TYPES,
+        include_columns=list( CSV_DTYPES ),
+        null_values=NA_VALUES,
+        strings_can_be_null=True,
+    )
+    return pv.read_csv( path, convert_options=convert_options ).to_pandas()
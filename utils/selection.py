@@ -0,0 +1,189 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import RerunData, get_script_run_ctx
+
+from utils.filters import filter_rows, refine_view, take_rows
+from utils.loader import load_engine, load_prefix, load_sample
+from utils.sample import PREVIEW_NOTE, in_background, preview_summary
+from utils.views import VIEWS
+
+#=============================================================
+# ----------- SELEÇÃO DAS PÁGINAS ---------------
+#=============================================================
+#
+# As três páginas montam as suas tabelas da seleção da barra lateral
+# ( views.selection_key ) do mesmo jeito:
+#   - pedidos ( df1 ) e outras tabelas por linha (amostra):
+#     filtro pelos bitmaps, em cache no VIEWS ( filtered_frame )
+#   - grade espacial: pedidos por célula da seleção, pelas contagens
+#     acumuladas por dia ( utils/geogrid.py ), em cache no VIEWS ( grid_frame )
+#   - cubo: visão da seleção nas somas acumuladas por dia ( utils/prefix.py )
+#     ou, com CURRY_BACKEND=duckdb/sqlite, no banco SQL ( utils/sql.py )
+#   - modo aproximado: enquanto o cubo exato da seleção não está no cache,
+#     as funções do cubo usam a amostra estratificada ( utils/sample.py ) e
+#     o exato é calculado em segundo plano; a página termina com a prévia,
+#     com os títulos do cubo marcados como estimativa ( estimated ), e o
+#     próprio cálculo pede o rerun quando termina ( rerun_when_exact )
+#
+# Uso nas páginas:
+#   df1 = filtered_frame( df1, selection, bitmaps )
+#   grid = grid_frame( grid, selection )
+#   cube, exact = select_cube( data_path, selection, CUBE_VIEWS, approximate )
+#   preview_note( cube, exact )
+#   ... layout, com estimated( título, exact ) nos resultados do cubo ...
+#   rerun_when_exact( exact )
+
+# Cálculo exato que a sessão está esperando ( st.session_state )
+EXACT_KEY = 'calculo_exato'
+
+ESTIMATE_MARK = '(estimativa)'
+
+
+def filter_frame(df, selection, bitmaps):
+    '''
+    Esta função aplica a seleção da barra lateral.
+    O dataset carregado é compartilhado entre as sessões, então o filtro
+    seleciona as linhas por posição em vez de alterar o DataFrame.
+    `bitmaps` são os da tabela filtrada ( dataset, amostra ).
+
+    '''
+    return take_rows( df, filter_rows( df, *selection, bitmaps=bitmaps ) )
+
+
+def filtered_frame(df, selection, bitmaps, pin=False):
+    '''
+    Esta função retorna a tabela `df` filtrada pela seleção, em cache no
+    VIEWS. Uma seleção mais restrita que outra já guardada só refiltra o
+    resultado dela.
+
+    '''
+    return VIEWS.filtered( df, selection, lambda df: filter_frame( df, selection, bitmaps ), refine=refine_view, pin=pin )
+
+
+def grid_frame(grid, selection, pin=False):
+    '''
+    Esta função retorna os pedidos por célula da seleção na grade
+    espacial `grid` ( GeoGrid ), em cache no VIEWS.
+
+    '''
+    return VIEWS.filtered( grid, selection, lambda grid: grid.select( selection ), pin=pin )
+
+
+def cube_table(path):
+    '''
+    Esta função retorna a origem do cubo do dataset de `path`: o banco
+    SQL, quando há backend SQL, senão o índice de somas acumuladas.
+
+    '''
+    return load_engine( path ) or load_prefix( path )
+
+
+def cube_frame(path, selection, pin=False):
+    '''
+    Esta função retorna a visão da seleção no cubo do dataset de `path`,
+    em cache no VIEWS.
+
+    '''
+    table = cube_table( path )
+
+    return VIEWS.filtered( table, selection, lambda table: table.view( selection ), pin=pin )
+
+
+def select_cube(path, selection, views, approximate=False):
+    '''
+    Esta função retorna o cubo da seleção para as funções das páginas.
+    1- Fora do modo aproximado, ou com o exato já no cache: a visão exata
+    2- No modo aproximado: a amostra filtrada, e as funções `views` são
+       calculadas com o cubo exato em segundo plano
+    Retorna o cubo e o Future do cálculo exato (None sem prévia).
+
+    '''
+    table = cube_table( path )
+    if not approximate or VIEWS.cached( table, selection ):
+        return cube_frame( path, selection ), None
+
+    # Uma tarefa por conjunto de funções e seleção, compartilhada entre sessões
+    key = ( tuple( ( view.__module__, view.__qualname__ ) for view in views ), id( table ), selection )
+    exact = in_background( key, lambda: [ view( cube_frame( path, selection ) ) for view in views ] )
+
+    sample, sample_bitmaps = load_sample( path )
+
+    return filtered_frame( sample, selection, sample_bitmaps ), exact
+
+
+def preview_note(cube, exact):
+    '''
+    Esta função mostra o aviso da prévia aproximada e os intervalos de
+    confiança, quando a página está usando a amostra.
+
+    '''
+    if exact is None:
+        return
+
+    st.info( PREVIEW_NOTE )
+    with st.expander( 'Intervalos de confiança da prévia' ):
+        st.dataframe( preview_summary( cube ) )
+
+
+def estimated(title, exact):
+    '''
+    Esta função marca o título de um gráfico, tabela ou métrica do cubo
+    como estimativa enquanto a página mostra a prévia aproximada.
+
+    '''
+    return title if exact is None else f'{title} {ESTIMATE_MARK}'
+
+
+def rerun_when_exact(exact):
+    '''
+    Esta função faz a página ser refeita quando o cálculo exato da prévia
+    terminar, sem esperar por ele: a página termina com a prévia e os
+    widgets continuam respondendo.
+    1- O cálculo pendente fica no session_state da sessão
+    2- Ao terminar, o próprio cálculo pede o rerun ( _rerun_on_done )
+    3- Na execução seguinte o cálculo terminado sai do session_state, e um
+       erro dele aparece na página
+
+    '''
+    done = st.session_state.pop( EXACT_KEY, None )
+    if done is not None and done is not exact and done.done():
+        # Erros do cálculo em segundo plano aparecem na página
+        done.result()
+
+    if exact is None:
+        return
+
+    st.session_state[EXACT_KEY] = exact
+    st.caption( 'Calculando os valores exatos em segundo plano: a página é atualizada quando terminar.' )
+
+    ctx = get_script_run_ctx()
+    exact.add_done_callback( lambda future: _rerun_on_done( ctx, future ) )
+
+
+def _rerun_on_done(ctx, future):
+    '''
+    Esta função roda na thread do cálculo exato, quando ele termina, e
+    pede o rerun da página que mostrou a prévia.
+    1- Com erro, ou se a sessão já passou para outro cálculo (outra
+       seleção ou página), não faz nada
+    2- Página ainda rodando: o mesmo pedido do st.experimental_rerun
+    3- Página parada: o mesmo pedido que o streamlit faz quando o código
+       muda (última página e widgets da sessão)
+
+    '''
+    if ctx is None or future.exception() is not None or not Runtime.exists():
+        return
+
+    info = Runtime.instance()._session_mgr.get_active_session_info( ctx.session_id )
+    state = info.session._session_state if info is not None else {}
+    if EXACT_KEY not in state or state[EXACT_KEY] is not future:
+        return
+
+    runner = info.session._scriptrunner
+    if runner is not None and runner.request_rerun( RerunData( query_string=ctx.query_string, page_script_hash=ctx.page_script_hash ) ):
+        return
+
+    info.session.request_rerun( info.session._client_state )
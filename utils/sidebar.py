@@ -0,0 +1,169 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import streamlit as st
+
+from utils.loader import DATA_PATH
+
+#=============================================================
+# ----------- FILTROS DA BARRA LATERAL (COMPARTILHADOS) ---------------
+#=============================================================
+#
+# Os filtros (datas, cidades, tráfegos, climas) são os mesmos nas três
+# páginas. A seleção fica no st.session_state da sessão, então trocar de
+# página mantém os filtros escolhidos em vez de voltar ao padrão.
+# Com a mesma seleção, a página nova encontra no VIEWS (utils/views.py) o
+# DataFrame filtrado e o cubo filtrado calculados na página anterior.
+#
+# O streamlit apaga o estado de um widget quando ele não aparece na
+# execução (caso da troca de página), por isso os valores também ficam
+# numa chave comum (FILTERS_KEY), que não pertence a nenhum widget.
+#
+# O dataset escolhido (quando DATA_DIR tem mais de um, utils/datasets.py)
+# também fica na seleção compartilhada. Ele é lido antes de carregar os
+# dados ( selected_dataset ) e o seletor é desenhado depois, na barra
+# lateral ( dataset_selector ), porque o st.set_page_config tem que ser o
+# primeiro comando da página. Trocar de dataset mantém os filtros que
+# ainda valem no dataset novo; os outros voltam ao padrão.
+#
+# Uso nas páginas:
+#   datasets = list_datasets()
+#   path = selected_dataset( datasets )
+#   ...
+#   dataset_selector( datasets )
+#   date_slider, city_options, traffic_options, weather_options = sidebar_filters( df1 )
+#   approximate = approximate_mode()
+
+FILTERS_KEY = 'filtros'
+
+
+def _restore(name, default, valid):
+    '''
+    Esta função prepara o estado do widget `name` antes de criá-lo.
+    1- Valor atual do widget (rerun na mesma página)
+    2- Senão, valor guardado na seleção compartilhada (troca de página)
+    3- Senão, o padrão
+    O valor é regravado no session_state para não ser apagado na troca de
+    página; valores que não valem para o dataset atual voltam ao padrão.
+
+    '''
+    shared = st.session_state.get( FILTERS_KEY, {} )
+    key = f'{FILTERS_KEY}_{name}'
+    value = st.session_state.get( key, shared.get( name, default ) )
+    st.session_state[key] = value if valid( value ) else default
+
+    return key
+
+
+def _save(name, value):
+    st.session_state[FILTERS_KEY] = { **st.session_state.get( FILTERS_KEY, {} ), name: value }
+
+    return value
+
+
+def _multiselect(name, label, options):
+    key = _restore( name, options, lambda value: set( value ) <= set( options ) )
+
+    return _save( name, st.sidebar.multiselect( label, options=options, key=key ) )
+
+
+def selected_dataset(datasets):
+    '''
+    Esta função retorna o caminho do dataset escolhido na sessão, sem
+    desenhar nada. Sem escolha (ou com um dataset que não existe mais),
+    o padrão: DATA_PATH, se estiver na lista, senão o primeiro.
+
+    '''
+    if not datasets:
+        return DATA_PATH
+
+    default = DATA_PATH if DATA_PATH in datasets else datasets[0]
+    key = _restore( 'dataset', default, lambda value: value in datasets )
+
+    return _save( 'dataset', st.session_state[key] )
+
+
+def dataset_selector(datasets):
+    '''
+    Esta função desenha o seletor de dataset na barra lateral, só quando
+    há mais de um para escolher. A troca refaz a página com o dataset novo.
+
+    '''
+    path = selected_dataset( datasets )
+    if len( datasets ) < 2:
+        return path
+
+    return _save( 'dataset', st.sidebar.selectbox( 'Dataset', options=datasets, key=f'{FILTERS_KEY}_dataset' ) )
+
+
+def default_selection(df1):
+    '''
+    Esta função retorna a seleção padrão da barra lateral: todo o período
+    e todas as cidades, tipos de tráfego e climas.
+
+    '''
+    dates = ( df1.Order_Date.min().date(), df1.Order_Date.max().date() )
+
+    return ( dates, list( df1.City.unique() ), list( df1.Road_traffic_density.unique() ), list( df1.Weatherconditions.unique() ) )
+
+
+def sidebar_filters(df1):
+    '''
+    Esta função desenha os filtros da barra lateral e retorna a seleção.
+    1-Intervalo de datas
+    2-Cidades
+    3-Tipos de trafego
+    4-Tipos de clima
+    A seleção é a mesma em todas as páginas da sessão.
+
+    '''
+    # ---Slider---
+
+    # Slider de datas (date); Order_Date é datetime64
+    ( min_date, max_date ), cities, traffic, weather = default_selection( df1 )
+
+    key = _restore( 'datas', ( min_date, max_date ),
+                    lambda value: min_date <= value[0] <= value[-1] <= max_date )
+    date_slider = _save( 'datas', st.sidebar.slider(
+        'Selecione um intervalo de data:',
+        min_value=min_date,
+        max_value=max_date,
+        format='DD-MM-YYYY',
+        key=key
+    ) )
+
+    st.sidebar.markdown( """---""" )
+
+    # --- multi seleção ---
+
+    # Cidades
+    city_options = _multiselect( 'cidades', 'Quais as condições de transito?', cities )
+
+    # Tipos de Trafego
+    st.sidebar.markdown( """---""" )
+
+    traffic_options = _multiselect( 'trafegos', 'Quais as condições de transito?', traffic )
+
+    # Tipos de Clima
+    st.sidebar.markdown( """---""" )
+
+    weather_options = _multiselect( 'climas', 'Quais as condições climáticas?', weather )
+
+    st.sidebar.markdown( """---""" )
+
+    return date_slider, city_options, traffic_options, weather_options
+
+
+def approximate_mode():
+    '''
+    Esta função desenha a opção do modo aproximado ( utils/sample.py ),
+    desligado por padrão e mantido entre as páginas como os filtros.
+
+    '''
+    key = _restore( 'aproximado', False, lambda value: isinstance( value, bool ) )
+
+    return _save( 'aproximado', st.sidebar.checkbox(
+        'Prévia aproximada (amostra)',
+        help='Mostra primeiro uma estimativa com intervalos de confiança e troca pelos valores exatos quando ficarem prontos.',
+        key=key
+    ) )
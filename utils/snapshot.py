@@ -0,0 +1,129 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import hashlib
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils.cleaning import CLEANING_VERSION
+
+#=============================================================
+# ----------- SNAPSHOT COLUNAR DO DATASET LIMPO ---------------
+#=============================================================
+#
+# O dataset limpo é salvo em Feather (Arrow IPC, sem compressão) ao lado
+# do CSV de origem, ex.: dados/train.csv -> dados/train.feather.
+# O arquivo carrega nos metadados o hash do CSV e a versão da limpeza,
+# então é descartado e refeito sozinho quando qualquer um dos dois muda.
+
+SNAPSHOT_EXT = '.feather'
+
+_STAMP_KEYS = ( 'schema_version', 'source_sha256', 'source_size', 'source_mtime_ns' )
+
+
+def snapshot_path(path):
+    return os.path.splitext( path )[0] + SNAPSHOT_EXT
+
+
+def file_hash(path, chunk_size=1 << 20):
+    '''
+    Esta função calcula o sha256 do arquivo lendo em blocos,
+    sem carregar o arquivo inteiro na memória.
+
+    '''
+    digest = hashlib.sha256()
+    with open( path, 'rb' ) as f:
+        for chunk in iter( lambda: f.read( chunk_size ), b'' ):
+            digest.update( chunk )
+    return digest.hexdigest()
+
+
+def read_stamp(snap):
+    '''
+    Esta função lê apenas os metadados do snapshot (sem ler os dados).
+    Retorna None se o snapshot não existe ou está corrompido.
+
+    '''
+    try:
+        with pa.memory_map( snap ) as source:
+            metadata = pa.ipc.open_file( source ).schema.metadata or {}
+    except ( OSError, pa.ArrowInvalid ):
+        return None
+
+    return { key: metadata.get( f'curry.{key}'.encode(), b'' ).decode() for key in _STAMP_KEYS }
+
+
+def is_fresh(stamp, path):
+    '''
+    Esta função verifica se o snapshot ainda corresponde ao CSV.
+    1- A versão da limpeza precisa ser a atual
+    2- Se tamanho e mtime batem, o snapshot é válido sem reler o CSV
+    3- Caso contrário compara o hash do conteúdo
+
+    '''
+    if stamp is None or stamp['schema_version'] != str( CLEANING_VERSION ):
+        return False
+
+    stat = os.stat( path )
+    if stamp['source_size'] == str( stat.st_size ) and stamp['source_mtime_ns'] == str( stat.st_mtime_ns ):
+        return True
+
+    return stamp['source_sha256'] == file_hash( path )
+
+
+def write_snapshot(df, path):
+    '''
+    Esta função grava o dataset limpo como snapshot do CSV em `path`.
+    A escrita é feita num arquivo temporário e depois renomeada, para que
+    uma leitura concorrente nunca veja um snapshot pela metade.
+
+    '''
+    snap = snapshot_path( path )
+    stat = os.stat( path )
+    stamp = {
+        'schema_version': str( CLEANING_VERSION ),
+        'source_sha256': file_hash( path ),
+        'source_size': str( stat.st_size ),
+        'source_mtime_ns': str( stat.st_mtime_ns ),
+    }
+
+    table = pa.Table.from_pandas( df, preserve_index=False )
+    metadata = dict( table.schema.metadata or {} )
+    metadata.update( { f'curry.{key}'.encode(): value.encode() for key, value in stamp.items() } )
+    table = table.replace_schema_metadata( metadata )
+
+    tmp = f'{snap}.{os.getpid()}.tmp'
+    try:
+        feather.write_feather( table, tmp, compression='uncompressed' )
+        os.replace( tmp, snap )
+    finally:
+        if os.path.exists( tmp ):
+            os.remove( tmp )
+
+
+def read_snapshot(path):
+    # Sem compressão o Arrow lê direto do arquivo mapeado em memória
+    return feather.read_table( snapshot_path( path ), memory_map=True ).to_pandas()
+
+
+def load_snapshot(path, build):
+    '''
+    Esta função retorna o dataset limpo do CSV em `path`.
+    1- Usa o snapshot se ele ainda for válido
+    2- Senão chama build(path), grava um novo snapshot e retorna o resultado
+    Se não for possível gravar (ex.: disco somente leitura) o dataset
+    limpo é retornado mesmo assim.
+
+    '''
+    if is_fresh( read_stamp( snapshot_path( path ) ), path ):
+        return read_snapshot( path )
+
+    df = build( path )
+    try:
+        write_snapshot( df, path )
+    except ( OSError, pa.ArrowException ):
+        pass
+
+    return df
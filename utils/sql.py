@@ -0,0 +1,224 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from utils.bitmaps import FILTER_DIMENSIONS
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+#=============================================================
+# ----------- BACKEND SQL DAS AGREGAÇÕES ---------------
+#=============================================================
+#
+# Alternativa ao rollup em pandas: as células do cubo ( utils/cube.py )
+# são carregadas num banco analítico embutido (DuckDB, ou SQLite quando
+# o duckdb não está instalado) e o filtro da barra lateral e a agregação
+# de cada gráfico viram uma única consulta. Só o resultado (poucas
+# linhas) volta para o pandas / Plotly.
+#
+# O banco guarda as células e não os pedidos: com 1.6 milhão de pedidos o
+# SQLite leva segundos para varrer a tabela a cada seleção, enquanto o
+# cubo tem algumas dezenas de milhares de linhas.
+#
+# O backend é escolhido pela variável de ambiente CURRY_BACKEND:
+#   pandas (padrão) | duckdb | sqlite
+#   ex.: CURRY_BACKEND=duckdb streamlit run Home.py
+# O duckdb é opcional: pip install -r requirements-duckdb.txt
+#
+# A consulta soma as estatísticas das células ( count, __n, __sum,
+# __sumsq; mínimo / máximo de __min, __max ) e o cube.rollup calcula
+# médias e desvios com as mesmas fórmulas; a paridade com o pandas é
+# conferida por benchmarks/parity_sql.py.
+
+BACKEND_VAR = 'CURRY_BACKEND'
+
+BACKENDS = ( 'pandas', 'duckdb', 'sqlite' )
+
+TABLE = 'pedidos'
+
+DATE_SQL_FORMAT = '%Y-%m-%d'
+
+
+def backend_name(backend=None):
+    '''
+    Esta função retorna o backend das agregações.
+    1- `backend`, se informado; senão a variável CURRY_BACKEND; senão pandas
+    2- duckdb sem o pacote instalado cai para o sqlite
+
+    '''
+    backend = ( backend or os.environ.get( BACKEND_VAR ) or 'pandas' ).lower()
+    if backend not in BACKENDS:
+        raise ValueError( f'Backend {backend} inválido, use um de {BACKENDS}' )
+
+    if backend == 'duckdb' and duckdb is None:
+        return 'sqlite'
+
+    return backend
+
+
+def _quote(col):
+    return '"' + col.replace( '"', '""' ) + '"'
+
+
+def _aggregate(column):
+    '''
+    Esta função traduz uma coluna do cubo para a agregação SQL das
+    células ( como o _combine do cube.py ). Somas vazias valem 0.
+
+    '''
+    how = 'MIN' if column.endswith( '__min' ) else 'MAX' if column.endswith( '__max' ) else 'SUM'
+    sql = f'{how}( {_quote( column )} )'
+    if how == 'SUM':
+        sql = f'COALESCE( {sql}, 0 )'
+
+    return f'{sql} AS {_quote( column )}'
+
+
+class SqlEngine:
+    '''
+    Banco embutido com as células do cubo de um dataset ( build_cube ).
+    Uma conexão por processo, compartilhada entre as sessões (as consultas
+    passam por uma trava).
+
+    '''
+
+    def __init__(self, cube, backend='sqlite'):
+        self.backend = backend_name( backend )
+        if self.backend == 'pandas':
+            raise ValueError( 'O backend pandas não usa banco SQL' )
+
+        self.dtypes = cube.dtypes
+        self._lock = threading.Lock()
+
+        # Categorias viram texto e a data vira 'AAAA-MM-DD' (ordena como texto)
+        table = pd.DataFrame( {
+            col: cube[col].dt.strftime( DATE_SQL_FORMAT ) if col == 'Order_Date'
+                 else cube[col].astype( object ) if isinstance( cube[col].dtype, pd.CategoricalDtype )
+                 else cube[col]
+            for col in cube.columns
+        } )
+
+        # Tamanho aproximado do banco, para o limite de memória dos datasets
+        self.nbytes = int( table.memory_usage( index=False ).sum() )
+
+        if self.backend == 'duckdb':
+            self._con = duckdb.connect( ':memory:' )
+            self._con.register( 'pedidos_df', table )
+            self._con.execute( f'CREATE TABLE {TABLE} AS SELECT * FROM pedidos_df' )
+            self._con.unregister( 'pedidos_df' )
+        else:
+            self._con = sqlite3.connect( ':memory:', check_same_thread=False )
+            table.to_sql( TABLE, self._con, index=False )
+            self._con.execute( f'CREATE INDEX {TABLE}_data ON {TABLE} ( "Order_Date" )' )
+
+    def view(self, selection):
+        '''
+        Esta função retorna a visão da seleção normalizada da barra lateral
+        ( views.selection_key ), usada no lugar do cubo filtrado.
+
+        '''
+        return SqlView( self, selection )
+
+    def query(self, sql, params=()):
+        with self._lock:
+            cursor = self._con.execute( sql, list( params ) )
+            names = [ description[0] for description in cursor.description ]
+            rows = cursor.fetchall()
+
+        return pd.DataFrame.from_records( rows, columns=names )
+
+    def where(self, selection):
+        '''
+        Esta função monta o WHERE da seleção ( o mesmo predicado do filter_rows ):
+        1- Datas entre o início e o fim, inclusive
+        2- Cada dimensão de filtro entre os valores escolhidos
+        Lista vazia não seleciona nenhum pedido.
+
+        '''
+        ( start, end ), *options = selection
+        clauses = [ '"Order_Date" BETWEEN ? AND ?' ]
+        params = [ start.strftime( DATE_SQL_FORMAT ), end.strftime( DATE_SQL_FORMAT ) ]
+
+        for col, values in zip( FILTER_DIMENSIONS, options ):
+            if not values:
+                clauses.append( '1 = 0' )
+                continue
+            clauses.append( f'{_quote( col )} IN ( {", ".join( "?" * len( values ) )} )' )
+            params += list( values )
+
+        return ' AND '.join( clauses ), params
+
+    def cells(self, selection, by, columns):
+        '''
+        Esta função agrega as células da seleção por `by` e retorna as
+        colunas do cubo pedidas ( mesmo formato do _combine do cube.py ):
+        1- Filtro e agregação numa consulta só
+        2- As colunas de `by` voltam aos tipos do dataset (categorias só
+           com os valores presentes, data em datetime64)
+        3- Índice ordenado por `by`; com by=[] uma linha só (linha 0)
+
+        '''
+        where, params = self.where( selection )
+        select = [ _quote( col ) for col in by ] + [ _aggregate( col ) for col in columns ]
+        sql = f'SELECT {", ".join( select )} FROM {TABLE} WHERE {where}'
+        if by:
+            sql += f' GROUP BY {", ".join( _quote( col ) for col in by )}'
+
+        cells = self.query( sql, params )
+
+        # Contagens inteiras e somas em float64, como no cubo (vale também
+        # para o resultado vazio, que volta do banco sem tipo)
+        for col in columns:
+            if col == 'count' or col.endswith( '__n' ):
+                cells[col] = cells[col].astype( 'int64' )
+            elif col.endswith( ( '__sum', '__sumsq' ) ):
+                cells[col] = cells[col].astype( 'float64' )
+            else:
+                cells[col] = pd.to_numeric( cells[col] )
+
+        if not by:
+            # Sem células, a linha 0 fica vazia como no rollup do cubo
+            return cells[ cells['count'] > 0 ].reset_index( drop=True ).reindex( [ 0 ] )
+
+        for col in by:
+            cells[col] = self._restore_dtype( col, cells[col] )
+
+        return cells.set_index( by ).sort_index()
+
+    def _restore_dtype(self, col, values):
+        dtype = self.dtypes[col]
+        if col == 'Order_Date':
+            return pd.to_datetime( values, format=DATE_SQL_FORMAT )
+        if isinstance( dtype, pd.CategoricalDtype ):
+            return pd.Categorical( values, categories=dtype.categories[ dtype.categories.isin( values ) ] )
+
+        return values.astype( dtype )
+
+
+class SqlView:
+    '''
+    Seleção da barra lateral sobre o SqlEngine. Substitui o cubo filtrado
+    nas funções das páginas: o cube.rollup envia a agregação para o banco.
+
+    '''
+
+    # Os dados ficam no banco; a visão guarda só a seleção
+    nbytes = 0
+
+    def __init__(self, engine, selection):
+        # Referência forte: a página em andamento continua usando o banco
+        # mesmo que o DATASETS o descarte; as entradas do VIEWS saem junto
+        # com o dataset ( ViewCache.discard_datasets )
+        self.engine = engine
+        self.selection = selection
+
+    def cells(self, by, columns):
+        return self.engine.cells( self.selection, by, columns )
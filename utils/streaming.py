@@ -0,0 +1,153 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cleaning import CATEGORY_COLS, CLEANING_VERSION, clean_code, sort_by_date
+from utils.schema import read_orders
+
+#=============================================================
+# ----------- INGESTÃO EM BLOCOS (STREAMING) ---------------
+#=============================================================
+#
+# Para arquivos de pedidos maiores que a memória: o CSV é lido em blocos,
+# cada bloco é limpo com o clean_code e gravado como um row group de um
+# arquivo Parquet. Só um bloco fica na memória por vez, então o pico de
+# memória depende do tamanho do bloco e não do tamanho do arquivo.
+#
+# Como o snapshot, o Parquet leva nos metadados a versão da limpeza
+# ( CLEANING_VERSION ). Gravado com outra versão, o read_store refaz o
+# arquivo a partir do CSV ao lado dele ou, sem o CSV, avisa com um erro
+# em vez de entregar o esquema antigo.
+#
+# Uso:
+#   python -m utils.streaming dados/train.csv [chunksize]
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+STORE_EXT = '.parquet'
+
+_VERSION_KEY = b'curry.schema_version'
+
+
+def store_path(path):
+    return os.path.splitext( path )[0] + STORE_EXT
+
+
+def _stamped(schema):
+    # Versão da limpeza nos metadados do esquema do Parquet
+    return schema.with_metadata( { **( schema.metadata or {} ), _VERSION_KEY: str( CLEANING_VERSION ).encode() } )
+
+
+def store_version(path):
+    '''
+    Esta função lê a versão da limpeza gravada no Parquet (só o rodapé,
+    sem ler os dados). Retorna None se o arquivo não tem a versão.
+
+    '''
+    metadata = pq.read_schema( path ).metadata or {}
+    version = metadata.get( _VERSION_KEY )
+
+    return None if version is None else version.decode()
+
+
+def _empty_table(df):
+    '''
+    Esta função converte o resultado vazio do clean_code numa tabela com
+    o mesmo esquema de um Parquet com linhas: sem valores, o pyarrow não
+    tem como inferir o tipo das colunas de texto e das categorias (sairia
+    `null`), então elas recebem string e dicionário explicitamente.
+
+    '''
+    schema = pa.Schema.from_pandas( df, preserve_index=False )
+    for i, field in enumerate( schema ):
+        if field.name in CATEGORY_COLS:
+            schema = schema.set( i, field.with_type( pa.dictionary( pa.int32(), pa.string() ) ) )
+        elif df[field.name].dtype == object:
+            schema = schema.set( i, field.with_type( pa.string() ) )
+
+    return pa.Table.from_pandas( df, schema=schema, preserve_index=False )
+
+
+def stream_clean(path, output=None, chunksize=DEFAULT_CHUNK_SIZE):
+    '''
+    Esta função limpa o CSV em `path` bloco a bloco e grava o resultado
+    em Parquet (por padrão ao lado do CSV, ex.: dados/train.parquet).
+    1- Lê `chunksize` linhas por vez
+    2- Aplica as mesmas regras do clean_code em cada bloco
+    3- Grava cada bloco limpo como um row group
+    Retorna o caminho do arquivo gravado.
+
+    '''
+    output = output or store_path( path )
+    tmp = f'{output}.{os.getpid()}.tmp'
+
+    writer = None
+    try:
+        for chunk in read_orders( path, chunksize=chunksize ):
+            df = clean_code( chunk )
+            if df.empty:
+                continue
+
+            table = pa.Table.from_pandas( df, preserve_index=False )
+
+            if writer is None:
+                writer = pq.ParquetWriter( tmp, _stamped( table.schema ) )
+            writer.write_table( table )
+
+        # Arquivo sem nenhuma linha válida: grava um Parquet vazio com o esquema do clean_code
+        if writer is None:
+            empty = _empty_table( clean_code( read_orders( path, nrows=0 ) ) )
+            writer = pq.ParquetWriter( tmp, _stamped( empty.schema ) )
+
+        writer.close()
+        writer = None
+        os.replace( tmp, output )
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists( tmp ):
+            os.remove( tmp )
+
+    return output
+
+
+def categories_sorted(df):
+    '''
+    Esta função reordena as categorias de um DataFrame lido do Parquet.
+    Cada row group tem seu próprio dicionário, então as categorias vêm
+    na ordem em que apareceram e não em ordem alfabética como no clean_code.
+
+    '''
+    for col in CATEGORY_COLS:
+        df[col] = df[col].cat.reorder_categories( sorted( df[col].cat.categories ) )
+
+    return df
+
+
+def read_store(path):
+    '''
+    Esta função lê o dataset limpo gravado pelo stream_clean.
+    Cada bloco vem ordenado por data, então o conjunto é reordenado.
+    Um arquivo de outra versão da limpeza é refeito a partir do CSV de
+    mesmo nome; sem o CSV, levanta ValueError.
+
+    '''
+    if store_version( path ) != str( CLEANING_VERSION ):
+        source = os.path.splitext( path )[0] + '.csv'
+        if not os.path.exists( source ):
+            raise ValueError( f'{path} foi gravado com outra versão da limpeza; '
+                              f'refaça com python -m utils.streaming <csv de origem>' )
+        stream_clean( source, output=path )
+
+    return sort_by_date( categories_sorted( pq.read_table( path ).to_pandas() ) )
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    chunksize = int( args[1] ) if len( args ) > 1 else DEFAULT_CHUNK_SIZE
+    print( stream_clean( args[0], chunksize=chunksize ) )
@@ -0,0 +1,285 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import functools
+import inspect
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.datasets import DATASETS
+from utils.loader import freeze
+from utils.memory import sizeof
+
+#=============================================================
+# ----------- CACHE DE SELEÇÕES (LRU) ---------------
+#=============================================================
+#
+# Guarda, por seleção da barra lateral, o DataFrame filtrado e os
+# resultados das funções das páginas calculados sobre ele (gráficos,
+# tabelas, métricas). Voltar para uma combinação de filtros já usada
+# não refiltra nem reagrupa nada.
+#
+# - A chave é a seleção normalizada ( datas, cidades, tráfegos, climas ),
+#   então a ordem dos itens escolhidos no multiselect não importa
+# - O cache é do processo (como o st.cache_resource): vale para todas as
+#   sessões e páginas que usam o mesmo dataset
+# - O limite é por número de seleções e por bytes; a seleção usada há
+#   mais tempo sai primeiro, junto com todos os seus resultados (menos as
+#   fixadas, como a seleção padrão pré-calculada na inicialização)
+# - Quando o DATASETS descarta um dataset, todas as seleções calculadas
+#   sobre os objetos dele saem também, fixadas ou não
+# - Uma seleção nova que só restringe outra já guardada (ex.: tirar uma
+#   cidade, apertar o intervalo de datas) é calculada refiltrando o
+#   resultado guardado, menor que o dataset. Como a seleção anterior da
+#   sessão é a usada mais recentemente, ela está sempre no cache
+#
+# Uso nas páginas:
+#   @cached_view
+#   def grafico(df1): ...
+#
+#   df1 = VIEWS.filtered( df1, selection_key( datas, cidades, ... ), filters, refine=refine_view )
+
+DEFAULT_MAX_ENTRIES = 64
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+def selection_key(date_range, *options):
+    '''
+    Esta função normaliza a seleção da barra lateral.
+    Datas viram Timestamp e cada lista de opções vira uma tupla ordenada.
+
+    '''
+    dates = ( pd.Timestamp( date_range[0] ), pd.Timestamp( date_range[-1] ) )
+
+    return ( dates, ) + tuple( tuple( sorted( values ) ) for values in options )
+
+
+def is_narrowing(selection, parent):
+    '''
+    Esta função verifica se `selection` está contida em `parent`:
+    intervalo de datas dentro do anterior e cada lista de opções
+    contida na anterior.
+
+    '''
+    ( start, end ), ( parent_start, parent_end ) = selection[0], parent[0]
+    if start < parent_start or end > parent_end:
+        return False
+
+    return all( set( values ) <= set( parent_values ) for values, parent_values in zip( selection[1:], parent[1:] ) )
+
+
+class ViewCache:
+    '''
+    Cache LRU das seleções de um ou mais datasets.
+    Cada entrada guarda o DataFrame filtrado e os resultados das funções
+    chamadas sobre ele. Contadores de acertos e falhas em stats().
+
+    '''
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._by_frame = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refinements = 0
+
+    def filtered(self, df, selection, compute, refine=None, pin=False):
+        '''
+        Esta função retorna o DataFrame filtrado da seleção.
+        1- `df` é o dataset compartilhado e `selection` a chave normalizada
+        2- Na falha, `compute( df )` calcula o filtro e o resultado é guardado
+        3- Com `refine`, se houver no cache uma seleção do mesmo dataset que
+           contém a nova, o filtro sai de `refine( resultado_guardado, selection )`
+           (a menor delas); só quando a seleção é ampliada tudo é refeito
+        O objeto retornado é sempre o mesmo enquanto a seleção estiver no
+        cache, o que permite guardar os resultados calculados sobre ele.
+        Como o dataset, ele é compartilhado entre sessões e somente leitura.
+        `df` também pode ser o SqlEngine ( utils/sql.py ); aí `compute`
+        retorna a visão SQL da seleção.
+        Com `pin` a seleção não sai do cache pelo LRU enquanto o dataset
+        existir (usado na seleção padrão pré-calculada, utils/warmup.py).
+
+        '''
+        key = ( id( df ), selection )
+        with self._lock:
+            entry = self._entries.get( key )
+            # id( df ) só vale enquanto o dataset da entrada existir
+            if entry is not None and entry['dataset']() is df:
+                self._entries.move_to_end( key )
+                entry['pinned'] |= pin
+                self.hits += 1
+                return entry['frame']
+            self.misses += 1
+            parent = self._narrowest_parent( df, selection ) if refine is not None else None
+            if parent is not None:
+                self.refinements += 1
+
+        if parent is not None:
+            frame = freeze( refine( parent, selection ) )
+        else:
+            frame = compute( df )
+            # A visão do backend SQL não tem dados para congelar
+            frame = freeze( frame ) if isinstance( frame, pd.DataFrame ) else frame
+        entry = { 'dataset': weakref.ref( df ), 'frame': frame, 'results': {}, 'nbytes': sizeof( frame ), 'pinned': pin }
+
+        with self._lock:
+            # Outra sessão guardou a mesma seleção enquanto o filtro era
+            # calculado: fica a dela, com os resultados já calculados sobre ela
+            current = self._entries.get( key )
+            if current is not None and current['dataset']() is df:
+                self._entries.move_to_end( key )
+                current['pinned'] |= pin
+                return current['frame']
+
+            self._discard( key )
+            self._entries[key] = entry
+            self._by_frame[ id( frame ) ] = key
+            self._bytes += entry['nbytes']
+            self._evict()
+
+        return frame
+
+    def cached(self, df, selection):
+        '''
+        Esta função verifica, sem calcular nada, se a seleção de `df` já
+        está no cache.
+
+        '''
+        with self._lock:
+            entry = self._entries.get( ( id( df ), selection ) )
+            return entry is not None and entry['dataset']() is df
+
+    def result(self, frame, name, compute):
+        '''
+        Esta função retorna um resultado calculado sobre um DataFrame
+        filtrado pelo filtered(). Para DataFrames fora do cache o
+        resultado é só calculado, sem guardar nada.
+
+        '''
+        with self._lock:
+            entry = self._entries.get( self._by_frame.get( id( frame ) ) )
+            if entry is None or entry['frame'] is not frame:
+                entry = None
+            elif name in entry['results']:
+                self.hits += 1
+                return entry['results'][name]
+            else:
+                self.misses += 1
+
+        value = compute( frame )
+        if entry is None:
+            return value
+
+        nbytes = sizeof( value )
+        with self._lock:
+            # A entrada pode ter saído do cache enquanto o valor era calculado
+            if self._entries.get( self._by_frame.get( id( frame ) ) ) is entry and name not in entry['results']:
+                entry['results'][name] = value
+                entry['nbytes'] += nbytes
+                self._bytes += nbytes
+                self._evict()
+
+        return value
+
+    def _narrowest_parent(self, df, selection):
+        '''
+        Esta função procura, entre as seleções guardadas do mesmo dataset,
+        a menor que contém `selection`. Retorna o DataFrame filtrado dela.
+
+        '''
+        parents = [ entry['frame'] for ( dataset, parent ), entry in self._entries.items()
+                    if dataset == id( df ) and entry['dataset']() is df and is_narrowing( selection, parent ) ]
+
+        return min( parents, key=len, default=None )
+
+    def _discard(self, key):
+        entry = self._entries.pop( key, None )
+        if entry is not None:
+            self._by_frame.pop( id( entry['frame'] ), None )
+            self._bytes -= entry['nbytes']
+
+    def discard_datasets(self, objects):
+        '''
+        Esta função descarta as seleções calculadas sobre `objects`
+        (dataset, índice, banco, amostra...), fixadas ou não. É chamada
+        pelo DATASETS quando um dataset sai da memória. Quem ainda usa uma
+        visão descartada (uma página sendo montada) continua com ela.
+
+        '''
+        ids = { id( obj ) for obj in objects }
+        with self._lock:
+            for key in [ key for key, entry in self._entries.items()
+                         if key[0] in ids and id( entry['dataset']() ) in ids ]:
+                self._discard( key )
+                self.evictions += 1
+
+    def _evict(self):
+        # Entradas de datasets que já saíram da memória não servem mais
+        for key in [ key for key, entry in self._entries.items() if entry['dataset']() is None ]:
+            self._discard( key )
+            self.evictions += 1
+
+        while len( self._entries ) > self.max_entries or self._bytes > self.max_bytes:
+            # A usada há mais tempo, pulando as fixadas de datasets ainda carregados
+            key = next( ( key for key, entry in self._entries.items()
+                          if not ( entry['pinned'] and entry['dataset']() is not None ) ), None )
+            if key is None:
+                break
+            self._discard( key )
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_frame.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refinements': self.refinements,
+                'entries': len( self._entries ),
+                'bytes': self._bytes,
+            }
+
+
+# Cache único do processo, compartilhado por todas as sessões
+VIEWS = ViewCache()
+
+DATASETS.on_evict( VIEWS.discard_datasets )
+
+
+def cached_view(func):
+    '''
+    Decorador para as funções das páginas que recebem o DataFrame
+    filtrado: o resultado fica guardado junto com a seleção no VIEWS.
+    A chave usa o módulo e o nome da função ( utils/visao_*.py ), os
+    mesmos na página e no utils/warmup.py. Argumentos além do DataFrame
+    (ex.: a granularidade de um gráfico) entram na chave já com os valores
+    padrão: f( cube ) e f( cube, 'week' ) guardam o mesmo resultado.
+
+    '''
+    name = ( func.__module__, func.__qualname__ )
+    signature = inspect.signature( func )
+
+    @functools.wraps( func )
+    def wrapper(df1, *args, **kwargs):
+        bound = signature.bind( df1, *args, **kwargs )
+        bound.apply_defaults()
+        args = tuple( bound.arguments.values() )[1:]
+
+        return VIEWS.result( df1, name + args, lambda df: func( df, *args ) )
+
+    return wrapper
@@ -0,0 +1,190 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import plotly.express as px
+
+from utils.buckets import GRANULARITIES, bucket_column, orders_per_deliverer, rolling_orders_per_deliverer, time_buckets
+from utils.cube import rollup
+from utils.geogrid import heat_cells
+from utils.maps import heat_map, map_key, points_map
+from utils.sample import add_error_bars, is_sample
+from utils.views import cached_view
+
+#=============================================================
+# ----------- FUNÇõES ---------------
+#=============================================================
+#
+# Funções de pages/1_visao_empresa.py, fora da página para que o
+# pré-cálculo ( utils/warmup.py ) e os benchmarks importem as mesmas
+# funções sem executar o layout do streamlit.
+
+
+#-------------------- VISÂO EMPRESA -------------------------
+
+# As contagens vêm do cubo pré-agregado ( utils/cube.py ); só os gráficos
+# com entregadores distintos e medianas usam os pedidos ( df1 )
+
+
+# Granularidade inicial do gráfico de volume da Visão Tática
+DEFAULT_GRANULARITY = 'week'
+
+
+@cached_view
+def orders_by_period(cube):
+    '''
+    Esta função calcula a quantidade de pedidos (e as médias das métricas)
+    por dia, por semana e por mês numa passada só ( utils/buckets.py ).
+    '''
+    return time_buckets( cube )
+
+
+
+@cached_view
+def orders_by_period_graph(cube, granularity=DEFAULT_GRANULARITY):
+    '''
+    Esta função devolve o grafico de barras da quantidade de pedidos por
+    período (dia, semana ou mês), a partir das tabelas do orders_by_period.
+    '''
+    orders = orders_by_period( cube )[granularity].reset_index()
+
+    fig = px.bar( orders, x='Period', y='Orders', hover_data={ 'Time_taken(min)': ':.1f' },
+                  labels={ 'Period': GRANULARITIES[granularity] } )
+
+    # Intervalos de confiança no modo aproximado, pelo período de cada pedido da amostra
+    if is_sample( cube ):
+        fig = add_error_bars( fig, cube.assign( Period=bucket_column( cube['Order_Date'], granularity ) ), 'Period' )
+
+    return fig
+
+
+
+@cached_view
+def graph_orders_by_traffic_type(cube):
+    '''
+    Esta função calcula a distribuição dos pedidos por tipo de tráfego.
+    Faz agrupamento pelo tipo de tráfego, renomeia colunas.
+    Cria gráfico de pizza da distribuição dos pedidos com o agrupamento.
+    '''
+    dist_by_traffic_density = ( rollup( cube, 'Road_traffic_density' )
+                                           .reset_index()
+                                           .rename( columns={'count': 'Orders'} )
+                              )
+    
+    return px.pie( dist_by_traffic_density, names='Road_traffic_density', values='Orders' )
+
+
+@cached_view
+def graph_orders_by_city_and_traffic(cube):
+    '''
+    Esta função faz o agrupamento dos pedidos por cidade e por tipo de tráfego.
+    Cria um gráfico de distribuição dos pedidos com o agrupamento.
+    '''
+    
+    dist_by_city_traffic_density = ( rollup( cube, ['City', 'Road_traffic_density'] )
+                                                .reset_index()
+                                                .rename(columns={'count': 'Count'})
+                                   )
+    
+    return px.scatter( dist_by_city_traffic_density, x='City', y='Road_traffic_density', size='Count', color='City')
+
+
+
+@cached_view
+def graph_weekly_orders_by_deliverer(df1):
+    '''
+    Esta função calcula a quantidade de pedidos por entregador por semana.
+    Pedidos e entregadores distintos saem da mesma passada ( utils/buckets.py ).
+    Devolve um gráfico de linha.
+    '''
+    weekly_orders_by_deliverer = ( orders_per_deliverer( df1['Week_of_year'], df1['Delivery_person_ID'] )
+                                       .reset_index()
+                                       .rename( columns={'Orders_by_deliverer': 'Weekly_orders_by_deliverer'} )
+                                 )
+    
+    return px.line(weekly_orders_by_deliverer, x='Week_of_year', y='Weekly_orders_by_deliverer')
+
+
+@cached_view
+def graph_rolling_orders_by_deliverer(df1):
+    '''
+    Esta função calcula, para cada dia, os pedidos por entregador ativo nas
+    janelas móveis dos últimos 7 e 28 dias.
+    Devolve um gráfico de linha com uma linha por janela.
+    '''
+    rolling = rolling_orders_per_deliverer( df1['Order_Date'], df1['Delivery_person_ID'] )
+    
+    return px.line( rolling, labels={ 'value': 'Orders_by_deliverer', 'variable': 'Janela' } )
+
+
+@cached_view
+def central_traffic_locations(df1):
+    '''
+    Esta função calcula as localizações centrais (medianas) das entregas
+    de cada cidade por tipo de tráfego.
+    '''
+    cols = ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']
+    dfaux = ( df1[cols].groupby(['City', 'Road_traffic_density'], observed=True)
+                       .median()
+                       .reset_index() 
+            )
+    
+    return dfaux
+
+
+def map_central_traffic_location(dfaux):
+    '''
+    Esta função desenha um mapa.
+    Neste mapa são apontadas as localização centrais de cada cidade por tipo de tráfego
+    ( central_traffic_locations ).
+    '''
+    # Marcando os pontos no mapa: uma camada só, montada a partir das colunas
+    return points_map( dfaux, 'Delivery_location_latitude', 'Delivery_location_longitude',
+                       popup=['City', 'Road_traffic_density'] )
+
+
+@cached_view
+def delivery_density_cells(grid):
+    '''
+    Esta função agrega as células da grade filtrada ( utils/geogrid.py ) no
+    nível mais fino que cabe no mapa de calor, e a chave do HTML do mapa
+    no maps.MAPS: nenhuma das duas é refeita nos reruns da mesma seleção.
+    '''
+    heat, _ = heat_cells( grid )
+
+    return heat, map_key( 'delivery_density', heat )
+
+
+def map_delivery_density(heat):
+    '''
+    Esta função desenha o mapa de calor dos locais de entrega, a partir
+    das células do delivery_density_cells; os pedidos não vão para o navegador.
+    '''
+    return heat_map( heat )
+
+
+# Funções calculadas sobre o cubo ( o modo aproximado calcula as exatas em segundo plano )
+CUBE_VIEWS = [
+    orders_by_period,
+    graph_orders_by_traffic_type,
+    graph_orders_by_city_and_traffic,
+]
+
+# Argumentos com que a página chama as funções além da tabela, para o
+# pré-cálculo ( utils/warmup.py ) guardar os mesmos resultados: pedidos por
+# dia na Visão Gerencial e a granularidade inicial na Visão Tática
+PAGE_ARGUMENTS = {
+    orders_by_period_graph: [ ( 'day', ), ( DEFAULT_GRANULARITY, ) ],
+}
+
+# Tabela de cada função da página ( df1, cube ou grid ): o pré-cálculo
+# ( utils/warmup.py ) chama cada função com a mesma tabela da página
+VIEW_TABLES = {
+    orders_by_period: 'cube',
+    orders_by_period_graph: 'cube',
+    graph_orders_by_traffic_type: 'cube',
+    graph_orders_by_city_and_traffic: 'cube',
+    graph_weekly_orders_by_deliverer: 'df1',
+    graph_rolling_orders_by_deliverer: 'df1',
+    central_traffic_locations: 'df1',
+    delivery_density_cells: 'grid',
+}
@@ -0,0 +1,124 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import pandas as pd
+
+from utils.cube import rollup
+from utils.views import cached_view
+
+#=============================================================
+# ----------- FUNÇõES ---------------
+#=============================================================
+#
+# Funções de pages/2_visao_entregadores.py, fora da página para que o
+# pré-cálculo ( utils/warmup.py ) e os benchmarks importem as mesmas
+# funções sem executar o layout do streamlit.
+
+
+#-------------------- VISÃO ENTREGADORES -------------------------
+
+# Idades, condições de veículo e avaliações por tráfego / clima vêm do
+# cubo pré-agregado ( utils/cube.py ); o que é por entregador usa df1
+
+#---A menor e maior idade entre os entregadores---
+
+# Mais novo
+@cached_view
+def youngest_deliverer(cube):
+    return rollup( cube, [], { 'Delivery_person_Age': [ 'min' ] } ).iloc[0, 0]
+
+# Mais velho
+@cached_view
+def oldest_deliverer(cube):
+    return rollup( cube, [], { 'Delivery_person_Age': [ 'max' ] } ).iloc[0, 0]
+
+
+#---A pior e a melhor condição de veículos---
+
+# Melhor condiçãos
+@cached_view
+def best_vehicle_condition(cube):
+    return rollup( cube, [], { 'Vehicle_condition': [ 'max' ] } ).iloc[0, 0]
+
+# Pior Condição
+@cached_view
+def worst_vehicle_condition(cube):
+    return rollup( cube, [], { 'Vehicle_condition': [ 'min' ] } ).iloc[0, 0]
+
+#---A avaliação médida por entregador---
+
+@cached_view
+def deliverer_ratings_mean(df1):
+    return df1.groupby( 'Delivery_person_ID' ).Delivery_person_Ratings.mean().round(2)
+
+#---A avaliação média e o desvio padrão por tipo de tráfego---
+
+@cached_view
+def rating_mean_std_by_traffic(cube):
+    mean_std_rating_by_traffic = rollup( cube, 'Road_traffic_density', { 'Delivery_person_Ratings': ['mean', 'std'] } )
+    mean_std_rating_by_traffic.columns = [ 'Avaliação Média', 'Desvio Padrão' ]
+    mean_std_rating_by_traffic = mean_std_rating_by_traffic.reset_index()
+    
+    return round(mean_std_rating_by_traffic, 2)
+
+#---A avaliação média e o desvio padrão por condição climática---
+
+@cached_view
+def rating_mean_std_by_weather(cube):
+    mean_std_rating_by_weather = rollup( cube, 'Weatherconditions', { 'Delivery_person_Ratings': ['mean', 'std'] } )
+    mean_std_rating_by_weather.columns = [ 'Avaliação Média', 'Desvio Padrão' ]
+    mean_std_rating_by_weather = mean_std_rating_by_weather.reset_index()
+    
+    return round(mean_std_rating_by_weather, 2)
+                                     
+    
+#--- 10 Entregadores mais rápidos por cidade ---    
+@cached_view
+def faster_deliverers_by_city(df1):
+    faster_deliverers_by_city = pd.DataFrame(df1.groupby( [ 'City', 'Delivery_person_ID'], observed=True )['Time_taken(min)'].mean())
+    faster_deliverers_by_city = faster_deliverers_by_city.sort_values(['City', 'Time_taken(min)']).reset_index()
+    
+    urban_faster_deliverers = faster_deliverers_by_city.query('City == "Urban"').head(10)
+    semiurban_faster_deliverers = faster_deliverers_by_city.query('City == "Semi-Urban"').head(10)
+    metropolitian_faster_deliverers = faster_deliverers_by_city.query('City == "Metropolitian"').head(10)
+    
+    faster_deliverers_by_city = pd.concat( [ urban_faster_deliverers, semiurban_faster_deliverers, metropolitian_faster_deliverers ] ).reset_index(drop=True)
+    return round(faster_deliverers_by_city)
+
+#--- 10 Entregadores mais lentos por cidade ---    
+@cached_view
+def slower_deliverers_by_city(df1):
+    slower_deliverers_by_city = pd.DataFrame(df1.groupby( [ 'City', 'Delivery_person_ID'], observed=True )['Time_taken(min)'].mean())
+    slower_deliverers_by_city = slower_deliverers_by_city.sort_values(['City', 'Time_taken(min)'], ascending=False).reset_index()
+    
+    urban_slower_deliverers = slower_deliverers_by_city.query('City == "Urban"').head(10)
+    semiurban_slower_deliverers = slower_deliverers_by_city.query('City == "Semi-Urban"').head(10)
+    metropolitian_slower_deliverers = slower_deliverers_by_city.query('City == "Metropolitian"').head(10)
+    
+    slower_deliverers_by_city = pd.concat( [ urban_slower_deliverers, semiurban_slower_deliverers, metropolitian_slower_deliverers ] ).reset_index(drop=True)
+    return round(slower_deliverers_by_city)
+
+
+# Funções calculadas sobre o cubo ( o modo aproximado calcula as exatas em segundo plano )
+CUBE_VIEWS = [
+    youngest_deliverer,
+    oldest_deliverer,
+    best_vehicle_condition,
+    worst_vehicle_condition,
+    rating_mean_std_by_traffic,
+    rating_mean_std_by_weather,
+]
+
+# Tabela de cada função da página ( df1, cube ou grid ): o pré-cálculo
+# ( utils/warmup.py ) chama cada função com a mesma tabela da página
+VIEW_TABLES = {
+    youngest_deliverer: 'cube',
+    oldest_deliverer: 'cube',
+    best_vehicle_condition: 'cube',
+    worst_vehicle_condition: 'cube',
+    deliverer_ratings_mean: 'df1',
+    rating_mean_std_by_traffic: 'cube',
+    rating_mean_std_by_weather: 'cube',
+    faster_deliverers_by_city: 'df1',
+    slower_deliverers_by_city: 'df1',
+}
@@ -0,0 +1,128 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.cube import rollup
+from utils.views import cached_view
+
+#=============================================================
+# ----------- FUNÇõES ---------------
+#=============================================================
+#
+# Funções de pages/3_visao_restaurantes.py, fora da página para que o
+# pré-cálculo ( utils/warmup.py ) e os benchmarks importem as mesmas
+# funções sem executar o layout do streamlit.
+
+#-------------------- VISÃO RESTARAUNTES -------------------------
+
+# Médias e desvios padrão vêm do cubo pré-agregado ( utils/cube.py );
+# entregadores únicos usam os pedidos ( df1 )
+
+# Entregadores Únicos
+@cached_view
+def unique_deliverers(df1):
+    return df1.Delivery_person_ID.nunique()
+
+# Distancia Média das Entregas
+# ( Delivery_distance já vem calculada no clean_code )
+@cached_view
+def media_distancia_entrega(cube):
+    return round( rollup( cube, [], { 'Delivery_distance': ['mean'] } ).iloc[0, 0], 2)
+
+# Tempo Médio e Desvio Padrão com ou sem festival
+@cached_view
+def festival_mean_std(cube):
+    festival_delivery_mean_timetaken = rollup( cube, 'Festival', { 'Time_taken(min)': [ 'mean', 'std' ] } )
+    festival_delivery_mean_timetaken.columns = [ 'avg_time', 'std_time' ]
+    return festival_delivery_mean_timetaken.reset_index()
+
+# Cria gráfico de Pizza com distancia média por cidade.
+@cached_view
+def grafico_distancia_media_por_cidade(cube):
+    avg_distance = rollup( cube, 'City', { 'Delivery_distance': ['mean'] } )
+    avg_distance.columns = [ 'Delivery_distance' ]
+    avg_distance = avg_distance.reset_index()
+    fig = go.Figure(
+        data=[ go.Pie( labels= avg_distance['City'], values= avg_distance['Delivery_distance'], pull=[0.05, 0.05, 0.05] ) ]
+    )
+    return fig
+
+# Cria grafico de barras da media do tempo de entrega com desvio padrão
+@cached_view
+def grafico_tempo_media_entrega_por_cidade(cube):
+                                                       #key (coluna a receber funções) #value (lista de funções)
+    mean_std_timetaken_by_city = rollup( cube, 'City', { 'Time_taken(min)': [ 'mean', 'std' ] } )
+    mean_std_timetaken_by_city.columns = [ 'avg_time', 'std_time' ]
+    mean_std_timetaken_by_city = mean_std_timetaken_by_city.reset_index()
+    fig= go.Figure()
+    fig.add_trace( go.Bar( name='Control', 
+                          x=mean_std_timetaken_by_city['City'],
+                          y=mean_std_timetaken_by_city['avg_time'],
+                          error_y= dict(type='data', array=mean_std_timetaken_by_city['std_time'])
+                         )
+    )
+    return fig
+
+# Cria grafico sunburst com o tempo medio por cidade e por tipo de trafego.
+@cached_view
+def sunburst_tempo_medio_tipo_trafego(cube):
+                                                                                             #key (coluna a receber funções) #value (lista de funções)
+    mean_std_timetaken_by_city_and_traffic = rollup( cube, ['City', 'Road_traffic_density'], { 'Time_taken(min)': [ 'mean', 'std' ] } )
+    mean_std_timetaken_by_city_and_traffic.columns = [ 'avg_time', 'std_time' ]
+    mean_std_timetaken_by_city_and_traffic = mean_std_timetaken_by_city_and_traffic.reset_index()
+    
+    sunburst = px.sunburst(
+        mean_std_timetaken_by_city_and_traffic, 
+        path=['City', 'Road_traffic_density'], 
+        values='avg_time',
+        color='std_time',
+        color_continuous_scale='Oranges',
+        color_continuous_midpoint=np.average( mean_std_timetaken_by_city_and_traffic['std_time'] )
+    )
+
+    return sunburst
+
+#Cria grafico sunburst com tempo por cidade e por tipo de pedido.
+@cached_view
+def tempo_medio_tipo_pedido(cube):
+                                                                                          #key (coluna a receber funções) #value (lista de funções)
+    mean_std_timetaken_by_city_and_typeoforder = rollup( cube, ['City', 'Type_of_order'], { 'Time_taken(min)': [ 'mean', 'std' ] } )
+    mean_std_timetaken_by_city_and_typeoforder.columns = [ 'avg_time', 'std_time' ]
+    mean_std_timetaken_by_city_and_typeoforder = mean_std_timetaken_by_city_and_typeoforder.reset_index()
+    
+    sunburst = px.sunburst(
+        mean_std_timetaken_by_city_and_typeoforder, 
+        path=['City', 'Type_of_order'], 
+        values='avg_time',
+        color='std_time',
+        color_continuous_scale='Oranges',
+        color_continuous_midpoint=np.average( mean_std_timetaken_by_city_and_typeoforder['std_time'] )
+    )
+    
+    
+    return mean_std_timetaken_by_city_and_typeoforder
+   
+# Funções calculadas sobre o cubo ( o modo aproximado calcula as exatas em segundo plano )
+CUBE_VIEWS = [
+    media_distancia_entrega,
+    festival_mean_std,
+    grafico_distancia_media_por_cidade,
+    grafico_tempo_media_entrega_por_cidade,
+    sunburst_tempo_medio_tipo_trafego,
+    tempo_medio_tipo_pedido,
+]
+
+# Tabela de cada função da página ( df1, cube ou grid ): o pré-cálculo
+# ( utils/warmup.py ) chama cada função com a mesma tabela da página
+VIEW_TABLES = {
+    unique_deliverers: 'df1',
+    media_distancia_entrega: 'cube',
+    festival_mean_std: 'cube',
+    grafico_distancia_media_por_cidade: 'cube',
+    grafico_tempo_media_entrega_por_cidade: 'cube',
+    sunburst_tempo_medio_tipo_trafego: 'cube',
+    tempo_medio_tipo_pedido: 'cube',
+}
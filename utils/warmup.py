@@ -0,0 +1,126 @@
+#---------------------------------------------------
+# ----------- IMPORTS ---------------
+#---------------------------------------------------
+import threading
+
+import streamlit as st
+
+from utils import visao_empresa, visao_entregadores, visao_restaurantes
+from utils.loader import DATA_PATH, load_bitmaps, load_data, load_geogrid, source_signature
+from utils.selection import cube_frame, filtered_frame, grid_frame
+from utils.sidebar import default_selection
+from utils.views import selection_key
+
+#=============================================================
+# ----------- PRÉ-CÁLCULO DA SELEÇÃO PADRÃO ---------------
+#=============================================================
+#
+# A maioria das visitas abre o painel sem mexer nos filtros. Na primeira
+# visita ao app (a Home ou qualquer página) uma thread em segundo plano
+# carrega o dataset, o índice do cubo ou o banco SQL, filtra
+# pela seleção padrão da barra lateral ( sidebar.default_selection ) e
+# chama todas as funções @cached_view das páginas (inclusive as células do
+# mapa de calor, sobre a grade espacial filtrada). Os resultados ficam
+# no VIEWS como os de qualquer seleção, mas fixados: o LRU não os
+# despeja enquanto o dataset estiver carregado.
+#
+# O pré-cálculo roda uma vez para cada versão do dataset (a chave do
+# cache_resource é a assinatura do arquivo). O HTML dos mapas da Visão
+# Geográfica não entra: ele fica no maps.MAPS, gerado na primeira exibição.
+
+# Módulos com as funções das páginas ( pages/*.py )
+PAGE_MODULES = ( visao_empresa, visao_entregadores, visao_restaurantes )
+
+
+def page_functions(*modules):
+    '''
+    Esta função retorna as funções decoradas com @cached_view de `modules`
+    (todas as páginas, sem argumentos), na ordem em que aparecem.
+
+    '''
+    return [
+        func
+        for module in modules or PAGE_MODULES
+        for func in vars( module ).values()
+        if hasattr( func, '__wrapped__' ) and func.__module__ == module.__name__
+    ]
+
+
+def view_table(func):
+    '''
+    Esta função retorna a tabela ( df1, cube ou grid ) com que a página
+    chama `func`, pelo VIEW_TABLES do módulo da função. Uma função
+    @cached_view fora do VIEW_TABLES levanta KeyError.
+
+    '''
+    module = next( module for module in PAGE_MODULES if module.__name__ == func.__module__ )
+    if func not in module.VIEW_TABLES:
+        raise KeyError( f'{func.__qualname__} não está no VIEW_TABLES de {module.__name__}' )
+
+    return module.VIEW_TABLES[func]
+
+
+def table_functions(table, *modules):
+    # Funções das páginas chamadas com a tabela `table` ( ex.: todas as do cubo )
+    return [ func for func in page_functions( *modules ) if view_table( func ) == table ]
+
+
+def page_calls():
+    '''
+    Esta função retorna as chamadas das funções das páginas: cada função,
+    a tabela dela ( VIEW_TABLES ) e os argumentos que a página usa além da
+    tabela ( PAGE_ARGUMENTS do módulo; sem ele, só a tabela e os valores
+    padrão).
+
+    '''
+    calls = []
+    for module in PAGE_MODULES:
+        arguments = getattr( module, 'PAGE_ARGUMENTS', {} )
+        calls += [ ( func, view_table( func ), args ) for func in page_functions( module ) for args in arguments.get( func, [ () ] ) ]
+
+    return calls
+
+
+def warm_default(path=DATA_PATH):
+    '''
+    Esta função calcula a seleção padrão de todas as páginas.
+    1- Carrega o dataset, o índice do cubo ou o banco SQL (os mesmos objetos das páginas)
+    2- Filtra o dataset e a grade espacial e monta a visão do cubo da seleção
+       padrão, fixadas no VIEWS
+    3- Chama cada função das páginas com a sua tabela ( df1, cube ou grid,
+       pelo VIEW_TABLES ) e os argumentos que a página usa ( page_calls )
+
+    '''
+    df1 = load_data( path )
+    bitmaps = load_bitmaps( path )
+    grid = load_geogrid( path )
+    selection = selection_key( *default_selection( df1 ) )
+
+    # Mesmas tabelas das páginas ( utils/selection.py ), fixadas no VIEWS
+    tables = {
+        'df1': filtered_frame( df1, selection, bitmaps, pin=True ),
+        'cube': cube_frame( path, selection, pin=True ),
+        'grid': grid_frame( grid, selection, pin=True ),
+    }
+
+    for func, table, args in page_calls():
+        func( tables[table], *args )
+
+
+# Uma thread por versão do dataset; o cache_resource guarda a thread
+@st.cache_resource( show_spinner=False, max_entries=4 )
+def _prewarm(path, stamp):
+    thread = threading.Thread( target=warm_default, args=( path, ), name='pre-calculo', daemon=True )
+    thread.start()
+
+    return thread
+
+
+def prewarm(path=DATA_PATH):
+    '''
+    Esta função inicia, uma vez por versão do dataset de `path`, o
+    pré-cálculo da seleção padrão em segundo plano e retorna a thread
+    (a página não espera por ela).
+
+    '''
+    return _prewarm( *source_signature( path ) )